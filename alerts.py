@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+門檻警報引擎 (Threshold-Crossing Alert Engine)
+
+頁面上的「HIGH RISK」「已觸發 -7% 警戒」只有在有人打開頁面時才看得到。
+警報引擎在每根新 K 棒 (或盤中報價) 進來時，只針對有變動的代號比對門檻：
+    40 週乖離：15% 警戒、20% 危險 (與 strategy_bias.backtest 相同的 20% 觸發 / 15% 結案)
+    距前高回檔：7% / 10% / 15% / 20% 階梯
+每條規則都有遲滯區間 (hysteresis)：觸發後必須退回重設門檻以下才會再次通知，
+數值在門檻附近來回震盪時不會重複發送。
+
+通知送到可插拔的 sink：StdoutSink、FileSink (JSON Lines)、WebhookSink，
+以及本地測試用的 LocalWebhookSink (只記錄將要 POST 的內容，不連網)。
+環境變數 TSE_ALERT_SINKS 以逗號設定，例如 "stdout,file:alerts.jsonl,webhook:https://..."。
+"""
+import datetime
+import json
+import os
+import threading
+import urllib.request
+
+from strategy_bias import TRIGGER_LEVEL, RESET_LEVEL
+
+# 回檔階梯的重設幅度：例如 10% 警報要回升到跌幅 8% 以內才重新武裝
+DRAWDOWN_HYSTERESIS = 2.0
+
+
+class AlertRule:
+    """
+    One threshold on one metric, armed again only after crossing back past `reset`.
+
+    Args:
+        name (str): Rule id, e.g. 'bias_20'.
+        metric (str): Metric key ('bias' or 'drawdown').
+        level (float): Fires when the metric rises to >= level.
+        reset (float): Re-arms when the metric falls below reset.
+        label (str): Human readable text used in the message.
+    """
+    __slots__ = ('name', 'metric', 'level', 'reset', 'label')
+
+    def __init__(self, name, metric, level, reset, label):
+        self.name = name
+        self.metric = metric
+        self.level = level
+        self.reset = reset
+        self.label = label
+
+
+DEFAULT_RULES = [
+    AlertRule('bias_15', 'bias', RESET_LEVEL, RESET_LEVEL - 2.0, "40週乖離警戒區 (≥15%)"),
+    AlertRule('bias_20', 'bias', TRIGGER_LEVEL, RESET_LEVEL, "40週乖離極度危險 (≥20%)"),
+] + [
+    AlertRule(f'drawdown_{int(lv)}', 'drawdown', lv, lv - DRAWDOWN_HYSTERESIS, f"距前高回檔 {int(lv)}%")
+    for lv in (7.0, 10.0, 15.0, 20.0)
+]
+
+
+class AlertEngine:
+    """
+    Incremental evaluation of threshold rules per ticker.
+
+    State is one flag per (ticker, rule) plus the last value per (ticker, metric),
+    so a tick costs O(rules) for each ticker whose metric actually changed.
+    The first value seen for a ticker only primes the state (no alert), so a
+    restart does not re-send alerts that were already active.
+    """
+
+    def __init__(self, rules=None, sinks=None):
+        self.rules = list(rules if rules is not None else DEFAULT_RULES)
+        self.sinks = list(sinks or [])
+        self._by_metric = {}
+        for rule in self.rules:
+            self._by_metric.setdefault(rule.metric, []).append(rule)
+        self._lock = threading.Lock()
+        self._active = {}     # (ticker, rule.name) -> bool
+        self._last = {}       # (ticker, metric) -> float
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def evaluate(self, ticker, when=None, **metrics):
+        """
+        Feed the latest metric values of one ticker, e.g. evaluate('^TWII', bias=18.2, drawdown=3.1).
+
+        Returns:
+            list: Alert dicts that were emitted.
+        """
+        when = when or datetime.datetime.now()
+        fired = []
+        with self._lock:
+            for metric, value in metrics.items():
+                if value is None or value != value:
+                    continue
+                key = (ticker, metric)
+                prev = self._last.get(key)
+                if prev == value:
+                    continue
+                self._last[key] = value
+                for rule in self._by_metric.get(metric, ()):
+                    state_key = (ticker, rule.name)
+                    active = self._active.get(state_key)
+                    if active is None:
+                        self._active[state_key] = value >= rule.level
+                    elif not active and value >= rule.level:
+                        self._active[state_key] = True
+                        fired.append(self._make_alert(ticker, rule, value, when, 'triggered'))
+                    elif active and value < rule.reset:
+                        self._active[state_key] = False
+                        fired.append(self._make_alert(ticker, rule, value, when, 'cleared'))
+
+        for alert in fired:
+            self._deliver(alert)
+        return fired
+
+    def evaluate_many(self, updates, when=None):
+        """
+        Evaluate a batch {ticker: {metric: value}} containing only the tickers that changed.
+        """
+        fired = []
+        for ticker, metrics in updates.items():
+            fired.extend(self.evaluate(ticker, when=when, **metrics))
+        return fired
+
+    def active_alerts(self, ticker=None):
+        with self._lock:
+            return sorted(name for (t, name), on in self._active.items() if on and (ticker is None or t == ticker))
+
+    @staticmethod
+    def _make_alert(ticker, rule, value, when, kind):
+        verb = "觸發" if kind == 'triggered' else "解除"
+        return {
+            'time': when.strftime('%Y-%m-%d %H:%M:%S'),
+            'ticker': ticker,
+            'rule': rule.name,
+            'metric': rule.metric,
+            'value': round(float(value), 2),
+            'level': rule.level,
+            'kind': kind,
+            'message': f"{'🚨' if kind == 'triggered' else '✅'} {ticker} {rule.label} {verb}：目前 {value:.1f}%"
+        }
+
+    def _deliver(self, alert):
+        for sink in self.sinks:
+            try:
+                sink.send(alert)
+            except Exception as e:
+                print(f"Alert sink {type(sink).__name__} failed: {e}")
+
+
+class StdoutSink:
+    def send(self, alert):
+        print(f"[ALERT {alert['time']}] {alert['message']}")
+
+
+class FileSink:
+    """Append alerts as JSON Lines."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, alert):
+        line = json.dumps(alert, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class WebhookSink:
+    """POST each alert as JSON to `url`."""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert):
+        req = urllib.request.Request(
+            self.url, data=json.dumps(alert, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(req, timeout=self.timeout):
+            pass
+
+
+class LocalWebhookSink:
+    """
+    Local webhook stand-in: keeps the JSON payloads that would have been POSTed.
+    """
+
+    def __init__(self, maxlen=500):
+        self.maxlen = maxlen
+        self.payloads = []
+        self._lock = threading.Lock()
+
+    def send(self, alert):
+        with self._lock:
+            self.payloads.append(json.dumps(alert, ensure_ascii=False))
+            del self.payloads[:-self.maxlen]
+
+
+def sinks_from_config(spec):
+    """
+    Build sinks from a spec like "stdout,file:alerts.jsonl,webhook:https://host/hook,local".
+    """
+    sinks = []
+    for item in filter(None, (x.strip() for x in spec.split(","))):
+        kind, _, arg = item.partition(":")
+        if kind == "stdout":
+            sinks.append(StdoutSink())
+        elif kind == "file":
+            sinks.append(FileSink(arg or "alerts.jsonl"))
+        elif kind == "webhook" and arg:
+            sinks.append(WebhookSink(arg))
+        elif kind == "local":
+            sinks.append(LocalWebhookSink())
+        else:
+            print(f"Unknown alert sink: {item}")
+    return sinks
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Process-wide engine configured from TSE_ALERT_SINKS (default: stdout)."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AlertEngine(sinks=sinks_from_config(os.environ.get("TSE_ALERT_SINKS", "stdout")))
+        return _engine
+
+
+def evaluate(ticker, **metrics):
+    return get_engine().evaluate(ticker, **metrics)
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+歷史相似情境搜尋 (Historical-Analogue Similarity Search)
+
+把每一週的市場狀態壓成一個特徵向量：
+    bias        40 週乖離 (%)
+    drawdown    距歷史前高回檔 (%)
+    max_dd_52w  近 52 週最大回檔 (%，以 52 週視窗內的滾動高點計算，與 strategy_bias.get_regime 一致)
+    wave_age    目前波段已進行的週數 (上漲波段為正、下跌波段為負)
+    ndc         景氣對策信號分數 (有提供月資料時才加入，依公布時差往後遞延)
+特徵以 z-score 標準化後存成連續的 float64 矩陣，查詢時一次矩陣向量乘法 (BLAS)
+算出與所有歷史週的距離，再挑出彼此相隔至少 min_gap_weeks 的 k 個最近鄰，
+避免同一段行情的連續幾週佔滿結果。每個鄰居附帶其之後的實際走勢 (前瞻報酬與最大回檔)，
+以及之後 PEAK_WEEKS 週內最高點出現在幾天後；乖離頁的「預報波段頂點日期」由此校準，
+不再使用寫死的少量樣本。
+"""
+import numpy as np
+import pandas as pd
+
+from outcomes import DRAWDOWN, RETURN
+from result_types import WAVE_UP, NS_PER_DAY
+
+FEATURES = ('bias', 'drawdown', 'max_dd_52w', 'wave_age')
+
+# 相似情境附帶的前瞻結果 (週，須為 outcomes.WEEKLY_HORIZONS 之一)
+OUTCOME_WEEKS = (4, 13, 26)
+
+# 見頂天數：之後幾週內的最高點 (含當週)
+PEAK_WEEKS = 26
+
+# 國發會景氣燈號約晚 2 個月公布，特徵只能用當時已公布的分數
+NDC_LAG_MONTHS = 2
+
+NS_PER_WEEK = 7 * NS_PER_DAY
+
+
+def _wave_age(week_ns, waves):
+    # 每週最後一天已經開始的最近一個波段
+    week_end = week_ns + NS_PER_WEEK - 1
+    idx = np.searchsorted(waves.start_date, week_end, side='right') - 1
+    age = np.full(len(week_ns), np.nan)
+    ok = idx >= 0
+    start = waves.start_date[idx[ok]]
+    sign = np.where(waves.kind[idx[ok]] == WAVE_UP, 1.0, -1.0)
+    age[ok] = sign * np.maximum(week_end[ok] - start, 0) / NS_PER_WEEK
+    return age
+
+
+def _max_drawdown_52w(high, close, weeks=52):
+    # 每週往前 52 週的視窗：視窗內由起點累積的最高價為前高，取 (前高 - 收盤) / 前高 的最大值
+    pad = np.full(weeks - 1, np.nan)
+    high_win = np.lib.stride_tricks.sliding_window_view(np.concatenate([pad, high]), weeks)
+    close_win = np.lib.stride_tricks.sliding_window_view(np.concatenate([pad, close]), weeks)
+    peak = np.fmax.accumulate(high_win, axis=1)
+    with np.errstate(invalid='ignore'):
+        return np.nanmax((peak - close_win) / peak * 100, axis=1)
+
+
+def build_features(weekly, waves=None, ndc_scores=None):
+    """
+    One feature row per weekly bar.
+
+    Args:
+        weekly (pd.DataFrame): Output of `resample_weekly` (needs High, Close, Bias).
+        waves (WaveTable): Waves of the reversal model, for the wave-age feature.
+        ndc_scores (pd.Series): Monthly NDC monitoring scores indexed by month (optional).
+
+    Returns:
+        pd.DataFrame: Feature columns indexed like `weekly`.
+    """
+    close = weekly['Close'].to_numpy(dtype=np.float64)
+    high = weekly['High'].to_numpy(dtype=np.float64)
+    peak = np.fmax.accumulate(high)
+    drawdown = (peak - close) / peak * 100
+
+    feats = pd.DataFrame({
+        'bias': weekly['Bias'].to_numpy(dtype=np.float64),
+        'drawdown': drawdown,
+        'max_dd_52w': _max_drawdown_52w(high, close) if len(close) else np.array([])
+    }, index=weekly.index)
+
+    if waves is not None and len(waves):
+        week_ns = np.asarray(weekly.index, dtype='datetime64[ns]').view(np.int64)
+        feats['wave_age'] = _wave_age(week_ns, waves)
+
+    if ndc_scores is not None and len(ndc_scores):
+        published = pd.Series(ndc_scores.to_numpy(dtype=np.float64),
+                              index=pd.DatetimeIndex(ndc_scores.index) + pd.DateOffset(months=NDC_LAG_MONTHS))
+        feats['ndc'] = published.sort_index().reindex(weekly.index, method='ffill').to_numpy()
+
+    return feats
+
+
+def peak_days(weekly, weeks=PEAK_WEEKS):
+    """
+    Days from each week to the highest weekly High of the following `weeks` weeks (inclusive).
+
+    Returns:
+        pd.Series: Indexed like `weekly`; NaN where the window runs past the last bar.
+    """
+    high = np.nan_to_num(weekly['High'].to_numpy(dtype=np.float64), nan=-np.inf)
+    week_ns = np.asarray(weekly.index, dtype='datetime64[ns]').view(np.int64)
+    days = np.full(len(high), np.nan)
+    n = len(high) - weeks
+    if n > 0:
+        offset = np.lib.stride_tricks.sliding_window_view(high, weeks + 1).argmax(axis=1)
+        start = np.arange(n)
+        days[:n] = (week_ns[start + offset] - week_ns[start]) / NS_PER_DAY
+    return pd.Series(days, index=weekly.index, name='peak_days')
+
+
+def outcome_frame(matrix, horizons=OUTCOME_WEEKS):
+    """
+    Forward return and forward max drawdown (%) columns taken from a weekly OutcomeMatrix.
+    """
+    return pd.DataFrame({
+        col: matrix.column(f'{h}w', kind)
+        for h in horizons
+        for col, kind in ((f'ret_{h}w', RETURN), (f'mdd_{h}w', DRAWDOWN))
+    }, index=pd.DatetimeIndex(matrix.dates.view('datetime64[ns]')))
+
+
+class AnalogueIndex:
+    """
+    Standardized feature matrix with brute-force kNN queries.
+
+    Args:
+        features (pd.DataFrame): Output of `build_features`.
+        outcomes (pd.DataFrame): Output of `outcome_frame`, same index.
+        weights (dict): Optional per-feature weights (default 1.0).
+    """
+
+    def __init__(self, features, outcomes, weights=None):
+        valid = features.notna().all(axis=1).to_numpy()
+        self.columns = list(features.columns)
+        self.dates = features.index[valid]
+        raw = features.to_numpy(dtype=np.float64)[valid]
+        self.raw = raw
+        self.mean = raw.mean(axis=0)
+        std = raw.std(axis=0)
+        self.scale = np.where(std > 0, std, 1.0)
+        w = np.array([(weights or {}).get(c, 1.0) for c in self.columns], dtype=np.float64)
+        self.weights = np.sqrt(w)
+        self.matrix = np.ascontiguousarray((raw - self.mean) / self.scale * self.weights)
+        self.sq_norms = np.einsum('ij,ij->i', self.matrix, self.matrix)
+        self.outcomes = outcomes.reindex(self.dates)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def _encode(self, vector):
+        if isinstance(vector, dict):
+            vector = [vector[c] for c in self.columns]
+        return (np.asarray(vector, dtype=np.float64) - self.mean) / self.scale * self.weights
+
+    def current_vector(self):
+        """Feature values of the latest indexed week, as a dict."""
+        return dict(zip(self.columns, self.raw[-1].tolist()))
+
+    def query(self, vector, k=10, min_gap_weeks=8, exclude_recent_weeks=None):
+        """
+        Nearest historical weeks to `vector`.
+
+        Args:
+            vector (dict | array): Feature values (raw units, same columns as the index).
+            k (int): Number of analogues.
+            min_gap_weeks (int): Minimum distance in weeks between two returned analogues.
+            exclude_recent_weeks (int): Skip the last N indexed weeks (defaults to
+                `min_gap_weeks`, so the current episode does not match itself).
+
+        Returns:
+            pd.DataFrame: Date, distance, feature values and forward outcomes, nearest first.
+        """
+        q = self._encode(vector)
+        # ‖a − q‖² = ‖a‖² − 2·a·q + ‖q‖²，一次 BLAS 矩陣向量乘法
+        dist2 = self.sq_norms - 2.0 * (self.matrix @ q) + q @ q
+        n = len(dist2)
+        limit = n - (min_gap_weeks if exclude_recent_weeks is None else exclude_recent_weeks)
+        order = np.argsort(dist2[:max(limit, 0)], kind='stable')
+
+        picked = []
+        blocked = np.zeros(n, dtype=bool)
+        for i in order:
+            if blocked[i]:
+                continue
+            picked.append(i)
+            if len(picked) == k:
+                break
+            blocked[max(i - min_gap_weeks + 1, 0):i + min_gap_weeks] = True
+
+        idx = np.array(picked, dtype=np.int64)
+        result = pd.DataFrame(self.raw[idx], columns=self.columns)
+        result.insert(0, 'distance', np.sqrt(np.maximum(dist2[idx], 0)))
+        result.insert(0, 'date', self.dates[idx])
+        return pd.concat([result, self.outcomes.iloc[idx].reset_index(drop=True)], axis=1)
+
+
+def summarize(analogues, horizons=OUTCOME_WEEKS):
+    """
+    Median and worst forward outcome across the analogues, per horizon.
+
+    Returns:
+        dict: {h: {'ret_median', 'ret_worst', 'mdd_median', 'mdd_worst', 'count'}}.
+    """
+    out = {}
+    for h in horizons:
+        ret = analogues[f'ret_{h}w'].dropna()
+        mdd = analogues[f'mdd_{h}w'].dropna()
+        out[h] = {
+            'ret_median': float(ret.median()) if len(ret) else None,
+            'ret_worst': float(ret.min()) if len(ret) else None,
+            'mdd_median': float(mdd.median()) if len(mdd) else None,
+            'mdd_worst': float(mdd.min()) if len(mdd) else None,
+            'count': int(len(ret))
+        }
+    return out
+
+
+def peak_calibration(analogues):
+    """
+    Top-date window from the analogues' days-to-peak (see `peak_days`).
+
+    Returns:
+        dict: {'fast', 'typical', 'extreme', 'count'} (min / median / max days and the
+        number of analogues with a complete window), or None when there is none.
+    """
+    if analogues is None or 'peak_days' not in analogues.columns:
+        return None
+    days = analogues['peak_days'].dropna()
+    if days.empty:
+        return None
+    return {'fast': int(days.min()), 'typical': int(round(days.median())),
+            'extreme': int(days.max()), 'count': int(len(days))}
@@ -0,0 +1,729 @@
+# -*- coding: utf-8 -*-
+"""
+分析服務層 (Analytics Service)
+
+所有頁面共用的計算都集中在這裡：日線資料、週線乖離、7% 回檔事件、
+上漲波段與分布統計。結果以明確的快取鍵 `dataset:ticker` 存放於 artifact_cache，
+並標記資料版本；頁面、腳本與啟動預熱都透過同一組 get_* 函數取用，
+頁面本身只負責渲染。
+日線換新版本後，訪客先拿到上一版成品 (stale-while-revalidate)，新版本在背景執行緒建好後才替換；
+只有從未建過的成品才需要等待計算。
+"""
+import datetime
+import threading
+
+import numpy as np
+import pandas as pd
+
+import analogues
+import artifact_cache
+import bias_chart
+import event_cards
+import event_store
+import market_snapshot
+import montecarlo
+import outcomes
+import telemetry
+import walkforward
+import wave_overrides
+from live_state import LiveMarketState
+from data_fetcher import fetch_ohlcv, daily_hlc, resample_weekly
+from range_index import PriceRangeIndex
+from result_types import WAVE_UP, WAVE_DOWN, days_between, format_dates, to_ns
+from strategy_7pct import build_7pct_events, calculate_7pct_statistics
+from strategy_bias import backtest
+from strategy_upward_wave import get_upward_waves, upward_ci
+from wave_analyzer import build_wave_table
+
+DEFAULT_TICKER = "^TWII"
+
+_locks_guard = threading.Lock()
+_build_locks = {}
+# 正在背景重建新版本的快取鍵 (同一鍵同時只排一個)
+_revalidating = set()
+
+# 目前執行緒正在建構的快取鍵 (記錄依賴)、要強制重算的快取鍵 (背景重建)，
+# 以及 blocking (預熱 / 重建執行緒：過期成品就地重算，不先回傳舊版)
+_local = threading.local()
+# 快取鍵 -> (dataset, ticker, build)：背景重建時重跑同一個 build
+_builders = {}
+# 快取鍵 -> 以它為輸入的上層快取鍵 (例如 waves:^TWII -> upward_analysis:^TWII)
+# _builders / _dependents 由預熱、背景重建與訪客執行緒同時寫入，讀寫都在 _locks_guard 之下
+_dependents = {}
+# 背景重建狀態：快取鍵 -> {status, started_at, finished_at, keys, error}
+_rebuilds = {}
+_rebuilds_lock = threading.Lock()
+
+
+def cache_key(dataset, ticker=DEFAULT_TICKER):
+    """
+    Explicit cache key of one dataset, e.g. 'upward_analysis:^TWII'.
+    """
+    return f"{dataset}:{ticker}"
+
+
+def _key_lock(key):
+    # 同一個快取鍵同時只允許一個執行緒計算，其餘等待結果 (避免預熱與訪客重複計算)
+    with _locks_guard:
+        return _build_locks.setdefault(key, threading.Lock())
+
+
+def refresh_daily(ticker=DEFAULT_TICKER):
+    """
+    Download the daily history and publish it as the new data version.
+
+    Returns:
+        pd.DataFrame: Daily OHLCV.
+    """
+    key = cache_key('daily', ticker)
+    with _key_lock(key):
+        with telemetry.span('fetch'):
+            daily = fetch_ohlcv(ticker)
+        artifact_cache.publish(key, daily, artifact_cache.data_version(daily))
+    return daily
+
+
+def _daily_entry(ticker):
+    key = cache_key('daily', ticker)
+    entry = artifact_cache.get(key)
+    if entry is None:
+        with _key_lock(key):
+            entry = artifact_cache.get(key)
+            if entry is None:
+                telemetry.miss(key)
+                with telemetry.span('fetch'):
+                    daily = fetch_ohlcv(ticker)
+                artifact_cache.publish(key, daily, artifact_cache.data_version(daily))
+                entry = artifact_cache.get(key)
+    else:
+        telemetry.hit(key)
+    return entry
+
+
+def data_version(ticker=DEFAULT_TICKER):
+    return _daily_entry(ticker)['version']
+
+
+def _derived(dataset, ticker, build):
+    """
+    Return the cached dataset for the current data version, building it once if missing.
+
+    When only an older version is cached, the old value is returned right away and
+    the new version is built in a background thread (stale-while-revalidate). Nested
+    builds, warm-up and rebuild threads (see `build_now`) compute it in place instead.
+
+    Args:
+        dataset (str): Dataset name used in the cache key.
+        ticker (str): The ticker symbol.
+        build (callable): build(daily) -> value.
+    """
+    daily_entry = _daily_entry(ticker)
+    version = daily_entry['version']
+    key = cache_key(dataset, ticker)
+    building = getattr(_local, 'building', None)
+    if building:
+        # 在上層成品的 build 內被呼叫：記錄依賴，之後重算本鍵時一併重算上層
+        with _locks_guard:
+            _dependents.setdefault(key, set()).add(building[-1])
+    forced = getattr(_local, 'force', None) == key
+
+    entry = artifact_cache.get(key)
+    if not forced and entry is not None and entry['version'] == version:
+        telemetry.hit(key)
+        return entry['value']
+    if not forced and entry is not None and not building and not getattr(_local, 'blocking', False):
+        # 舊版本成品先頂著用，新版本交給背景執行緒
+        telemetry.hit(key)
+        _revalidate(dataset, ticker, build)
+        return entry['value']
+
+    with _key_lock(key):
+        entry = artifact_cache.get(key)
+        if not forced and entry is not None and entry['version'] == version:
+            # 等待其他執行緒建好的成品也算命中 (沒有重算)
+            telemetry.hit(key)
+            return entry['value']
+        telemetry.miss(key)
+        with _locks_guard:
+            _builders[key] = (dataset, ticker, build)
+        if building is None:
+            building = _local.building = []
+        building.append(key)
+        try:
+            with telemetry.span(f'build:{dataset}'):
+                value = build(daily_entry['value'])
+        finally:
+            building.pop()
+        artifact_cache.publish(key, value, version)
+        return value
+
+
+def build_now(loader, *args):
+    """
+    Call a get_* loader so stale artifacts are rebuilt in this thread instead of served.
+
+    Used by the warm-up and rebuild jobs, which must finish with every artifact on
+    the current data version.
+    """
+    previous = getattr(_local, 'blocking', False)
+    _local.blocking = True
+    try:
+        return loader(*args)
+    finally:
+        _local.blocking = previous
+
+
+def _revalidate(dataset, ticker, build):
+    key = cache_key(dataset, ticker)
+    with _locks_guard:
+        if key in _revalidating:
+            return
+        _revalidating.add(key)
+
+    def run():
+        try:
+            build_now(_derived, dataset, ticker, build)
+        except Exception as e:
+            print(f"Background rebuild of {key} failed: {e}")
+        finally:
+            with _locks_guard:
+                _revalidating.discard(key)
+    threading.Thread(target=run, daemon=True, name=f"tse-revalidate-{key}").start()
+
+
+def _rebuild_order(*keys):
+    # 這些鍵與所有下游成品，依拓撲順序排列 (輸入一定排在使用它的成品之前)
+    order, seen = [], set()
+
+    def visit(k):
+        if k in seen:
+            return
+        seen.add(k)
+        with _locks_guard:
+            parents = tuple(_dependents.get(k, ()))
+        for parent in parents:
+            visit(parent)
+        order.append(k)
+    for key in keys:
+        visit(key)
+    return order[::-1]
+
+
+def _start_rebuild(job, order, refetch_ticker=None):
+    with _rebuilds_lock:
+        if _rebuilds.get(job, {}).get('status') == 'running':
+            return []
+        _rebuilds[job] = {'status': 'running', 'started_at': datetime.datetime.now(),
+                          'finished_at': None, 'keys': order, 'error': None}
+    threading.Thread(target=_rebuild_worker, args=(job, order, refetch_ticker),
+                     daemon=True, name=f"tse-rebuild-{job}").start()
+    return order
+
+
+def _rebuild_worker(job, order, refetch_ticker=None):
+    try:
+        if refetch_ticker is not None:
+            # 新日線發布後，訪客仍拿到上一版成品 (見 _derived)；這裡依拓撲順序就地建好新版本
+            refresh_daily(refetch_ticker)
+        for k in order:
+            with _locks_guard:
+                entry = _builders.get(k)
+            if entry is None:
+                continue
+            dataset, ticker, build = entry
+            # 重新抓取後版本已變，一般取用就會重建 (訪客觸發的背景重建先完成的不必再算一次)
+            _local.force = k if refetch_ticker is None else None
+            try:
+                build_now(_derived, dataset, ticker, build)
+            finally:
+                _local.force = None
+        with _rebuilds_lock:
+            _rebuilds[job].update(status='ready', finished_at=datetime.datetime.now())
+    except Exception as e:
+        print(f"Cache rebuild failed for {job}: {e}")
+        with _rebuilds_lock:
+            _rebuilds[job].update(status='failed', error=str(e), finished_at=datetime.datetime.now())
+
+
+def rebuild(dataset, ticker=DEFAULT_TICKER, cascade=True):
+    """
+    Recompute one cached dataset in a background thread; the old entry keeps serving until replaced.
+
+    Args:
+        dataset (str): Dataset name, e.g. 'waves'.
+        ticker (str): The ticker symbol.
+        cascade (bool): Also recompute every artifact built from it (e.g. up-wave stats and cards).
+
+    Returns:
+        list[str]: Cache keys scheduled, in rebuild order (empty if unknown or already running).
+    """
+    key = cache_key(dataset, ticker)
+    with _locks_guard:
+        known = key in _builders
+    if not known:
+        return []
+    return _start_rebuild(key, _rebuild_order(key) if cascade else [key])
+
+
+def refetch(ticker=DEFAULT_TICKER):
+    """
+    Re-download one ticker in a background thread, then rebuild every artifact cached for it.
+
+    Other tickers are untouched. Pages keep reading the previous-version artifacts
+    while the job runs; each one is replaced as soon as its new version is built.
+
+    Returns:
+        list[str]: Cache keys that will be rebuilt (empty if a refetch is already running).
+    """
+    with _locks_guard:
+        keys = [k for k in list(_builders) if k.rpartition(':')[2] == ticker]
+    return _start_rebuild(cache_key('daily', ticker), _rebuild_order(*keys), refetch_ticker=ticker)
+
+
+def rebuild_status():
+    with _rebuilds_lock:
+        return {k: dict(v) for k, v in _rebuilds.items()}
+
+
+def invalidate(dataset, ticker=DEFAULT_TICKER):
+    """Drop one cached dataset; the next request rebuilds it (use `rebuild` to keep serving the old one)."""
+    return artifact_cache.drop(cache_key(dataset, ticker))
+
+
+def cache_entries():
+    """
+    Cached artifacts for the admin cache panel.
+
+    Returns:
+        pd.DataFrame: dataset, ticker, version, size (KB), age (min), hits, misses, dependents.
+    """
+    counts = telemetry.cache_counts()
+    rows = []
+    for e in artifact_cache.entries():
+        dataset, _, ticker = e['name'].rpartition(':')
+        hits, misses = counts.get(e['name'], (0, 0))
+        rows.append({'資料集': dataset, '代號': ticker, '版本': e['version'],
+                     '大小 (KB)': round(e['size'] / 1024, 1), '存活 (分)': round(e['age'] / 60, 1),
+                     '命中': hits, '未命中': misses, '下游成品': len(_rebuild_order(e['name'])) - 1})
+    columns = ['資料集', '代號', '版本', '大小 (KB)', '存活 (分)', '命中', '未命中', '下游成品']
+    return pd.DataFrame(rows, columns=columns).sort_values(['代號', '資料集'], kind='stable').reset_index(drop=True)
+
+
+def get_daily(ticker=DEFAULT_TICKER):
+    """Daily OHLCV (shared object, do not mutate)."""
+    return _daily_entry(ticker)['value']
+
+
+def get_daily_hlc(ticker=DEFAULT_TICKER):
+    """Daily High/Low/Close since 2000, the input of the 7% and wave engines."""
+    return _derived('daily_hlc', ticker, lambda daily: daily_hlc(daily, start_date="2000-01-01"))
+
+
+def _build_weekly(daily):
+    weekly = resample_weekly(daily)
+    # 額外存儲最後更新時間，供 UI 顯示
+    weekly.attrs['last_update'] = datetime.datetime.now()
+    return weekly
+
+
+def get_weekly(ticker=DEFAULT_TICKER):
+    """Weekly bars with SMA40 / Bias for the 40-week radar."""
+    return _derived('weekly', ticker, _build_weekly)
+
+
+def get_bias_backtest(ticker=DEFAULT_TICKER):
+    """Historical extreme-bias episodes (backtest of the 20% / 15% triggers)."""
+    return _derived('bias_backtest', ticker, lambda daily: backtest(get_weekly(ticker)))
+
+
+def _build_bias_chart(ticker):
+    weekly, b_df = get_weekly(ticker), get_bias_backtest(ticker)
+    # 新的一根 K 棒只修補上一版圖表的最後一個點，歷史有變動時才整張重建
+    previous = artifact_cache.get(cache_key('bias_chart', ticker))
+    spec = bias_chart.patch_last_bar(previous['value']['spec'], weekly, b_df) if previous else None
+    if spec is None:
+        spec = bias_chart.build_spec(weekly, b_df)
+    return {'spec': spec, 'json': bias_chart.to_json(spec)}
+
+
+def get_bias_chart(ticker=DEFAULT_TICKER):
+    """Radar chart spec and its serialized JSON, built once per data version."""
+    return _derived('bias_chart', ticker, lambda daily: _build_bias_chart(ticker))
+
+
+def get_range_index(ticker=DEFAULT_TICKER):
+    """Range max/min index over the daily High/Low/Close (O(1) range queries)."""
+    return _derived('range_index', ticker, lambda daily: PriceRangeIndex(get_daily_hlc(ticker)))
+
+
+def get_7pct_events(ticker=DEFAULT_TICKER):
+    """7% drawdown events as a columnar EventTable (int64 dates, no display strings)."""
+    return _derived('7pct_events', ticker, lambda daily: build_7pct_events(
+        get_daily_hlc(ticker), trigger_pct=7.0, range_index=get_range_index(ticker)))
+
+
+def _build_7pct(ticker):
+    events_df = get_7pct_events(ticker).to_frame()
+    metrics, dist_df = calculate_7pct_statistics(events_df)
+    return events_df, metrics, dist_df
+
+
+def get_7pct(ticker=DEFAULT_TICKER):
+    """
+    Returns:
+        tuple: (events_df, metrics, dist_df) of the 7% drawdown engine.
+    """
+    return _derived('7pct', ticker, lambda daily: _build_7pct(ticker))
+
+
+def _build_downward_analysis(ticker):
+    df = get_daily_hlc(ticker)
+    events_df, metrics, dist_df = get_7pct(ticker)
+    if df.empty:
+        return df, pd.DataFrame(), {}, pd.DataFrame(), "N/A"
+    return df, events_df, metrics, dist_df, df.index[-1].strftime('%Y-%m-%d')
+
+
+def get_downward_analysis(ticker=DEFAULT_TICKER):
+    """
+    Returns:
+        tuple: (df, events_df, metrics, dist_df, current_dd, last_date) for the drawdown page.
+    """
+    df, events_df, metrics, dist_df, last_date = _derived(
+        'downward_analysis', ticker, lambda daily: _build_downward_analysis(ticker))
+    # 目前回檔幅度由即時狀態 O(1) 讀取，與 market_snapshot 一致
+    return df, events_df, metrics, dist_df, get_live_state(ticker).current_drawdown, last_date
+
+
+def get_waves(ticker=DEFAULT_TICKER):
+    """Up/down waves of the 7% reversal model (跌 7% 確認頭部，漲 7% 確認底部)."""
+    return _derived('waves', ticker, lambda daily: build_wave_table(get_daily_hlc(ticker), reversal_percent=7.0))
+
+
+def _build_upward_analysis(ticker):
+    df = get_daily_hlc(ticker)
+    waves = get_waves(ticker)
+    if df.empty or len(waves) == 0:
+        return pd.DataFrame(), pd.DataFrame(), {}
+
+    # 取出所有向上波段並加入前波清洗度 (前一段為下跌波段時的跌幅)
+    up_pos = np.flatnonzero(waves.kind == WAVE_UP)
+    if up_pos.size == 0:
+        return pd.DataFrame(), pd.DataFrame(), {}
+
+    prev_pos = up_pos - 1
+    has_prev = prev_pos >= 0
+    has_prev[has_prev] = waves.kind[prev_pos[has_prev]] == WAVE_DOWN
+    pre_dd = np.zeros(up_pos.size)
+    prev_high = waves.highest_price[prev_pos[has_prev]]
+    pre_dd[has_prev] = (waves.lowest_price[prev_pos[has_prev]] - prev_high) / prev_high * 100
+
+    up = waves.take(up_pos)
+    # 進行中的波段以最後交易日與現價計算
+    last_ns = to_ns(df.index[-1:])[0]
+    end_price = np.where(up.ongoing, float(df['Close'].iloc[-1]), up.end_price)
+    end_ns = np.where(up.ongoing, last_ns, up.end_date)
+    end_str = np.where(up.ongoing, f"至今 ({df.index[-1].strftime('%m/%d')})", format_dates(up.end_date))
+
+    up_df = pd.DataFrame({
+        '起漲日期 (前波破底)': format_dates(up.start_date),
+        '最高日期 (下波前高)': end_str.astype(object),
+        '起漲價格': up.start_price.round(2),
+        '最高價格 (或現價)': end_price.round(2),
+        '漲幅(%)': ((end_price - up.start_price) / up.start_price * 100).round(2),
+        '花費天數': days_between(up.start_date, end_ns).astype(int),
+        '狀態': np.where(up.ongoing, '進行中', '已完結').astype(object),
+        '前波清洗度(%)': pre_dd
+    })
+
+    # 統計機率 (排除進行中)
+    finished_waves = up_df[up_df['狀態'] == '已完結']
+    if finished_waves.empty:
+        finished_waves = up_df
+
+    # 分配區間
+    bins = [0, 10, 20, 30, 40, 50, 60, 70, 10000]
+    labels = ['     0~10%', '  10~20%', '  20~30%', '  30~40%', '  40~50%', '  50~60%', '  60~70%', '70% 以上']
+
+    try:
+         count_series = pd.cut(finished_waves['漲幅(%)'], bins=bins, labels=labels, right=False).value_counts().sort_index()
+    except:
+         count_series = pd.Series(0, index=labels)
+
+    dist_results = []
+    total = len(finished_waves)
+    for label, count in count_series.items():
+        prob = (count / total * 100) if total > 0 else 0
+        dist_results.append({
+            '區間': label.strip(),
+            '次數': count,
+            '機率(%):Q': round(float(prob), 2),
+            '機率(%)': round(float(prob), 2)
+        })
+    dist_df = pd.DataFrame(dist_results)
+
+    metrics = {
+        '總完整波段數': total,
+        '平均漲幅(%)': round(float(finished_waves['漲幅(%)'].mean()), 2) if total > 0 else 0,
+        '平均花費天數': round(float(finished_waves['花費天數'].mean()), 1) if total > 0 else 0,
+        '漲幅超過 10% 機率': round(float(len(finished_waves[finished_waves['漲幅(%)'] >= 10]) / total * 100), 1) if total > 0 else 0,
+        '漲幅超過 20% 機率': round(float(len(finished_waves[finished_waves['漲幅(%)'] >= 20]) / total * 100), 1) if total > 0 else 0,
+        '漲幅超過 30% 機率': round(float(len(finished_waves[finished_waves['漲幅(%)'] >= 30]) / total * 100), 1) if total > 0 else 0,
+        '漲幅超過 40% 機率': round(float(len(finished_waves[finished_waves['漲幅(%)'] >= 40]) / total * 100), 1) if total > 0 else 0,
+        '漲幅超過 50% 機率': round(float(len(finished_waves[finished_waves['漲幅(%)'] >= 50]) / total * 100), 1) if total > 0 else 0
+    }
+
+    return up_df, dist_df, metrics
+
+
+def get_upward_analysis(ticker=DEFAULT_TICKER):
+    """
+    Returns:
+        tuple: (up_df, dist_df, metrics, current_bounce) for the up-wave statistics page.
+    """
+    def build(daily):
+        up_df, dist_df, metrics = _build_upward_analysis(ticker)
+        # 人工修正表 (wave_overrides.json) 以已載入的日線查價，不需重新下載
+        up_df = wave_overrides.apply_overrides(up_df, get_daily_hlc(ticker), wave_overrides.overrides_for(ticker))
+        # 信賴區間以修正後的已完結波段計算，與頁面上的機率同一母體
+        finished = up_df[up_df['狀態'] == '已完結']
+        metrics = {**metrics, 'CI': upward_ci(finished if not finished.empty else up_df, (10, 20, 30, 40, 50))}
+        return up_df, dist_df, metrics
+    up_df, dist_df, metrics = _derived('upward_analysis', ticker, build)
+    return up_df, dist_df, metrics, get_live_state(ticker).current_bounce
+
+
+def get_upward_wave_analysis(ticker=DEFAULT_TICKER):
+    """
+    Up-waves paired from consecutive 7% events (bottom -> next peak).
+
+    Returns:
+        tuple: (up_df, dist_df, metrics).
+    """
+    def build(daily):
+        return get_upward_waves(get_7pct_events(ticker), get_daily_hlc(ticker), get_range_index(ticker))
+    return _derived('upward_wave_analysis', ticker, build)
+
+
+EVENT_LOGS = ('bias', 'upward', 'drawdown')
+
+
+def get_event_store(log, ticker=DEFAULT_TICKER):
+    """
+    Pre-sorted, pre-indexed event table (newest first) for server-side filtering and paging.
+
+    Args:
+        log (str): One of EVENT_LOGS, or 'upward_wave' (up-waves paired from 7% events).
+
+    Returns:
+        event_store.EventStore: Row positions line up with `get_event_cards(log)`.
+    """
+    def build(daily):
+        if log == 'bias':
+            return event_store.bias_store(get_bias_backtest(ticker))
+        if log == 'upward':
+            return event_store.upward_store(get_upward_analysis(ticker)[0])
+        if log == 'upward_wave':
+            return event_store.upward_store(get_upward_wave_analysis(ticker)[0])
+        return event_store.drawdown_store(get_downward_analysis(ticker)[1])
+    return _derived(f'store_{log}', ticker, build)
+
+
+def get_event_cards(log, ticker=DEFAULT_TICKER):
+    """
+    Pre-rendered history log cards (newest first), built once per data version.
+
+    Args:
+        log (str): 'bias' (40-week bias episodes), 'upward' (up-waves) or 'drawdown' (7% events).
+
+    Returns:
+        np.ndarray: Card HTML strings, one per row of `get_event_store(log).frame`.
+    """
+    def build(daily):
+        frame = get_event_store(log, ticker).frame
+        if log == 'bias':
+            weekly = get_weekly(ticker)
+            latest = weekly.attrs.get('latest_trade_date', weekly.index[-1] if len(weekly) else None)
+            return event_cards.bias_cards(frame, latest)
+        if log == 'upward':
+            return event_cards.upward_cards(frame)
+        return event_cards.drawdown_cards(frame)
+    return _derived(f'cards_{log}', ticker, build)
+
+
+def get_all_event_cards(ticker=DEFAULT_TICKER):
+    return {log: get_event_cards(log, ticker) for log in EVENT_LOGS}
+
+
+def get_outcomes(ticker=DEFAULT_TICKER, freq='weekly'):
+    """
+    Forward return / max drawdown / max gain matrix for every bar.
+
+    Args:
+        freq (str): 'weekly' (1/4/13/26/52 weekly bars) or 'daily' (same horizons in trading days).
+    """
+    if freq == 'weekly':
+        return _derived('outcomes_weekly', ticker,
+                        lambda daily: outcomes.build_outcome_matrix(get_weekly(ticker), outcomes.WEEKLY_HORIZONS))
+    if freq == 'daily':
+        return _derived('outcomes_daily', ticker,
+                        lambda daily: outcomes.build_outcome_matrix(get_daily_hlc(ticker), outcomes.DAILY_HORIZONS))
+    raise ValueError(f"Unsupported freq: {freq}")
+
+
+def get_monte_carlo(ticker=DEFAULT_TICKER):
+    """
+    Block-bootstrap projection of depth / time-to-bottom / time-to-recovery
+    from the latest daily close, measured against the drawdown anchor.
+
+    Built only from the daily data version (not the intraday live state), so the
+    cached result matches the close and anchor it was computed from.
+    """
+    def build(daily):
+        df = get_daily_hlc(ticker)
+        peak, _ = _drawdown_anchor(ticker)
+        return montecarlo.simulate(df['Close'].to_numpy(), float(df['Close'].iloc[-1]), peak)
+    return _derived('monte_carlo', ticker, build)
+
+
+def get_walk_forward(ticker=DEFAULT_TICKER):
+    """
+    Walk-forward report of the bias and 7% rules.
+
+    Returns:
+        tuple: (per-fold report, per-rule in-sample vs out-of-sample summary).
+    """
+    def build(daily):
+        report = walkforward.walk_forward(get_weekly(ticker), get_outcomes(ticker, 'weekly'), get_7pct_events(ticker))
+        return report, walkforward.summarize(report)
+    return _derived('walk_forward', ticker, build)
+
+
+def get_analogue_index(ticker=DEFAULT_TICKER):
+    """Standardized weekly market-state vectors for historical-analogue kNN queries."""
+    def build(daily):
+        weekly = get_weekly(ticker)
+        outcomes_df = analogues.outcome_frame(get_outcomes(ticker, 'weekly'))
+        outcomes_df['peak_days'] = analogues.peak_days(weekly)
+        return analogues.AnalogueIndex(analogues.build_features(weekly, get_waves(ticker)), outcomes_df)
+    return _derived('analogue_index', ticker, build)
+
+
+def find_analogues(ticker=DEFAULT_TICKER, k=10, overrides=None, min_gap_weeks=8):
+    """
+    The k historical weeks most similar to the current state, with their forward outcomes.
+
+    Args:
+        overrides (dict): Feature values replacing the latest indexed week
+            (e.g. {'bias': intraday_bias}).
+    """
+    index = get_analogue_index(ticker)
+    vector = index.current_vector()
+    vector.update(overrides or {})
+    return index.query(vector, k=k, min_gap_weeks=min_gap_weeks)
+
+
+def _drawdown_anchor(ticker):
+    # 回檔錨點：進行中的 7% 事件固定用事件前高，否則為上次解套日以來的最高價 (後者隨新高移動)
+    events = get_7pct_events(ticker)
+    if len(events) and not events.recovered[-1]:
+        return float(events.peak_price[-1]), False
+    since = int(events.recovery_date[-1]) if len(events) else '2000-01-01'
+    return get_range_index(ticker).max('High', since), True
+
+
+def _build_live_state(ticker):
+    df = get_daily_hlc(ticker)
+    if df.empty:
+        return LiveMarketState(None, True, None, True, None, None)
+    idx = get_range_index(ticker)
+    waves = get_waves(ticker)
+    peak, peak_running = _drawdown_anchor(ticker)
+
+    # 反彈錨點：進行中的上漲波段固定用起漲價，否則為上一波高點以來的最低價
+    trough, trough_running = None, True
+    up_pos = np.flatnonzero(waves.kind == WAVE_UP)
+    if up_pos.size:
+        last_up = up_pos[-1]
+        if waves.ongoing[last_up]:
+            trough, trough_running = float(waves.start_price[last_up]), False
+        else:
+            trough = idx.min('Low', int(waves.end_date[last_up]))
+
+    return LiveMarketState(peak, peak_running, trough, trough_running,
+                           df.index[-1].strftime('%Y-%m-%d'), float(df['Close'].iloc[-1]))
+
+
+def get_live_state(ticker=DEFAULT_TICKER):
+    """
+    Running drawdown / bounce anchors, seeded once per data version.
+
+    The state object is stored with the other datasets in artifact_cache, so
+    every page and session reads the same numbers in O(1).
+    """
+    return _derived('live_state', ticker, lambda daily: _build_live_state(ticker))
+
+
+def push_bar(date, high, low, close, ticker=DEFAULT_TICKER):
+    """
+    Feed one (possibly intraday) bar into the live state without rebuilding anything.
+    """
+    get_live_state(ticker).update(date, float(high), float(low), float(close))
+
+
+def live_metrics(ticker=DEFAULT_TICKER):
+    """
+    Returns:
+        dict: {'downward_dd', 'upward_bounce', 'last_close', 'last_date'} as plain numbers.
+    """
+    state = get_live_state(ticker)
+    return {
+        'downward_dd': state.current_drawdown,
+        'upward_bounce': state.current_bounce,
+        'last_close': state.last_close,
+        'last_date': state.last_date
+    }
+
+
+_snapshot_live = {}
+
+
+def get_market_snapshot(ticker=DEFAULT_TICKER):
+    """
+    Headline metrics shared by every session (bias, price, drawdown, bounce, probabilities).
+
+    The data-version part is built once per daily download; the live drawdown /
+    bounce is re-applied only when the live state moves (intraday push_bar).
+
+    Returns:
+        MappingProxyType: Immutable snapshot, see market_snapshot.build / with_live.
+    """
+    def build(daily):
+        return market_snapshot.build(get_weekly(ticker), get_upward_analysis(ticker)[0],
+                                     get_downward_analysis(ticker)[2], data_version(ticker),
+                                     analogues.summarize(find_analogues(ticker)))
+    base = _derived('market_snapshot', ticker, build)
+    live = live_metrics(ticker)
+    key = (base['version'], live['last_date'], live['last_close'], live['downward_dd'], live['upward_bounce'])
+    cached = _snapshot_live.get(ticker)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    snapshot = market_snapshot.with_live(base, live)
+    _snapshot_live[ticker] = (key, snapshot)
+    return snapshot
+
+
+# 啟動預熱要平行預先計算的頁面成品
+WARMUP_BUILDERS = {
+    'bias': get_bias_backtest,
+    'bias_chart': get_bias_chart,
+    'downward': get_downward_analysis,
+    'upward': get_upward_analysis,
+    'upward_wave': get_upward_wave_analysis,
+    'event_cards': get_all_event_cards,
+    'market_snapshot': get_market_snapshot,
+    'outcomes': get_outcomes,
+    'analogues': get_analogue_index,
+    'monte_carlo': get_monte_carlo,
+    'live_state': get_live_state
+}
@@ -1,81 +1,11 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from data_fetcher import fetch_data
-from wave_analyzer import analyze_waves
+import analytics_service
+import ui_tables
 
 st.set_page_config(page_title="股市上漲波段分析", page_icon="📈", layout="wide")
 
-@st.cache_data(ttl=3600)
-def load_upward_data(ticker_symbol):
-    df = fetch_data(ticker_symbol, start_date="2000-01-01")
-    if df.empty:
-        return pd.DataFrame(), pd.DataFrame(), {}
-    
-    # 使用 7% 轉折模型 (跌 7% 確認頭部，漲 7% 確認底部)
-    waves = analyze_waves(df, reversal_percent=7.0)
-    
-    # 取出所有向上波段 (type == 'up')
-    up_waves = [w for w in waves if w['type'] == 'up']
-    
-    if not up_waves:
-        return pd.DataFrame(), pd.DataFrame(), {}
-        
-    results = []
-    for w in up_waves:
-        start_date = w['start_date'].strftime('%Y-%m-%d')
-        end_date = w['end_date'].strftime('%Y-%m-%d')
-        start_price = w['start_price']
-        end_price = w['end_price']
-        gain_pct = (end_price - start_price) / start_price * 100
-        days = (w['end_date'] - w['start_date']).days
-        
-        status = '進行中' if w.get('ongoing', False) else '已完結'
-        
-        results.append({
-            '起漲日期 (前波破底)': start_date,
-            '最高日期 (下波前高)': end_date,
-            '起漲價格': round(float(start_price), 2),
-            '最高價格': round(float(end_price), 2),
-            '漲幅(%)': round(float(gain_pct), 2),
-            '花費天數': int(days),
-            '狀態': status
-        })
-        
-    up_df = pd.DataFrame(results)
-    
-    # 統計機率 (排除進行中)
-    finished_waves = up_df[up_df['狀態'] == '已完結']
-    if finished_waves.empty:
-        finished_waves = up_df
-        
-    # 分配區間
-    bins = [0, 10, 20, 30, 40, 50, 60, 70, 10000]
-    labels = ['     0~10%', '  10~20%', '  20~30%', '  30~40%', '  40~50%', '  50~60%', '  60~70%', '70% 以上']
-    
-    counts = pd.cut(finished_waves['漲幅(%)'], bins=bins, labels=labels, right=False).value_counts().sort_index()
-    
-    dist_results = []
-    total = len(finished_waves)
-    for label, count in counts.items():
-        prob = (count / total * 100) if total > 0 else 0
-        dist_results.append({
-            '區間': label.strip(),
-            '次數': count,
-            '機率(%):Q': round(float(prob), 2),
-            '機率(%)': round(float(prob), 2)
-        })
-    dist_df = pd.DataFrame(dist_results)
-    
-    metrics = {
-        '總完整波段數': total,
-        '平均漲幅(%)': round(float(finished_waves['漲幅(%)'].mean()), 2) if total > 0 else 0,
-        '平均花費天數': round(float(finished_waves['花費天數'].mean()), 1) if total > 0 else 0,
-        '漲幅超過 20% 機率': round(float(len(finished_waves[finished_waves['漲幅(%)'] >= 20]) / total * 100), 2) if total > 0 else 0
-    }
-        
-    return up_df, dist_df, metrics
-
 st.title("📈 乖離底部反彈上漲模組")
 st.write("這是一個獨立的分析頁面！\n計算每一次從低點起漲（經過前波大於 7% 的修正洗盤），一直抱到「下一次再發生 7% 大回檔」前的小波段/大波段真正漲幅。")
 
@@ -88,7 +18,7 @@ tickers = {
 selected_name = st.selectbox("選擇分析指數 (上漲模組)", list(tickers.keys()))
 symbol = tickers[selected_name]
 
-up_df, dist_df, metrics = load_upward_data(symbol)
+up_df, dist_df, metrics, _ = analytics_service.get_upward_analysis(symbol)
 
 if up_df.empty:
     st.warning("目前尚無足夠歷史數據可供分析。")
@@ -129,4 +59,4 @@ if not dist_df.empty:
 st.markdown("---")
 
 st.subheader("📜 歷史上漲波段詳情清單")
-st.dataframe(up_df.sort_values(by='起漲日期 (前波破底)', ascending=False), height=400)
+ui_tables.render_event_table(analytics_service.get_event_store('upward', symbol), key=f"upward_{symbol}")
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+行程共用快取 (Process-wide artifact cache)
+
+st.cache_data 的快取綁在單一函數上，背景執行緒與其他頁面都拿不到；
+這裡改用模組層級的字典保存「已算好的分析結果」，所有 session 共用同一份。
+每筆資料都標記 data version (最後交易日 + 筆數 + 最後一根 K 棒的 OHLCV 雜湊)，方便判斷是否過期；
+同一交易日盤中重新下載、最後一根數值改變時版本也會跟著變。
+管理後台以 entries() 列出各筆成品 (版本、大小、存活時間)，並可用 drop() 個別移除。
+"""
+import hashlib
+import sys
+import threading
+import time
+
+_lock = threading.Lock()
+_entries = {}
+
+# 納入版本雜湊的最後一根 K 棒欄位
+VERSION_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+def data_version(df_daily):
+    """
+    Build the version tag for a daily price frame.
+
+    Args:
+        df_daily (pd.DataFrame): Daily bars with a DatetimeIndex.
+
+    Returns:
+        str: e.g. '20261016-6987-3f1c9a2e' (last trade date, row count and a
+        hash of the last bar's OHLCV, so a same-day re-download with new
+        prices gets a new version).
+    """
+    if df_daily is None or len(df_daily) == 0:
+        return "empty"
+    cols = [c for c in VERSION_COLUMNS if c in df_daily.columns]
+    last_bar = df_daily[cols].iloc[-1].to_numpy(dtype='float64')
+    digest = hashlib.sha1(last_bar.tobytes()).hexdigest()[:8]
+    return f"{df_daily.index[-1].strftime('%Y%m%d')}-{len(df_daily)}-{digest}"
+
+
+def publish(name, value, version):
+    """
+    Publish an artifact so every session reads the same object.
+
+    Published values are shared, callers must copy DataFrames before mutating them.
+    """
+    with _lock:
+        _entries[name] = {
+            'value': value,
+            'version': version,
+            'built_at': time.time()
+        }
+
+
+def get(name):
+    """
+    Return the published entry dict ({value, version, built_at}) or None.
+    """
+    with _lock:
+        return _entries.get(name)
+
+
+def get_value(name, default=None):
+    entry = get(name)
+    return entry['value'] if entry is not None else default
+
+
+def age_seconds(name):
+    entry = get(name)
+    if entry is None:
+        return None
+    return time.time() - entry['built_at']
+
+
+def names():
+    with _lock:
+        return list(_entries.keys())
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def drop(name):
+    """Remove one artifact; returns True if it existed."""
+    with _lock:
+        return _entries.pop(name, None) is not None
+
+
+def size_bytes(value, _depth=0):
+    """
+    Approximate in-memory size of a cached value.
+
+    DataFrames use memory_usage(deep=True), arrays their buffers (plus the
+    elements of object arrays); containers and plain objects are summed up to
+    a few levels deep.
+    """
+    if _depth > 4:
+        return 0
+    if hasattr(value, 'memory_usage'):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    if hasattr(value, 'nbytes') and hasattr(value, 'dtype'):
+        if value.dtype == object:
+            return int(value.nbytes) + sum(sys.getsizeof(v) for v in value.ravel())
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(size_bytes(v, _depth + 1) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(size_bytes(v, _depth + 1) for v in value)
+    attrs = getattr(value, '__dict__', None)
+    if attrs is None and hasattr(value, '__slots__'):
+        attrs = {k: getattr(value, k, None) for k in value.__slots__}
+    if attrs:
+        return sys.getsizeof(value) + sum(size_bytes(v, _depth + 1) for v in attrs.values())
+    return sys.getsizeof(value)
+
+
+def entries():
+    """
+    Snapshot of every published artifact for the admin cache panel.
+
+    Returns:
+        list[dict]: name, version, built_at, age (seconds) and size (bytes, approximate).
+    """
+    with _lock:
+        items = list(_entries.items())
+    now = time.time()
+    return [{'name': name, 'version': e['version'], 'built_at': e['built_at'],
+             'age': now - e['built_at'], 'size': size_bytes(e['value'])} for name, e in items]
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+冷啟動 import 時間基準測試 (Startup Import Benchmark)
+
+每個模組都在全新的 Python 子行程中以 `-X importtime` 匯入，
+取多次量測的最小值，與基準檔比較，超過容忍度即以非零結束碼回報。
+基準檔 (bench_startup_baseline.json) 隨程式碼提交；找不到基準檔、或基準中有成功匯入的模組
+這次匯入失敗，也視為失敗。子行程設定 TSE_WARMUP=0，匯入 tse_dashboard 時不會啟動預熱下載。
+
+用法：
+    python bench_startup.py            # 量測並與 bench_startup_baseline.json 比較
+    python bench_startup.py --save     # 量測並寫入新的基準檔
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# 儀表板冷啟動會經過的模組 (由外而內)，以及被刻意延遲載入的重量級套件
+MODULES = [
+    "tse_dashboard",
+    "ui_theme",
+    "warmup",
+    "analytics_service",
+    "data_fetcher",
+    "strategy_bias",
+    "strategy_7pct",
+    "wave_analyzer",
+    "page_biz_cycle",
+    "ui_chatbot",
+    "yfinance",
+    "plotly.graph_objects",
+    "altair",
+]
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_startup_baseline.json")
+
+# 容忍度：比基準慢 50% 且多出 30ms 以上才算退化 (避免小模組的量測雜訊)
+TOLERANCE_RATIO = 1.5
+TOLERANCE_MS = 30.0
+
+
+def measure_import(module, repeat=3):
+    """
+    Measure the cumulative import time of one module in fresh interpreters.
+
+    Args:
+        module (str): Dotted module name.
+        repeat (int): Number of fresh processes, the minimum is kept.
+
+    Returns:
+        float: Cumulative import time in milliseconds, or None if the import failed.
+    """
+    best = None
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, "TSE_WARMUP": "0"}
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=cwd, env=env, capture_output=True, text=True, encoding="utf-8", errors="replace"
+        )
+        if proc.returncode != 0:
+            return None
+        cumulative = None
+        # 格式：import time: self [us] | cumulative | imported package
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            parts = line[len("import time:"):].split("|")
+            if len(parts) != 3 or parts[2].strip() != module:
+                continue
+            try:
+                cumulative = int(parts[1].strip()) / 1000.0
+            except ValueError:
+                continue
+        if cumulative is not None and (best is None or cumulative < best):
+            best = cumulative
+    return best
+
+
+def run_benchmark(modules=MODULES, repeat=3):
+    return {m: measure_import(m, repeat) for m in modules}
+
+
+def compare(results, baseline):
+    """
+    Return the list of (module, baseline_ms, current_ms) that regressed.
+
+    A module that imported in the baseline but fails now is a regression (current_ms None).
+    """
+    regressions = []
+    for module, current in results.items():
+        base = baseline.get(module)
+        if base is None:
+            continue
+        if current is None:
+            regressions.append((module, base, None))
+            continue
+        if current > base * TOLERANCE_RATIO and current - base > TOLERANCE_MS:
+            regressions.append((module, base, current))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard cold-start import benchmark")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    args = parser.parse_args()
+
+    results = run_benchmark(repeat=args.repeat)
+    for module, ms in results.items():
+        print(f"{module:<24} {'import failed' if ms is None else f'{ms:8.1f} ms'}")
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline found at {args.baseline}, run with --save to create one.")
+        return 2
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline)
+    for module, base, current in regressions:
+        print(f"REGRESSION {module}: {base:.1f} ms -> {'import failed' if current is None else f'{current:.1f} ms'}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+40 週雷達圖 (40-Week Radar Chart Spec)
+
+雷達圖 (K 線 + SMA40 + 20% 警戒軌跡 + 高壓紅球 + 乖離率面積 + A/B 類型標記) 約 1,400 根週 K，
+原本每次 rerun 都重建 make_subplots 圖表並逐列 .apply 產生 hover HTML。
+這裡直接產生 Plotly 的 JSON 規格，每個資料版本只建一次並序列化快取；
+新的一根 K 棒 (或盤中更新本週) 只修補最後一個點，不重建整張圖。
+頁面以 components.html 搭配 Plotly.js 渲染快取好的 JSON 字串，
+與圖表無關的元件點擊造成的 rerun 不再花任何建圖時間。
+
+細節層級 (LOD)：規格同時帶有全解析度欄位與 lod 降採樣的總覽序列，x 軸為真正的日期軸。
+瀏覽器端依目前可視範圍切換：可視 K 棒數不多時只畫該範圍 (前後各留一段緩衝供平移)
+的全解析度資料，縮小到超過 MAX_VISIBLE_BARS 根時改畫總覽序列。
+折線與標記使用 WebGL (scattergl)；K 線沒有 WebGL 版本，靠切片 / 分桶控制點數。
+"""
+import json
+
+import numpy as np
+
+import lod
+import markers
+
+PLOTLY_JS = "https://cdn.plot.ly/plotly-2.32.0.min.js"
+CHART_HEIGHT = 700
+INITIAL_BARS = 100
+
+# 可視範圍內超過此 K 棒數時改用總覽 (降採樣) 序列
+MAX_VISIBLE_BARS = 600
+
+# 固定的 trace 順序 (修補時依索引存取)
+CANDLE, SMA, TRACK, DANGER, BIAS, TYPE_A, TYPE_B = range(7)
+
+DANGER_LEVEL = 20.0
+WARNING_LEVEL = 15.0
+
+CHART_CONFIG = {
+    'scrollZoom': True,
+    'displaylogo': False,
+    'responsive': True,
+    'modeBarButtonsToRemove': ['lasso2d', 'select2d', 'autoScale2d', 'toggleSpikelines'],
+    'toImageButtonOptions': {'format': 'png', 'filename': 'TSE_40W_Bias_Radar'}
+}
+
+_CANDLE_HOVER = ('<b>開盤:</b> %{open:,.0f}<br>'
+                 '<b>最高:</b> %{high:,.0f}<br>'
+                 '<b>最低:</b> %{low:,.0f}<br>'
+                 '<b>收盤:</b> %{close:,.0f}<br>'
+                 '────────────────<br>'
+                 '<b style="color:#38BDF8;">📈 目前40W乖離: %{customdata[0]:.2f}%</b>'
+                 '%{customdata[1]}<extra></extra>')
+
+# 全解析度欄位 (共用同一組日期)
+_FULL_COLUMNS = ('x', 'open', 'high', 'low', 'close', 'bias', 'warn', 'sma', 'track')
+
+
+def warning_text(bias):
+    """Hover warning HTML per bar (門檻對齊 15% 預警), built without a per-row apply."""
+    bias = np.asarray(bias, dtype=np.float64)
+    danger = np.char.add(np.char.add('<br><b style="color:#EF4444;">🚨 偵測到極端乖離: ',
+                                     np.char.mod('%.1f', bias)),
+                         '%</b><br><b style="color:#EF4444;">注意修正風險！</b>')
+    warn = np.char.add(np.char.add('<br><b style="color:#FBBF24;">⚠️ 進入警戒區域: ', np.char.mod('%.1f', bias)), '%</b>')
+    return np.where(bias >= DANGER_LEVEL, danger, np.where(bias >= WARNING_LEVEL, warn, '')).astype(object)
+
+
+def _clean(values, decimals=2):
+    # JSON 不支援 NaN：轉為 null
+    a = np.round(np.asarray(values, dtype=np.float64), decimals)
+    return np.where(np.isnan(a), None, a).tolist()
+
+
+def _dates(index):
+    return np.datetime_as_string(np.asarray(index, dtype='datetime64[ns]'), unit='D').tolist()
+
+
+def _full_columns(df):
+    bias = df['Bias'].to_numpy(dtype=np.float64)
+    sma = df['SMA40'].to_numpy(dtype=np.float64)
+    return {
+        'x': _dates(df.index),
+        'open': _clean(df['Open']), 'high': _clean(df['High']), 'low': _clean(df['Low']), 'close': _clean(df['Close']),
+        'bias': _clean(bias), 'warn': warning_text(bias).tolist(),
+        'sma': _clean(sma), 'track': _clean(sma * 1.20)
+    }
+
+
+def _line_overview(dates, values):
+    keep = lod.lttb(values, lod.OVERVIEW_POINTS)
+    return {'x': [dates[i] for i in keep], 'y': _clean(values[keep])}
+
+
+def _overview(df):
+    """Downsampled series for the zoomed-out view."""
+    dates = _dates(df.index)
+    bias = df['Bias'].to_numpy(dtype=np.float64)
+    sma = df['SMA40'].to_numpy(dtype=np.float64)
+    first, last, o, h, l, c = lod.ohlc_buckets(df['Open'], df['High'], df['Low'], df['Close'], lod.OVERVIEW_POINTS)
+    # 每桶的乖離取桶內最後一根 (與收盤價一致)
+    bucket_bias = bias[last]
+    return {
+        'candle': {'x': [dates[i] for i in first], 'open': _clean(o), 'high': _clean(h), 'low': _clean(l),
+                   'close': _clean(c), 'bias': _clean(bucket_bias), 'warn': warning_text(bucket_bias).tolist()},
+        'sma': _line_overview(dates, sma),
+        'track': _line_overview(dates, sma * 1.20),
+        'bias': _line_overview(dates, bias)
+    }
+
+
+def _marker_traces(df, b_df):
+    danger = df[df['Bias'] >= DANGER_LEVEL]
+    traces = {DANGER: {
+        'type': 'scattergl', 'x': _dates(danger.index), 'y': _clean(danger['Low'] * 0.97), 'mode': 'markers',
+        'name': '高壓警報', 'hoverinfo': 'skip', 'xaxis': 'x', 'yaxis': 'y',
+        'marker': {'color': '#EF4444', 'size': 10, 'symbol': 'circle',
+                   'line': {'width': 2, 'color': 'rgba(239, 68, 68, 0.5)'}}
+    }}
+
+    # 乖離回測的觸發日期經由圖表共用的日期 → K 棒位置索引一次定位
+    bars = markers.BarIndex(df.index, period_days=7)
+    if b_df is not None and not b_df.empty:
+        kind = b_df['類型'].astype(str)
+        valid_a_df = df.iloc[bars.place(b_df, '觸發日期', kind.str.contains('類型 A').to_numpy())]
+        valid_b_df = df.iloc[bars.place(b_df, '觸發日期', kind.str.contains('類型 B').to_numpy())]
+    else:
+        valid_a_df = valid_b_df = df.iloc[:0]
+
+    for trace_id, points, color, edge, name in ((TYPE_A, valid_a_df, '#10B981', '#047857', '類型 A (歷史低點)'),
+                                                 (TYPE_B, valid_b_df, '#EF4444', '#B91C1C', '類型 B (歷史極端)')):
+        traces[trace_id] = {
+            'type': 'scattergl', 'x': _dates(points.index), 'y': _clean(points['Bias']), 'mode': 'markers',
+            'name': name, 'xaxis': 'x2', 'yaxis': 'y2',
+            'marker': {'color': color, 'size': 10, 'symbol': 'circle', 'line': {'width': 2, 'color': edge}}
+        }
+    return traces
+
+
+def _initial_range(dates):
+    # 最近 INITIAL_BARS 根週 K，左右各留半週讓首尾 K 棒完整顯示
+    first = np.datetime64(dates[max(len(dates) - INITIAL_BARS, 0)]) - np.timedelta64(4, 'D')
+    last = np.datetime64(dates[-1]) + np.timedelta64(4, 'D')
+    return [str(first), str(last)]
+
+
+def _layout(dates):
+    title_main = '<b style="font-size:24px; color:#F1F5F9; font-family:\'JetBrains Mono\';">📡 歷史雷達觀測圖 (K線 vs 乖離率同步掃描)</b>'
+    title_bias = '<b style="color:#94A3B8; font-family:\'JetBrains Mono\';">40週乖離率 (%)</b>'
+    # 與 make_subplots(rows=2, vertical_spacing=0.05, row_width=[0.3, 0.7]) 相同的版面分割
+    top, bottom = [0.335, 1.0], [0.0, 0.285]
+    xaxis = {'type': 'date', 'hoverformat': '%Y/%m/%d 當週', 'showgrid': True, 'gridwidth': 1, 'gridcolor': '#1E293B',
+             'showticklabels': False, 'showspikes': True, 'spikemode': 'across', 'spikesnap': 'cursor',
+             'showline': False, 'spikedash': 'solid', 'spikethickness': 1, 'spikecolor': '#38BDF8',
+             'rangeslider': {'visible': False}}
+    if dates:
+        xaxis['range'] = _initial_range(dates)
+    yaxis = {'showgrid': True, 'gridwidth': 1, 'gridcolor': '#1E293B', 'showline': False,
+             'autorange': True, 'fixedrange': True}
+    return {
+        'height': CHART_HEIGHT,
+        'xaxis': {**xaxis, 'anchor': 'y', 'domain': [0.0, 1.0], 'matches': 'x2'},
+        'xaxis2': {**xaxis, 'anchor': 'y2', 'domain': [0.0, 1.0]},
+        'yaxis': {**yaxis, 'anchor': 'x', 'domain': top},
+        'yaxis2': {**yaxis, 'anchor': 'x2', 'domain': bottom},
+        'annotations': [
+            {'text': title_main, 'x': 0.5, 'y': top[1], 'xref': 'paper', 'yref': 'paper',
+             'xanchor': 'center', 'yanchor': 'bottom', 'showarrow': False, 'font': {'size': 16}},
+            {'text': title_bias, 'x': 0.5, 'y': bottom[1], 'xref': 'paper', 'yref': 'paper',
+             'xanchor': 'center', 'yanchor': 'bottom', 'showarrow': False, 'font': {'size': 16}},
+            {'text': '20% 極端警戒線', 'x': 0, 'y': DANGER_LEVEL, 'xref': 'x2 domain', 'yref': 'y2',
+             'xanchor': 'left', 'yanchor': 'bottom', 'showarrow': False, 'font': {'color': '#EF4444'}}
+        ],
+        'shapes': [
+            {'type': 'line', 'x0': 0, 'x1': 1, 'y0': 0, 'y1': 0, 'xref': 'x2 domain', 'yref': 'y2',
+             'line': {'color': '#475569', 'dash': 'solid'}},
+            {'type': 'line', 'x0': 0, 'x1': 1, 'y0': DANGER_LEVEL, 'y1': DANGER_LEVEL, 'xref': 'x2 domain', 'yref': 'y2',
+             'line': {'color': '#EF4444', 'dash': 'solid'}}
+        ],
+        'plot_bgcolor': '#0F172A',
+        'paper_bgcolor': '#0F172A',
+        'font': {'color': '#F1F5F9', 'family': 'JetBrains Mono'},
+        'hovermode': 'x unified',
+        'hoverlabel': {'bgcolor': 'rgba(15, 23, 42, 0.9)', 'font': {'size': 15, 'family': 'JetBrains Mono'},
+                       'bordercolor': '#475569'},
+        'margin': {'l': 50, 'r': 50, 't': 60, 'b': 40},
+        'showlegend': False,
+        'dragmode': 'pan'
+    }
+
+
+def _trace_styles():
+    # 不含資料陣列的樣式；資料由瀏覽器端依可視範圍填入 (全解析度切片或總覽序列)
+    traces = [None] * 7
+    traces[CANDLE] = {
+        'type': 'candlestick', 'xaxis': 'x', 'yaxis': 'y', 'name': '📊 加權指數',
+        'increasing': {'line': {'color': '#10B981'}}, 'decreasing': {'line': {'color': '#EF4444'}},
+        'hovertemplate': _CANDLE_HOVER
+    }
+    traces[SMA] = {'type': 'scattergl', 'mode': 'lines', 'xaxis': 'x', 'yaxis': 'y',
+                   'line': {'color': '#94A3B8', 'width': 2}, 'name': '🛡️ 40週生命線',
+                   'hovertemplate': '均線點位: %{y:,.0f}<extra></extra>'}
+    traces[TRACK] = {'type': 'scattergl', 'mode': 'lines', 'xaxis': 'x', 'yaxis': 'y',
+                     'line': {'color': '#EF4444', 'width': 1.5, 'dash': 'dash'}, 'name': '🚨 20% 極端警戒',
+                     'hovertemplate': '警戒位: %{y:,.0f}<extra></extra>'}
+    traces[BIAS] = {'type': 'scattergl', 'mode': 'lines', 'xaxis': 'x2', 'yaxis': 'y2',
+                    'line': {'color': '#38BDF8', 'width': 2}, 'name': '📉 乖離率數據',
+                    'fill': 'tozeroy', 'fillcolor': 'rgba(56, 189, 248, 0.1)',
+                    'hovertemplate': '當前乖離: %{y:.2f}%<extra></extra>'}
+    return traces
+
+
+def build_spec(df, b_df=None):
+    """
+    Radar chart spec: trace styles, layout, full-resolution columns and the LOD overview.
+
+    Args:
+        df (pd.DataFrame): Weekly bars with OHLC, SMA40 and Bias, indexed by week.
+        b_df (pd.DataFrame): Bias backtest episodes (for the type A/B markers).
+
+    Returns:
+        dict: {'traces', 'layout', 'full', 'overview'}; the page script fills the
+        trace arrays for the visible range.
+    """
+    full = _full_columns(df)
+    traces = _trace_styles()
+    for trace_id, trace in _marker_traces(df, b_df).items():
+        traces[trace_id] = trace
+    return {'traces': traces, 'layout': _layout(full['x']), 'full': full, 'overview': _overview(df)}
+
+
+def _bar_point(df):
+    return {k: v[0] for k, v in _full_columns(df.iloc[-1:]).items()}
+
+
+def patch_last_bar(spec, df, b_df=None):
+    """
+    Update `spec` for a frame that differs from it only in its last bar
+    (the current week changed, or exactly one new week was appended).
+
+    The full-resolution columns are copied once and patched at the tail; the
+    overview and the marker traces (a few hundred points) are regenerated.
+    The input spec is not modified.
+
+    Returns:
+        dict: The patched spec, or None if `df` is not a one-bar extension of `spec`.
+    """
+    full = spec['full']
+    n_old, n_new = len(full['x']), len(df)
+    if n_new not in (n_old, n_old + 1) or n_new == 0:
+        return None
+    # 倒數第二根 (以及更早) 必須與快取相同，否則代表歷史被修正，需重建
+    keep = n_new - 1
+    if keep and full['x'][keep - 1] != _dates(df.index[keep - 1:keep])[0]:
+        return None
+
+    p = _bar_point(df)
+    full = {k: full[k][:keep] + [p[k]] for k in _FULL_COLUMNS}
+    traces = list(spec['traces'])
+    for trace_id, trace in _marker_traces(df, b_df).items():
+        traces[trace_id] = trace
+
+    layout = spec['layout']
+    if n_new != n_old:
+        rng = _initial_range(full['x'])
+        layout = {**layout, 'xaxis': {**layout['xaxis'], 'range': rng}, 'xaxis2': {**layout['xaxis2'], 'range': rng}}
+    return {'traces': traces, 'layout': layout, 'full': full, 'overview': _overview(df)}
+
+
+def to_json(spec):
+    return json.dumps(spec, ensure_ascii=False, separators=(',', ':'))
+
+
+# 瀏覽器端：依可視範圍組出 Plotly data (全解析度切片或總覽)，縮放 / 平移超出目前切片時才換資料
+_LOD_SCRIPT = """
+const el = document.getElementById('radar');
+const full = spec.full, n = full.x.length;
+const lower = x => { let lo = 0, hi = n; while (lo < hi) { const m = (lo + hi) >> 1; if (full.x[m] < x) lo = m + 1; else hi = m; } return lo; };
+const slice = (a, b) => {
+  const s = k => full[k].slice(a, b), x = s('x');
+  return {candle: {x, open: s('open'), high: s('high'), low: s('low'), close: s('close'), bias: s('bias'), warn: s('warn')},
+          sma: {x, y: s('sma')}, track: {x, y: s('track')}, bias: {x, y: s('bias')}};
+};
+const build = v => {
+  const d = spec.traces.map(t => Object.assign({}, t)), c = v.candle;
+  Object.assign(d[CANDLE], {x: c.x, open: c.open, high: c.high, low: c.low, close: c.close,
+                            customdata: c.bias.map((b, i) => [b, c.warn[i]])});
+  Object.assign(d[SMA], v.sma); Object.assign(d[TRACK], v.track); Object.assign(d[BIAS], v.bias);
+  return d;
+};
+let view = null;
+const choose = range => {
+  const i0 = lower(String(range[0]).slice(0, 10)), i1 = lower(String(range[1]).slice(0, 10));
+  if (i1 - i0 > MAX_VISIBLE_BARS) return view && view.overview ? null : {overview: true, data: build(spec.overview)};
+  if (view && !view.overview && i0 >= view.a && i1 <= view.b) return null;
+  const pad = Math.max(i1 - i0, 50), a = Math.max(0, i0 - pad), b = Math.min(n, i1 + pad + 1);
+  return {overview: false, a, b, data: build(slice(a, b))};
+};
+view = choose(spec.layout.xaxis.range || [full.x[0], full.x[n - 1]]);
+Plotly.newPlot(el, view.data, spec.layout, CONFIG).then(() => {
+  el.on('plotly_relayout', ev => {
+    if (ev['xaxis.autorange'] || ev['xaxis2.autorange']) {
+      Plotly.relayout(el, {'xaxis.range': [full.x[0], full.x[n - 1]]});
+      return;
+    }
+    const next = choose(el.layout.xaxis.range);
+    if (next) { view = next; Plotly.react(el, view.data, el.layout, CONFIG); }
+  });
+});
+"""
+
+
+def render_html(spec_json, height=CHART_HEIGHT, config=CHART_CONFIG):
+    """Standalone HTML that draws a pre-serialized spec with Plotly.js, switching LOD on zoom."""
+    return f"""<style>body{{margin:0;background:#0F172A;}}</style>
+<div id="radar" style="width:100%;height:{height}px;"></div>
+<script src="{PLOTLY_JS}"></script>
+<script>
+const spec = {spec_json};
+const CONFIG = {json.dumps(config)}, MAX_VISIBLE_BARS = {MAX_VISIBLE_BARS};
+const CANDLE = {CANDLE}, SMA = {SMA}, TRACK = {TRACK}, BIAS = {BIAS};
+{_LOD_SCRIPT}</script>"""
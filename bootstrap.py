@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Bootstrap 信賴區間 (Bootstrap Confidence Intervals)
+
+「跌幅超過 20% 機率」「漲幅超過 30% 機率」這些數字只來自約 30 個事件，
+單一百分比容易被誤讀成精確值。這裡對樣本做有放回重抽：
+一次產生 B×N 的索引矩陣，取出 B 組重抽樣本後，每個統計量 (平均、超過門檻的比例)
+都只是沿 axis=1 的一次歸約，再取百分位數得到信賴區間，不需要 Python 迴圈。
+B=10,000、N≈30 時整組統計在數毫秒內完成。
+
+亂數種子固定，同一份資料每次得到相同區間 (結果會隨資料版本快取)。
+"""
+import numpy as np
+
+N_RESAMPLES = 10_000
+CONFIDENCE = 0.95
+SEED = 20240607
+
+# 重抽矩陣的元素上限，超過時分批計算以控制記憶體
+_MAX_CELLS = 20_000_000
+
+
+def mean():
+    """Statistic: sample mean."""
+    return lambda m: m.mean(axis=1)
+
+
+def share_at_least(threshold):
+    """Statistic: percentage of samples >= threshold."""
+    return lambda m: (m >= threshold).mean(axis=1) * 100
+
+
+def share_above(threshold):
+    """Statistic: percentage of samples > threshold."""
+    return lambda m: (m > threshold).mean(axis=1) * 100
+
+
+def share_in(low, high):
+    """Statistic: percentage of samples in [low, high)."""
+    return lambda m: ((m >= low) & (m < high)).mean(axis=1) * 100
+
+
+def bootstrap_ci(samples, statistics, n_resamples=N_RESAMPLES, confidence=CONFIDENCE, seed=SEED, decimals=1):
+    """
+    Percentile bootstrap intervals for several statistics of one sample.
+
+    Args:
+        samples (array-like): 1-D observations (NaN are dropped).
+        statistics (dict): name -> f(matrix) returning one value per row of a
+            (resamples, N) matrix, e.g. {'avg': mean(), 'p20': share_at_least(20)}.
+        n_resamples (int): Number of bootstrap resamples B.
+        confidence (float): Two-sided confidence level.
+        seed (int): Random seed.
+        decimals (int): Rounding of the returned bounds.
+
+    Returns:
+        dict: name -> (low, high); (None, None) when there are fewer than 2 samples.
+    """
+    x = np.asarray(samples, dtype=np.float64)
+    x = x[~np.isnan(x)]
+    n = len(x)
+    if n < 2:
+        return {name: (None, None) for name in statistics}
+
+    rng = np.random.default_rng(seed)
+    results = {name: np.empty(n_resamples) for name in statistics}
+    batch = max(1, min(n_resamples, _MAX_CELLS // n))
+    for start in range(0, n_resamples, batch):
+        stop = min(start + batch, n_resamples)
+        # B×N 索引矩陣：每一列是一組有放回重抽
+        idx = rng.integers(0, n, size=(stop - start, n))
+        resampled = x[idx]
+        for name, stat in statistics.items():
+            results[name][start:stop] = stat(resampled)
+
+    alpha = (1 - confidence) / 2 * 100
+    out = {}
+    for name, values in results.items():
+        low, high = np.percentile(values, [alpha, 100 - alpha])
+        out[name] = (round(float(low), decimals), round(float(high), decimals))
+    return out
+
+
+def format_ci(ci, suffix="%"):
+    """'12.3~45.6%' for display, or '' when the interval is unavailable."""
+    if not ci or ci[0] is None:
+        return ""
+    return f"{ci[0]:.1f}~{ci[1]:.1f}{suffix}"
@@ -1,5 +1,4 @@
 # -*- coding: utf-8 -*-
-import yfinance as yf
 import pandas as pd
 
 def fetch_data(ticker, start_date="2000-01-01"):
@@ -13,6 +12,8 @@ def fetch_data(ticker, start_date="2000-01-01"):
     Returns:
         pd.DataFrame: DataFrame containing Date, High, Low, Close prices.
     """
+    import yfinance as yf # 延遲載入：只有真正下載時才付出 import 成本
+
     print(f"Fetching data for {ticker} from {start_date}...")
     # Explicitly disable threads and progress to save file descriptors on cloud
     df = yf.download(ticker, start=start_date, threads=False, progress=False)
@@ -38,3 +39,88 @@ def fetch_data(ticker, start_date="2000-01-01"):
     df = df[columns_to_keep].dropna()
     
     return df
+
+
+def fetch_ohlcv(ticker, period="28y"):
+    """
+    Fetch the full daily OHLCV history in a single download.
+
+    Every page of the dashboard derives its data from this one frame (weekly
+    bars for the bias radar, daily High/Low/Close for the 7% and wave engines),
+    so the warm-up job only has to hit Yahoo once per refresh.
+
+    Args:
+        ticker (str): The ticker symbol (e.g. '^TWII').
+        period (str): yfinance period string, 28y covers every quantified event since 1998.
+
+    Returns:
+        pd.DataFrame: Daily Open, High, Low, Close, Volume with a DatetimeIndex.
+    """
+    import yfinance as yf
+
+    print(f"Fetching {period} daily OHLCV for {ticker}...")
+    df = yf.download(ticker, period=period, interval="1d", threads=False, progress=False)
+
+    if df.empty:
+        raise ValueError(f"No data found for ticker {ticker}.")
+
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+
+    return df
+
+
+def daily_hlc(df_daily, start_date="2000-01-01"):
+    """
+    Slice a daily OHLCV frame into the High/Low/Close shape returned by `fetch_data`.
+
+    Args:
+        df_daily (pd.DataFrame): Output of `fetch_ohlcv`.
+        start_date (str): The start date in YYYY-MM-DD format.
+
+    Returns:
+        pd.DataFrame: DataFrame containing High, Low, Close prices.
+    """
+    return df_daily.loc[start_date:, ['High', 'Low', 'Close']].dropna()
+
+
+def resample_weekly(df_daily):
+    """
+    Convert daily bars into the W-MON weekly bars used by the 40-week bias radar.
+
+    Args:
+        df_daily (pd.DataFrame): Output of `fetch_ohlcv`.
+
+    Returns:
+        pd.DataFrame: Weekly OHLCV with WeekRange, SMA40 and Bias columns.
+    """
+    # 紀錄最後一個交易日的日期 (例如 2/24 或 2/25)
+    latest_trade_date = df_daily.index[-1]
+
+    # 將日線轉換為週線 (以週一為基準)，確保數據與週線策略一致但具備日線即時性
+    logic = {
+        'Open': 'first',
+        'High': 'max',
+        'Low': 'min',
+        'Close': 'last',
+        'Volume': 'sum'
+    }
+    df = df_daily.resample('W-MON', label='left', closed='left').apply(logic)
+
+    # 計算每週實際交易日期範圍 (例如 02/23 ~ 02/25)
+    week_info = pd.Series(df_daily.index, index=df_daily.index).resample('W-MON', label='left', closed='left').agg(['min', 'max'])
+
+    # 格式化為：2026/02/23 ~ 02/25
+    # 增加判斷以防 NaT (空資料) 導致崩潰
+    df['WeekRange'] = week_info.apply(
+        lambda x: f"{x['min'].strftime('%Y/%m/%d')} ~ {x['max'].strftime('%m/%d')}"
+        if pd.notna(x['min']) and pd.notna(x['max']) and x['min'] != x['max']
+        else (f"{x['min'].strftime('%Y/%m/%d')}" if pd.notna(x['min']) else "N/A"), axis=1
+    )
+
+    df = df.dropna(subset=['Close'])
+    df['SMA40'] = df['Close'].rolling(window=40).mean()
+    df['Bias'] = (df['Close'] - df['SMA40']) / df['SMA40'] * 100
+
+    df.attrs['latest_trade_date'] = latest_trade_date
+    return df
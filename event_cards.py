@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""
+歷史事件日誌卡片 (Historical Event Log Cards)
+
+乖離回測、上漲波段、7% 回檔三個「流水日誌」原本逐列 iterrows，在迴圈中計算顯示欄位、
+再用 f-string 組出一大段內嵌樣式的 HTML，每次 rerun 全部重做並整包送到瀏覽器。
+這裡改為：
+    1. 卡片 HTML 範本在載入模組時解析一次 (CardTemplate)，拆成固定字串與欄位名稱
+    2. 所有顯示欄位對整個 DataFrame 一次格式化 (欄位式，NaN 顯示為 '--')
+    3. 範本預先編譯成單一 str.format，每張卡片只做一次 C 層級的格式化
+結果依資料版本快取於 analytics_service；頁面分頁顯示，DOM 大小不隨日誌筆數成長。
+卡片使用的 CSS 動畫集中在 ui_theme.PAGE_CSS['event_log']，顯示日誌的頁面送出一次，不再隨每張卡片重送。
+"""
+import string
+
+import numpy as np
+import pandas as pd
+
+CARDS_PER_PAGE = 10
+
+
+class CardTemplate:
+    """
+    HTML template parsed once into literal chunks and `{field}` names.
+
+    Lines are stripped and blank lines dropped, so many cards can be joined into
+    a single markdown HTML block. Fields take no format spec: values are
+    formatted column-wise before rendering.
+    """
+
+    def __init__(self, template):
+        compact = '\n'.join(line.strip() for line in template.strip().splitlines() if line.strip())
+        parts = list(string.Formatter().parse(compact))
+        self.fields = [field for _, field, _, _ in parts if field is not None]
+        # 固定字串中的大括號跳脫後以位置參數 '{}' 串接：每張卡片只需一次 C 層級的 str.format
+        literals = [literal.replace('{', '{{').replace('}', '}}') for literal, _, _, _ in parts]
+        self._format = ''.join(lit + ('{}' if field is not None else '')
+                               for lit, (_, field, _, _) in zip(literals, parts)).format
+
+    def render(self, fields, n):
+        """
+        Render `n` cards.
+
+        Args:
+            fields (dict): field name -> array-like of `n` display strings.
+            n (int): Number of cards.
+
+        Returns:
+            np.ndarray: Object array of card HTML strings.
+        """
+        columns = [np.broadcast_to(np.asarray(fields[name], dtype=object), (n,)) for name in self.fields]
+        out = np.empty(n, dtype=object)
+        out[:] = list(map(self._format, *columns))
+        return out
+
+
+def fmt(values, spec, na='--'):
+    """Format a numeric column with a str.format spec (e.g. ',.0f'); NaN becomes `na`."""
+    v = np.asarray(values, dtype=np.float64)
+    out = np.frompyfunc(lambda x: format(x, spec), 1, 1)(v) if len(v) else np.empty(0, dtype=object)
+    return np.where(np.isnan(v), na, out).astype(object)
+
+
+def choose(mask, if_true, if_false):
+    """Per-row choice between two display values (scalars or columns)."""
+    return np.where(np.asarray(mask, dtype=bool), if_true, if_false).astype(object)
+
+
+def text(values):
+    """String column as an object array."""
+    return np.asarray(pd.Series(values).astype(str), dtype=object)
+
+
+def page_count(n, per_page=CARDS_PER_PAGE):
+    return max(1, -(-n // per_page))
+
+
+def page(cards, number, per_page=CARDS_PER_PAGE):
+    """Cards of page `number` (1-based)."""
+    start = (number - 1) * per_page
+    return cards[start:start + per_page]
+
+
+# --- 乖離回測日誌 ---
+
+_BIAS_CARD = CardTemplate("""
+<div style="background:#0F172A; border:5px solid #334155; border-radius:12px; margin-bottom:50px; overflow:hidden; width:100%; box-shadow:0 30px 60px rgba(0,0,0,0.5);">
+  <!-- 頂部區：巨星標題磚 -->
+  <div style="display:grid; grid-template-columns: 1fr 1fr; align-items:stretch; background:#1E293B; border-bottom:4px solid #475569;">
+    <div style="padding:35px 30px; border-right:4px solid #475569;">
+      <div style="display:flex; align-items:center; gap:20px; margin-bottom:15px;">
+        {status_badge}
+        <span style="font-size:24px; color:#94A3B8; font-weight:800; letter-spacing:1px;">異常乖離發生日：</span>
+      </div>
+      <div style="font-size:52px; color:white; font-weight:950; letter-spacing:-2px; line-height:1;">📅 {trigger_date}</div>
+      <div style="margin-top:25px; display:flex; align-items:center; gap:25px;">
+        <span style="color:#FFF; background:{tag_color}; padding:8px 25px; border-radius:10px; font-size:38px; font-weight:900; white-space:nowrap; border:2px solid rgba(255,255,255,0.3);">{type_tag}</span>
+        <span style="font-size:32px; color:#94A3B8; font-weight:800; white-space:nowrap;">前期回撤: <span style="color:#F1F5F9;">{pre_dd}%</span></span>
+      </div>
+    </div>
+    <div style="text-align:center; background:rgba(239, 68, 68, 0.05); padding:35px 30px; display:flex; flex-direction:column; justify-content:center; align-items:center;">
+      <div style="font-size:24px; color:#FCA5A5; font-weight:800; letter-spacing:1px; margin-bottom:15px;">末升段衝刺總耗時：</div>
+      <div style="font-size:52px; color:#EF4444; font-weight:950; letter-spacing:-1px; line-height:1; margin-bottom:20px;">🚀 {days_spurt} <span style="font-size:28px; font-weight:800;">個交易日</span></div>
+      <div style="font-size:42px; color:#F87171; font-weight:900; white-space:nowrap;">▲ +{point_diff} <span style="font-size:24px; font-weight:800; margin-left:5px;">點</span></div>
+    </div>
+  </div>
+
+  <!-- 中間層：故事線點位 (雙欄紅綠配強化版) -->
+  <div style="display:grid; grid-template-columns:1fr 1fr; gap:0; border-bottom:4px solid #475569;">
+    <div style="background:#450A0A; padding:45px 20px; text-align:center; border-right:4px solid #475569; display:flex; flex-direction:column; align-items:center;">
+      <div style="font-size:26px; color:#FCA5A5; font-weight:900; margin-bottom:10px; letter-spacing:1px;">[階段一] 警報點位</div>
+      <div style="font-size:18px; color:#F87171; font-weight:800; margin-bottom:25px;">({trigger_date_str})</div>
+      <div style="font-family:'JetBrains Mono'; font-size:52px; font-weight:950; color:white; line-height:1; margin-bottom:20px;">{trigger_price}</div>
+      <div class="bias-neon-red" style="font-size:22px; font-weight:900;">當日乖離率 {trigger_bias}%</div>
+    </div>
+    <div style="background:#064E3B; padding:45px 20px; text-align:center; display:flex; flex-direction:column; align-items:center;">
+      <div style="font-size:26px; color:#86EFAC; font-weight:900; margin-bottom:10px; letter-spacing:1px;">[階段二] 波段最高峰</div>
+      <div style="font-size:18px; color:#4ADE80; font-weight:800; margin-bottom:25px;">({peak_date_str})</div>
+      <div style="font-family:'JetBrains Mono'; font-size:52px; font-weight:950; color:white; line-height:1; margin-bottom:20px;">{peak_price}</div>
+      <div class="bias-neon-green" style="font-size:22px; font-weight:900;">當日乖離率 {peak_bias}%</div>
+    </div>
+  </div>
+
+  <!-- 底部層：高端金屬能量總結 (夕陽黃橙版) -->
+  <div style="background:#0F172A; padding:45px 50px; border:3px solid #F97316; margin:0;">
+    <div style="display:flex; justify-content:space-between; align-items:flex-end; margin-bottom:35px;">
+      <div style="font-size:34px; color:white; font-weight:950; display:flex; align-items:center; gap:15px; line-height:1;">☀️ 乖離極端漲幅：</div>
+      <div style="font-size:42px; color:#FBBF24; font-weight:950; letter-spacing:-1.5px; line-height:1; text-shadow: 0 0 20px rgba(251, 191, 36, 0.4); display:flex; align-items:baseline; gap:15px;">
+        <span>{max_surge}%</span>
+      </div>
+    </div>
+    <div style="height:38px; background:rgba(2,6,23,0.95); border-radius:12px; overflow:hidden; border:3px solid #F97316; padding:3px; box-shadow:inset 0 4px 10px rgba(0,0,0,0.6);">
+      <div style="width:{surge_w}%; height:100%; background:linear-gradient(90deg, #FDE68A 0%, #FBBF24 50%, #F97316 100%); border-radius:8px; box-shadow:0 0 25px rgba(249, 115, 22, 0.4);"></div>
+    </div>
+  </div>
+</div>
+""")
+
+_ONGOING_BADGE = '<span style="color:#EF4444; background:rgba(239, 68, 68, 0.1); padding:6px 16px; border-radius:8px; font-size:20px; font-weight:900; border:2px solid rgba(239, 68, 68, 0.3);">🚨 警報持續中</span>'
+_CLOSED_BADGE = '<span style="color:#10B981; background:rgba(16, 185, 129, 0.1); padding:6px 16px; border-radius:8px; font-size:20px; font-weight:900; border:2px solid rgba(16, 185, 129, 0.3);">✅ 歷史結案</span>'
+
+
+def _event_date_labels(dates, latest_trade_date):
+    # 'YYYY-MM-DD' → '發生於 YYYY/MM/DD'；最後一個交易日 (含) 之後標註為即時偵測中，缺值為空字串
+    raw = pd.Series(dates, dtype=object)
+    missing = raw.isna() | raw.astype(str).isin(['', 'N/A', 'None'])
+    parsed = pd.to_datetime(raw.where(~missing), errors='coerce')
+    shown = parsed.dt.strftime('%Y/%m/%d').to_numpy(dtype=object)
+    live = (parsed.dt.normalize() >= pd.Timestamp(latest_trade_date).normalize()).to_numpy()
+    # 以 object 陣列串接字串 (numpy < 2 的 '<U' 陣列不支援 +)
+    shown = shown.astype(str).astype(object)
+    labels = choose(live, '即時偵測中 - ' + shown, '發生於 ' + shown)
+    return np.where(missing.to_numpy() | parsed.isna().to_numpy(), '', labels).astype(object)
+
+
+def bias_cards(b_df, latest_trade_date):
+    """
+    Cards of the 40-week bias backtest log, newest first.
+
+    Args:
+        b_df (pd.DataFrame): Output of `strategy_bias.backtest`.
+        latest_trade_date (Timestamp): Last trading day of the data (for the "live" date label).
+
+    Returns:
+        np.ndarray: Card HTML strings.
+    """
+    if b_df.empty:
+        return np.empty(0, dtype=object)
+    r = b_df.sort_values(by='觸發日期', ascending=False, kind='stable')
+    type_full = r['類型'].fillna('未知').astype(str)
+    trigger = r['觸發日期']
+    peak_price = r['波段最高指數'].to_numpy(dtype=np.float64)
+    trigger_price = r['觸發時指數'].to_numpy(dtype=np.float64)
+    max_surge = r['最高噴出漲幅(%)'].to_numpy(dtype=np.float64)
+    # 階段耗時與點位差 (對齊卡片顯示的「觸發時指數」與「波段最高指數」，確保用戶可直接驗算)
+    days_spurt = (pd.to_datetime(r['波段最高日期']) - pd.to_datetime(trigger)).dt.days
+    point_diff = np.nan_to_num(np.trunc(peak_price - trigger_price), nan=0.0) + 0.0
+
+    fields = {
+        'status_badge': choose(r['回歸0%日期'].isna(), _ONGOING_BADGE, _CLOSED_BADGE),
+        'trigger_date': text(trigger),
+        'tag_color': choose(type_full.str.contains('類型 A'), '#3B82F6', '#EF4444'),
+        'type_tag': text(type_full.str.split(' (', regex=False).str[0]),
+        'pre_dd': fmt(r['前12月最大回檔(%)'], '.1f', na='nan'),
+        'days_spurt': text(days_spurt),
+        'point_diff': fmt(point_diff, ',.0f'),
+        'trigger_date_str': _event_date_labels(trigger, latest_trade_date),
+        'trigger_price': fmt(trigger_price, ',.0f', na='nan'),
+        'trigger_bias': fmt(r['觸發時乖離率(%)'], '+.1f', na='nan'),
+        'peak_date_str': _event_date_labels(r['波段最高日期'], latest_trade_date),
+        'peak_price': fmt(peak_price, ',.0f'),
+        'peak_bias': fmt(r['最高乖離率(%)'], '+.1f', na='nan'),
+        'max_surge': fmt(max_surge, '+.1f', na='nan'),
+        # 能量條寬度 (上限 40%)
+        'surge_w': fmt(np.minimum(100.0, max_surge / 40 * 100), '', na='nan')
+    }
+    return _BIAS_CARD.render(fields, len(r))
+
+
+# --- 上漲波段日誌 ---
+
+_UPWARD_CARD = CardTemplate("""
+<div style="background:#0F172A; border:5px solid #334155; border-radius:12px; margin-bottom:50px; overflow:hidden; width:100%; box-shadow:0 30px 60px rgba(0,0,0,0.5);">
+  <!-- 頂部區：巨星標題磚 -->
+  <div style="display:grid; grid-template-columns: 1fr 1fr; align-items:stretch; background:#1E293B; border-bottom:4px solid #475569;">
+    <div style="padding:35px 30px; border-right:4px solid #475569;">
+      <div style="display:flex; align-items:center; gap:20px; margin-bottom:15px;">
+        <span style="background:{tag_bg}; color:{tag_color}; padding:6px 16px; border-radius:6px; font-weight:950; font-size:18px; border:2px solid {tag_color}; box-shadow:0 0 15px {tag_color}44;">{icon} {status}</span>
+        <span style="font-size:24px; color:#94A3B8; font-weight:800; letter-spacing:1px;">波段上漲紀錄：</span>
+      </div>
+      <div style="font-size:32px; color:white; font-weight:950; letter-spacing:-1px; line-height:1; white-space:nowrap;">📅 {date_display}</div>
+      <div style="margin-top:25px; display:flex; align-items:center; gap:25px;">
+        <span style="color:#FFF; background:{custom_tag_bg}; padding:8px 25px; border-radius:10px; font-size:38px; font-weight:900; white-space:nowrap; border:2px solid rgba(255,255,255,0.3);">{custom_tag_text}</span>
+      </div>
+    </div>
+    <div style="text-align:center; background:{top_right_bg}; padding:35px 30px; display:flex; flex-direction:column; justify-content:center; align-items:center;">
+      <div style="font-size:24px; color:#94A3B8; font-weight:800; letter-spacing:1px; margin-bottom:15px;">波段噴發總週期：</div>
+      <div style="font-size:52px; color:{top_right_val_color}; font-weight:950; letter-spacing:-1px; line-height:1; margin-bottom:20px;">🚀 {days} <span style="font-size:24px; font-weight:800;">DAYS </span></div>
+    </div>
+  </div>
+
+  <!-- 中間層：故事線點位 -->
+  <div style="display:grid; grid-template-columns:1fr 1fr; gap:0; border-bottom:4px solid #475569;">
+    <div style="background:#450A0A; padding:45px 20px; text-align:center; border-right:4px solid #475569; display:flex; flex-direction:column; align-items:center;">
+      <div style="font-size:26px; color:#FCA5A5; font-weight:900; margin-bottom:10px; letter-spacing:1px;">[階段一] 波段起漲點</div>
+      <div style="font-size:18px; color:#F87171; font-weight:800; margin-bottom:25px;">(起漲於 {start_date})</div>
+      <div style="font-family:'JetBrains Mono'; font-size:52px; font-weight:950; color:white; line-height:1; margin-bottom:20px;">{start_price}</div>
+    </div>
+    <div style="background:#064E3B; padding:45px 20px; text-align:center; display:flex; flex-direction:column; align-items:center;">
+      <div style="font-size:26px; color:#6EE7B7; font-weight:900; margin-bottom:10px; letter-spacing:1px;">[階段二] 波段最高點</div>
+      <div style="font-size:18px; color:#34D399; font-weight:800; margin-bottom:25px;">(最高於 {peak_date})</div>
+      <div style="font-family:'JetBrains Mono'; font-size:52px; font-weight:950; color:white; line-height:1; margin-bottom:20px;">{peak_price}</div>
+    </div>
+  </div>
+
+  <!-- 底部層：動能槽 -->
+  <div style="background:#0F172A; padding:45px 55px; border:3px solid #F97316; margin:0;">
+    <div style="display:flex; justify-content:space-between; align-items:flex-end; margin-bottom:35px;">
+      <div style="font-size:34px; color:white; font-weight:950; display:flex; align-items:center; gap:12px; line-height:1;">⚡ 波段上漲幅度</div>
+      <div style="font-size:42px; color:#FBBF24; font-weight:950; letter-spacing:-1.5px; line-height:1; text-shadow: 0 0 20px rgba(251, 191, 36, 0.4); display:flex; align-items:baseline; gap:15px;">
+          <span>+{pts_gain} ｜ +{gain}%</span>
+      </div>
+    </div>
+    <div style="height:38px; background:rgba(2,6,23,0.95); border-radius:12px; overflow:hidden; border:3px solid #F97316; padding:3px; box-shadow:inset 0 4px 10px rgba(0,0,0,0.6);">
+      <div style="width:{energy_w}%; height:100%; background:linear-gradient(90deg, #FDE68A 0%, #FBBF24 50%, #F97316 100%); border-radius:8px; box-shadow:0 0 25px rgba(249, 115, 22, 0.4);"></div>
+    </div>
+    <div style="margin-top:25px; text-align:right;">
+      <span style="color:#64748B; font-family:'JetBrains Mono'; font-size:14px; font-weight:700;">MOMENTUM_STRENGTH: {energy_pct}% / 50%_EXTREME</span>
+    </div>
+  </div>
+</div>
+""")
+
+
+def upward_cards(up_df):
+    """
+    Cards of the up-wave log, newest first.
+
+    Args:
+        up_df (pd.DataFrame): Up-waves from `get_upward_analysis`.
+
+    Returns:
+        np.ndarray: Card HTML strings.
+    """
+    if up_df.empty:
+        return np.empty(0, dtype=object)
+    r = up_df.sort_values(by='起漲日期 (前波破底)', ascending=False, kind='stable')
+    gain = r['漲幅(%)'].to_numpy(dtype=np.float64)
+    start_price = r['起漲價格'].to_numpy(dtype=np.float64)
+    peak_price = r['最高價格 (或現價)'].to_numpy(dtype=np.float64)
+    ongoing = (r['狀態'] == '進行中').to_numpy()
+    start, peak = text(r['起漲日期 (前波破底)']), text(r['最高日期 (下波前高)'])
+    # 動能槽長度 (預設把 50% 漲幅當作視覺 100% 寬度)
+    energy_w = np.minimum(100.0, gain / 50.0 * 100)
+    strong = gain >= 20.0
+
+    fields = {
+        'tag_bg': choose(ongoing, 'rgba(16, 185, 129, 0.15)', 'rgba(100, 116, 139, 0.15)'),
+        'tag_color': choose(ongoing, '#10B981', '#64748B'),
+        'icon': choose(ongoing, '🚀', '✅'),
+        'status': text(r['狀態']),
+        'date_display': start + ' ➔ ' + choose(ongoing, '至今', peak),
+        # 紅色代表強勢多頭，青色一般反彈
+        'custom_tag_bg': choose(strong, '#EF4444', '#06B6D4'),
+        'custom_tag_text': choose(strong, '強勢多頭', '一般反彈'),
+        'top_right_bg': choose(gain > 0, 'rgba(16, 185, 129, 0.05)', 'rgba(239, 68, 68, 0.05)'),
+        'top_right_val_color': choose(gain > 0, '#10B981', '#EF4444'),
+        'days': text(r['花費天數'].astype(int)),
+        'start_date': start,
+        'start_price': fmt(start_price, ',.0f', na='nan'),
+        'peak_date': peak,
+        'peak_price': fmt(peak_price, ',.0f', na='nan'),
+        'pts_gain': fmt(peak_price - start_price, '.0f', na='nan'),
+        'gain': fmt(gain, '.1f', na='nan'),
+        'energy_w': fmt(energy_w, '', na='nan'),
+        'energy_pct': fmt(energy_w, '.1f', na='nan')
+    }
+    return _UPWARD_CARD.render(fields, len(r))
+
+
+# --- 7% 回檔日誌 ---
+
+_DRAWDOWN_CARD = CardTemplate("""
+<div style="background:#0F172A; border:5px solid #334155; border-radius:12px; margin-bottom:50px; overflow:hidden; width:100%; box-shadow:0 30px 60px rgba(0,0,0,0.5);">
+  <!-- 頂部區：巨星標題磚 -->
+  <div style="display:grid; grid-template-columns: 1fr 1fr; align-items:stretch; background:#1E293B; border-bottom:4px solid #475569;">
+    <div style="padding:35px 30px; border-right:4px solid #475569;">
+      <div style="display:flex; align-items:center; gap:20px; margin-bottom:15px;">
+        <span style="background:{status_bg}; color:{status_color}; padding:6px 16px; border-radius:6px; font-weight:950; font-size:18px; border:2px solid {status_color}; box-shadow:0 0 15px {status_color}44;">{status_text}</span>
+        <span style="font-size:24px; color:#94A3B8; font-weight:800; letter-spacing:1px;">觸發警報日</span>
+      </div>
+      <div style="font-size:52px; color:white; font-weight:950; letter-spacing:-2px; line-height:1;">📅 {trigger_date}</div>
+      <div style="margin-top:25px; display:flex; align-items:center; gap:25px;">
+        <span style="color:#FFF; background:{custom_tag_bg}; padding:8px 25px; border-radius:10px; font-size:38px; font-weight:900; white-space:nowrap; border:2px solid rgba(255,255,255,0.3);">{custom_tag_text}</span>
+      </div>
+    </div>
+    <div style="text-align:center; background:rgba(239, 68, 68, 0.05); padding:35px 30px; display:flex; flex-direction:column; justify-content:center; align-items:center;">
+      <div style="font-size:24px; color:#94A3B8; font-weight:800; letter-spacing:1px; margin-bottom:15px;">下跌修正總耗時 :</div>
+      <div style="font-size:52px; color:#EF4444; font-weight:950; letter-spacing:-1px; line-height:1; margin-bottom:20px;">🚀 {days_to_bottom} <span style="font-size:28px; font-weight:800;">個交易日</span></div>
+      <div style="font-size:42px; color:#F87171; font-weight:900; white-space:nowrap;">▼ {pts_drop_total} <span style="font-size:24px; font-weight:800; margin-left:5px;">點</span></div>
+    </div>
+  </div>
+
+  <!-- 中間層：故事線點位 -->
+  <div style="display:grid; grid-template-columns:1fr 1fr; gap:0; border-bottom:4px solid #475569;">
+    <div style="background:#450A0A; padding:45px 20px; text-align:center; border-right:4px solid #475569; display:flex; flex-direction:column; align-items:center;">
+      <div style="font-size:26px; color:#FCA5A5; font-weight:900; margin-bottom:10px; letter-spacing:1px;">[階段一] 觸發警報點</div>
+      <div style="font-size:18px; color:#F87171; font-weight:800; margin-bottom:25px;">(發生於 {trigger_date})</div>
+      <div style="font-family:'JetBrains Mono'; font-size:52px; font-weight:950; color:white; line-height:1; margin-bottom:20px;">{trigger_price}</div>
+      <div class="breathe-red-node" style="background: rgba(69, 10, 10, 0.8); color: #FCA5A5; border: 2px solid #EF4444; padding: 4px 16px; border-radius: 6px; font-family: 'JetBrains Mono'; font-size:22px; font-weight:900;">距離前高約 -7%</div>
+    </div>
+    <div style="background:#0F172A; padding:45px 20px; text-align:center; display:flex; flex-direction:column; align-items:center;">
+      <div style="font-size:26px; color:#A7F3D0; font-weight:900; margin-bottom:10px; letter-spacing:1px;">[階段二] 波段最低谷</div>
+      <div style="font-size:18px; color:#34D399; font-weight:800; margin-bottom:25px;">(發生於 {bottom_date})</div>
+      <div style="font-family:'JetBrains Mono'; font-size:52px; font-weight:950; color:white; line-height:1; margin-bottom:20px;">{bottom_price}</div>
+      <div class="breathe-green-node" style="background: rgba(30, 41, 59, 0.8); color: #CBD5E1; border: 2px solid #94A3B8; padding: 4px 16px; border-radius: 6px; font-family: 'JetBrains Mono'; font-size:22px; font-weight:900;">最大跌幅 -{abs_dd}%</div>
+    </div>
+  </div>
+
+  <!-- 底部層：最終處置與進度條 -->
+  <div style="background:#0F172A; padding:45px 55px; border:3px solid #F97316; margin:0;">
+    <div style="display:flex; justify-content:space-between; align-items:flex-end; margin-bottom:35px;">
+      <div style="font-size:34px; color:white; font-weight:950; display:flex; align-items:center; gap:12px; line-height:1;">☄️ 波段下跌幅度</div>
+      <div class="text-glow-val-red" style="font-size:38px; color:#FF3D3D; font-weight:1000; letter-spacing:-1.5px; display:flex; align-items:baseline; gap:15px;">
+        <span>-{pts_drop} ｜ {total_dd}%</span>
+      </div>
+    </div>
+    <div style="height:38px; background:rgba(2,6,23,0.95); border-radius:12px; overflow:hidden; border:3px solid #F97316; padding:3px; box-shadow:inset 0 4px 10px rgba(0,0,0,0.6);">
+      <div style="width:{bar_w}%; height:100%; background:linear-gradient(90deg, #FDE68A 0%, #FBBF24 50%, #F97316 100%); border-radius:8px; box-shadow:0 0 25px rgba(249, 115, 22, 0.4);"></div>
+    </div>
+    <div style="margin-top:25px; display:flex; justify-content:flex-end; align-items:center;">
+      <div class="breathe-green-node" style="color:#94A3B8; font-family:'JetBrains Mono'; font-size:16px; font-weight:900; padding:4px 12px; border-radius:6px;">波段點位 {bottom_price} ({bottom_date}) | 跌幅 -{abs_dd}%</div>
+    </div>
+  </div>
+</div>
+""")
+
+
+def drawdown_cards(events_df):
+    """
+    Cards of the 7% drawdown event log, newest first.
+
+    Args:
+        events_df (pd.DataFrame): Events from `get_downward_analysis`.
+
+    Returns:
+        np.ndarray: Card HTML strings.
+    """
+    if events_df.empty:
+        return np.empty(0, dtype=object)
+    r = events_df.sort_values(by='觸發日期', ascending=False, kind='stable')
+    total_dd = r['最大跌幅(%)'].to_numpy(dtype=np.float64)
+    abs_dd = np.abs(total_dd)
+    bottom_price = r['破底最低價'].to_numpy(dtype=np.float64)
+    pts_drop = r['前高價格'].to_numpy(dtype=np.float64) - bottom_price
+    recovered = (r['狀態'] == '已解套').to_numpy()
+    deep = abs_dd >= 15.0
+
+    fields = {
+        'status_bg': choose(recovered, 'rgba(16, 185, 129, 0.15)', 'rgba(239, 68, 68, 0.15)'),
+        'status_color': choose(recovered, '#10B981', '#EF4444'),
+        'status_text': choose(recovered, '✅ ', '🚨 ') + text(r['狀態']),
+        'trigger_date': text(r['觸發日期']),
+        # 紫色代表深度洗盤，青色一般回檔，崩盤級別用紅色
+        'custom_tag_bg': choose(abs_dd >= 20.0, '#EF4444', choose(deep, '#8B5CF6', '#06B6D4')),
+        'custom_tag_text': choose(deep, '深度洗盤', '一般回檔'),
+        'days_to_bottom': text(r['前高到破底天數'].astype(int)),
+        'pts_drop_total': fmt(pts_drop, ',.0f', na='nan'),
+        'trigger_price': fmt(r['觸發價格'], ',.0f', na='nan'),
+        'bottom_date': text(r['破底日期']),
+        'bottom_price': fmt(bottom_price, ',.0f', na='nan'),
+        'abs_dd': fmt(abs_dd, '.1f', na='nan'),
+        'pts_drop': fmt(pts_drop, '.0f', na='nan'),
+        'total_dd': fmt(total_dd, '.1f', na='nan'),
+        # 進度條以 30% 跌幅為滿版
+        'bar_w': fmt(np.minimum(100.0, abs_dd / 30 * 100), '', na='nan')
+    }
+    return _DRAWDOWN_CARD.render(fields, len(r))
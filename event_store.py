@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+事件表索引與伺服器端篩選 (Event Store)
+
+事件表 (乖離回測、上漲波段、7% 回檔) 原本每次 render 都重新 sort_values，再把整張表
+(st.dataframe 或全部卡片) 推到瀏覽器。多檔標的一起跑引擎後會累積到上萬筆，這裡改為：
+    1. 依日期由新到舊排序一次 (穩定排序，日誌卡片也以同一順序產生，位置可直接對應)
+    2. 預先建立篩選索引：年份 (排序後為單調序列，年份區間 = 一段連續切片，以 searchsorted 取得)、
+       類別欄位 (狀態 / 類型) 與數值分桶 (跌幅區間、漲幅區間) 轉成整數代碼
+    3. query() 只回傳符合條件的列位置；頁面再以 event_cards.page 取出當頁，只傳當頁資料
+結果依資料版本快取於 analytics_service，篩選只是幾次陣列比較，不再重排或複製整張表。
+"""
+import numpy as np
+import pandas as pd
+
+
+class EventStore:
+    """
+    Pre-sorted, pre-indexed event table (newest first) with server-side filtering.
+
+    Args:
+        df (pd.DataFrame): Event table.
+        date_col (str): Event date column ('YYYY-MM-DD' strings or datetimes).
+        categories (tuple): Categorical columns offered as filters (e.g. '狀態', '類型').
+        bins (dict): Facet name -> (column, edges, labels). A value v falls in bucket
+            `searchsorted(edges, v, side='right')`, so `labels` has len(edges) + 1 entries.
+    """
+
+    def __init__(self, df, date_col, categories=(), bins=None):
+        self.date_col = date_col
+        if df is None or df.empty or date_col not in df.columns:
+            df = pd.DataFrame(columns=[date_col])
+        # 已是由新到舊時穩定排序不改變順序，日誌卡片 (event_cards) 與這裡的列位置一致
+        self.frame = df.sort_values(by=date_col, ascending=False, kind='stable').reset_index(drop=True)
+
+        dates = pd.to_datetime(self.frame[date_col], errors='coerce')
+        years = np.asarray(dates.dt.year.fillna(-1), dtype=np.int64)
+        # 由新到舊 → 年份遞減 (缺日期排最後)，取負號後遞增，年份區間可直接二分搜尋
+        self._neg_years = -years
+        valid = years[years >= 0]
+        self.year_range = (int(valid.min()), int(valid.max())) if len(valid) else None
+
+        # 篩選欄位：facet 名稱 -> (每列代碼, 代碼對應的標籤)，代碼 -1 代表缺值
+        self.facets = {}
+        for col in categories:
+            if col in self.frame.columns:
+                codes, uniques = pd.factorize(self.frame[col], sort=True)
+                self.facets[col] = (codes.astype(np.int64), [str(u) for u in uniques])
+        for name, (col, edges, labels) in (bins or {}).items():
+            if col in self.frame.columns:
+                values = pd.to_numeric(self.frame[col], errors='coerce').to_numpy(dtype=np.float64)
+                codes = np.searchsorted(np.asarray(edges, dtype=np.float64), values, side='right')
+                self.facets[name] = (np.where(np.isnan(values), -1, codes), list(labels))
+
+    def __len__(self):
+        return len(self.frame)
+
+    def options(self, facet):
+        """Labels offered by a facet, in bucket / sorted order."""
+        return self.facets[facet][1]
+
+    def query(self, years=None, filters=None):
+        """
+        Positions (into `frame`, newest first) of the events matching every filter.
+
+        Args:
+            years (tuple): Inclusive (first_year, last_year), or None for all years.
+            filters (dict): Facet name -> selected labels; an empty selection keeps everything.
+
+        Returns:
+            np.ndarray: Sorted int64 row positions.
+        """
+        lo, hi = 0, len(self.frame)
+        if years is not None:
+            lo = int(np.searchsorted(self._neg_years, -int(years[1]), side='left'))
+            hi = int(np.searchsorted(self._neg_years, -int(years[0]), side='right'))
+        keep = np.ones(hi - lo, dtype=bool)
+        for facet, selected in (filters or {}).items():
+            if not selected or facet not in self.facets:
+                continue
+            codes, labels = self.facets[facet]
+            wanted = [i for i, label in enumerate(labels) if label in set(selected)]
+            keep &= np.isin(codes[lo:hi], wanted)
+        return lo + np.flatnonzero(keep)
+
+    def rows(self, positions, columns=None):
+        """DataFrame of the given rows (e.g. one page of `query` results)."""
+        out = self.frame.iloc[np.asarray(positions, dtype=np.int64)]
+        return out if columns is None else out[[c for c in columns if c in out.columns]]
+
+
+# --- 各事件表的篩選設定 ---
+
+UP_GAIN_EDGES = [10, 20, 30, 40, 50, 60, 70]
+UP_GAIN_LABELS = ['0~10%', '10~20%', '20~30%', '30~40%', '40~50%', '50~60%', '60~70%', '70% 以上']
+
+
+def bias_store(b_df):
+    """40-week bias episodes: filter by year and wave type (類型 A / B)."""
+    return EventStore(b_df, '觸發日期', categories=('類型',))
+
+
+def upward_store(up_df):
+    """Up-waves: filter by year, status (已完結 / 進行中), gain bucket and wave type (>= 20% 強勢多頭)."""
+    return EventStore(up_df, '起漲日期 (前波破底)', categories=('狀態',), bins={
+        '漲幅區間': ('漲幅(%)', UP_GAIN_EDGES, UP_GAIN_LABELS),
+        '波段類型': ('漲幅(%)', [20], ['一般反彈', '強勢多頭']),
+    })
+
+
+def drawdown_store(events_df):
+    """7% events: filter by year, status (已解套 / 進行中) and drawdown bucket."""
+    return EventStore(events_df, '觸發日期', categories=('狀態',), bins={
+        '跌幅區間': ('最大跌幅(%)', [10, 15, 20], ['10% 以內', '10~15%', '15~20% (深度洗盤)', '20% 以上 (崩盤級)']),
+    })
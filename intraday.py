@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""
+盤中即時模式 (Intraday Live-Update Mode)
+
+40 週乖離只需要最近 40 根週收盤：過去 39 週在盤中不會變，只有本週收盤隨報價跳動。
+這裡用固定 40 格的環狀緩衝區保存週收盤與其總和，每筆報價只做 O(1) 的加減即可得到
+SMA40 與 Bias；換週時推進一格。盤中只輪詢最新一筆報價，不再重抓 28 年日線重新 resample。
+
+報價來源：
+    YahooQuoteFeed      只抓當日 1 分 K 的最後一筆 (需 yfinance)
+    SimulatedQuoteFeed  本地隨機漫步，測試與離線展示用 (環境變數 TSE_INTRADAY_FEED=sim)
+"""
+import datetime
+import os
+import random
+import threading
+import time
+import traceback
+
+import numpy as np
+import pandas as pd
+
+import alerts
+import analytics_service
+
+SMA_WEEKS = 40
+POLL_SECONDS = 5
+# 輪詢租約：超過幾個輪詢週期沒有任何 session 呼叫 start_intraday，背景輪詢就自行結束
+LEASE_INTERVALS = 4
+
+# 台股交易時段 (台北時間)，時段外不輪詢真實報價
+SESSION_OPEN = datetime.time(9, 0)
+SESSION_CLOSE = datetime.time(13, 35)
+TAIPEI = datetime.timezone(datetime.timedelta(hours=8))
+
+FEED_MODE = os.environ.get("TSE_INTRADAY_FEED", "yahoo")
+
+
+def week_start(date):
+    """Monday label of the W-MON (label='left', closed='left') week containing `date`."""
+    d = pd.Timestamp(date).normalize()
+    return d - pd.Timedelta(days=d.weekday())
+
+
+class WeeklyCloseRing:
+    """
+    Fixed-size ring buffer of weekly closes with an O(1) moving average.
+
+    The slot at `head` is the current (in-progress) week.
+    """
+    __slots__ = ('size', 'closes', 'head', 'count', 'total')
+
+    def __init__(self, closes, size=SMA_WEEKS):
+        self.size = size
+        self.closes = np.zeros(size, dtype=np.float64)
+        tail = [float(c) for c in closes][-size:]
+        self.count = len(tail)
+        self.closes[:self.count] = tail
+        self.head = (self.count - 1) % size
+        self.total = float(self.closes[:self.count].sum())
+
+    def update_current(self, close):
+        """Replace the close of the current week."""
+        if self.count == 0:
+            self.roll(close)
+            return
+        self.total += close - self.closes[self.head]
+        self.closes[self.head] = close
+
+    def roll(self, close):
+        """Start a new week with `close`, dropping the oldest week once the ring is full."""
+        self.head = (self.head + 1) % self.size
+        if self.count == self.size:
+            self.total -= self.closes[self.head]
+        else:
+            self.count += 1
+        self.closes[self.head] = close
+        self.total += close
+        # 換週時重新加總一次，避免長時間累加的浮點誤差 (固定 40 格，仍是 O(1))
+        if self.count == self.size:
+            self.total = float(self.closes.sum())
+
+    @property
+    def sma(self):
+        return self.total / self.size if self.count == self.size else float('nan')
+
+    @property
+    def current(self):
+        return float(self.closes[self.head]) if self.count else float('nan')
+
+    @property
+    def bias(self):
+        sma = self.sma
+        return (self.current - sma) / sma * 100 if sma == sma and sma else float('nan')
+
+
+class YahooQuoteFeed:
+    """
+    Latest quote from today's 1-minute bars (one small request per poll).
+    """
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    def latest_quote(self):
+        import yfinance as yf
+
+        bars = yf.Ticker(self.ticker).history(period="1d", interval="1m")
+        if bars.empty:
+            return None
+        ts = bars.index[-1]
+        return {
+            'time': ts.tz_convert(TAIPEI).to_pydatetime() if ts.tzinfo else ts.to_pydatetime(),
+            'price': float(bars['Close'].iloc[-1]),
+            'high': float(bars['High'].max()),
+            'low': float(bars['Low'].min())
+        }
+
+    def in_session(self, now):
+        return now.weekday() < 5 and SESSION_OPEN <= now.time() <= SESSION_CLOSE
+
+
+class SimulatedQuoteFeed:
+    """
+    Local stand-in feed: a random walk starting from the last known close.
+
+    Args:
+        start_price (float): First price of the walk.
+        volatility (float): Per-tick standard deviation in percent.
+        seed (int): Random seed for reproducible runs.
+    """
+
+    def __init__(self, start_price, volatility=0.05, seed=None):
+        self.price = float(start_price)
+        self.high = self.low = self.price
+        self.volatility = volatility
+        self._rng = random.Random(seed)
+        self._day = None
+
+    def latest_quote(self):
+        now = datetime.datetime.now(TAIPEI)
+        if self._day != now.date():
+            self._day = now.date()
+            self.high = self.low = self.price
+        self.price *= 1 + self._rng.gauss(0, self.volatility) / 100
+        self.high, self.low = max(self.high, self.price), min(self.low, self.price)
+        return {'time': now, 'price': self.price, 'high': self.high, 'low': self.low}
+
+    def in_session(self, now):
+        return True
+
+
+class IntradayMonitor:
+    """
+    Current weekly bar, SMA40 and Bias updated in O(1) per quote.
+
+    Seeded from the analytics service's weekly bars; every quote also feeds
+    the live drawdown / bounce state of the daily engines.
+    """
+
+    def __init__(self, weekly, ticker=analytics_service.DEFAULT_TICKER):
+        self.ticker = ticker
+        self._lock = threading.Lock()
+        self.ring = WeeklyCloseRing(weekly['Close'].to_numpy())
+        last = weekly.iloc[-1]
+        self.week = weekly.index[-1]
+        self.bar = {'Open': float(last['Open']), 'High': float(last['High']),
+                    'Low': float(last['Low']), 'Close': float(last['Close'])}
+        self.as_of = None
+        self.quotes = 0
+
+    def on_quote(self, quote):
+        """
+        Apply one quote {'time', 'price', 'high', 'low'}.
+        """
+        price = float(quote['price'])
+        ts = pd.Timestamp(quote['time'])
+        if ts.tzinfo is not None:
+            ts = ts.tz_localize(None)
+        wk = week_start(ts)
+        with self._lock:
+            if wk > self.week:
+                self.week = wk
+                self.bar = {'Open': price, 'High': price, 'Low': price, 'Close': price}
+                self.ring.roll(price)
+            elif wk == self.week:
+                self.bar['High'] = max(self.bar['High'], price)
+                self.bar['Low'] = min(self.bar['Low'], price)
+                self.bar['Close'] = price
+                self.ring.update_current(price)
+            else:
+                return
+            self.as_of = ts
+            self.quotes += 1
+
+        analytics_service.push_bar(ts.strftime('%Y-%m-%d'), quote.get('high', price),
+                                   quote.get('low', price), price, ticker=self.ticker)
+        try:
+            alerts.evaluate(self.ticker, bias=self.ring.bias,
+                            drawdown=analytics_service.live_metrics(self.ticker)['downward_dd'])
+        except Exception as e:
+            print(f"Intraday alert evaluation failed: {e}")
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'week': self.week,
+                'bar': dict(self.bar),
+                'close': self.ring.current,
+                'sma40': self.ring.sma,
+                'bias': self.ring.bias,
+                'as_of': self.as_of,
+                'quotes': self.quotes
+            }
+
+
+_lock = threading.Lock()
+_monitors = {}
+_seeded = {}      # ticker -> 監控器播種時用的週線物件
+_threads = {}
+_requested = {}   # ticker -> 最近一次有 session 要求盤中模式的時間 (time.monotonic)
+
+
+def _make_feed(ticker, monitor):
+    if FEED_MODE == "sim":
+        return SimulatedQuoteFeed(monitor.ring.current)
+    return YahooQuoteFeed(ticker)
+
+
+def _poll_loop(ticker, feed, interval):
+    while True:
+        with _lock:
+            # 租約到期 (已沒有頁面開著盤中模式)：停止輪詢並讓下一次 start_intraday 重新啟動
+            if time.monotonic() - _requested.get(ticker, 0) > interval * LEASE_INTERVALS:
+                if _threads.get(ticker) is threading.current_thread():
+                    del _threads[ticker]
+                return
+        try:
+            if feed.in_session(datetime.datetime.now(TAIPEI)):
+                quote = feed.latest_quote()
+                with _lock:
+                    monitor = _monitors.get(ticker)
+                if quote is not None and monitor is not None:
+                    monitor.on_quote(quote)
+        except Exception as e:
+            print(f"Intraday poll failed: {e}")
+            traceback.print_exc()
+        time.sleep(interval)
+
+
+def start_intraday(ticker=analytics_service.DEFAULT_TICKER, feed=None, interval=POLL_SECONDS):
+    """
+    Start polling the latest quote in a background thread (idempotent per ticker).
+
+    Every call renews the poller's lease; the thread stops by itself once no
+    session has called this for LEASE_INTERVALS poll intervals. The monitor is re-seeded whenever the cached weekly bars are replaced
+    (e.g. once the warm-up has rebuilt them for a new daily download).
+
+    Returns:
+        IntradayMonitor: The shared monitor for this ticker.
+    """
+    weekly = analytics_service.get_weekly(ticker)
+    with _lock:
+        _requested[ticker] = time.monotonic()
+        monitor = _monitors.get(ticker)
+        if monitor is None or _seeded.get(ticker) is not weekly:
+            monitor = IntradayMonitor(weekly, ticker)
+            _monitors[ticker] = monitor
+            _seeded[ticker] = weekly
+        if ticker not in _threads:
+            feed = feed or _make_feed(ticker, monitor)
+            t = threading.Thread(target=_poll_loop, args=(ticker, feed, interval),
+                                 daemon=True, name=f"tse-intraday-{ticker}")
+            _threads[ticker] = t
+            t.start()
+        return monitor
+
+
+def intraday_snapshot(ticker=analytics_service.DEFAULT_TICKER):
+    """Latest intraday values, or None if intraday mode was never started."""
+    with _lock:
+        monitor = _monitors.get(ticker)
+    return monitor.snapshot() if monitor is not None else None
+
+
+if __name__ == "__main__":
+    # 本地測試：python intraday.py  (使用模擬報價，每秒一筆)
+    m = IntradayMonitor(analytics_service.get_weekly())
+    sim = SimulatedQuoteFeed(m.ring.current, seed=1)
+    for _ in range(10):
+        m.on_quote(sim.latest_quote())
+        s = m.snapshot()
+        print(f"{s['as_of']}  close={s['close']:.2f}  sma40={s['sma40']:.2f}  bias={s['bias']:.2f}%")
+        time.sleep(1)
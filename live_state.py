@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+即時回檔 / 反彈狀態 (Live Drawdown & Bounce State)
+
+「目前距前高跌幅」與「目前從低點反彈幅度」只取決於兩個錨點：
+    回檔：前高 (進行中的 7% 事件固定用事件前高；否則為上次解套後的最高價)
+    反彈：起漲低點 (進行中的上漲波段固定用起漲價；否則為上一波高點後的最低價)
+這裡把錨點與最新收盤保存成小物件，新 K 棒進來時 O(1) 更新，
+各頁面與 market_snapshot 讀取時不必再切 DataFrame 重算。
+
+同一交易日的 K 棒可重複送入 (盤中更新)：當日高低點與之前累積的極值分開保存，
+因此盤中修正不會把錯誤的極值永久併入。
+"""
+import math
+import threading
+
+
+class LiveMarketState:
+    """
+    Running peak / trough anchors with O(1) updates and reads.
+
+    Args:
+        peak (float): Drawdown anchor (highest price the drawdown is measured from).
+        peak_running (bool): True if new highs move the anchor (no ongoing 7% event).
+        trough (float): Bounce anchor (lowest price the bounce is measured from), or None.
+        trough_running (bool): True if new lows move the anchor (no ongoing up-wave).
+        last_date (str): 'YYYY-MM-DD' of the latest bar already folded into the anchors.
+        last_close (float): Close of the latest bar.
+    """
+
+    def __init__(self, peak, peak_running, trough, trough_running, last_date, last_close):
+        self._lock = threading.Lock()
+        self._peak = peak
+        self._peak_running = peak_running
+        self._trough = trough
+        self._trough_running = trough_running
+        self._last_date = last_date
+        self._last_close = last_close
+        # 當日 (尚未收盤定案) 的高低點，換日時才併入錨點
+        self._day_high = None
+        self._day_low = None
+
+    def update(self, date, high, low, close):
+        """
+        Fold one bar into the state; re-sending the same date replaces that day's bar.
+
+        Args:
+            date (str): 'YYYY-MM-DD' of the bar.
+            high, low, close (float): Bar prices.
+        """
+        with self._lock:
+            if self._last_date is not None and date < self._last_date:
+                return
+            if date != self._last_date:
+                self._fold_day()
+                self._last_date = date
+            # 盤中資料是當日累計高低點，直接覆蓋
+            self._day_high, self._day_low = high, low
+            self._last_close = close
+
+    def _fold_day(self):
+        if self._day_high is not None and self._peak_running:
+            self._peak = self._day_high if self._peak is None else max(self._peak, self._day_high)
+        if self._day_low is not None and self._trough_running:
+            self._trough = self._day_low if self._trough is None else min(self._trough, self._day_low)
+        self._day_high = self._day_low = None
+
+    def _current_peak(self):
+        if self._peak_running and self._day_high is not None:
+            return self._day_high if self._peak is None else max(self._peak, self._day_high)
+        return self._peak
+
+    def _current_trough(self):
+        if self._trough_running and self._day_low is not None:
+            return self._day_low if self._trough is None else min(self._trough, self._day_low)
+        return self._trough
+
+    @property
+    def current_drawdown(self):
+        """Percent below the drawdown anchor (positive number), 0 if unknown."""
+        with self._lock:
+            peak = self._current_peak()
+            if not peak or self._last_close is None or math.isnan(peak):
+                return 0.0
+            return (peak - self._last_close) / peak * 100
+
+    @property
+    def current_bounce(self):
+        """Percent above the bounce anchor, 0 if unknown."""
+        with self._lock:
+            trough = self._current_trough()
+            if not trough or self._last_close is None or math.isnan(trough):
+                return 0.0
+            return (self._last_close - trough) / trough * 100
+
+    @property
+    def last_close(self):
+        with self._lock:
+            return self._last_close
+
+    @property
+    def last_date(self):
+        with self._lock:
+            return self._last_date
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'peak': self._peak, 'peak_running': self._peak_running,
+                'trough': self._trough, 'trough_running': self._trough_running,
+                'last_date': self._last_date, 'last_close': self._last_close,
+                'day_high': self._day_high, 'day_low': self._day_low
+            }
+
+    @classmethod
+    def from_dict(cls, d):
+        state = cls(d['peak'], d['peak_running'], d['trough'], d['trough_running'],
+                    d['last_date'], d['last_close'])
+        state._day_high, state._day_low = d.get('day_high'), d.get('day_low')
+        return state
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+事件標記定位 (Event Marker Placement)
+
+把事件表 (乖離回測 b_df、7% 回檔 EventTable、波段 WaveTable) 的日期對應到圖表上的 K 棒位置。
+圖表的 K 棒日期存成排序好的 int64 陣列，所有事件日期以一次 searchsorted 找到
+「包含該日期的那一根 K 棒」：週 K 以週一為標籤，週三觸發的日線事件也會落在同一根週 K 上。
+不在圖表範圍內 (或缺日期) 的事件位置為 -1，由呼叫端過濾。
+"""
+import numpy as np
+import pandas as pd
+
+from result_types import EventTable, WaveTable, NS_PER_DAY, to_ns
+
+# 各事件表預設的標記日期欄位
+_DEFAULT_FIELD = {EventTable: 'trigger_date', WaveTable: 'start_date'}
+
+
+def event_dates(source, field=None):
+    """
+    Event dates as int64 epoch nanoseconds (missing dates become NaT).
+
+    Args:
+        source (EventTable | WaveTable | pd.DataFrame): Event table.
+        field (str): Date field / column; defaults to the trigger date (EventTable)
+            or the wave start (WaveTable). Required for DataFrames (e.g. '觸發日期').
+
+    Returns:
+        np.ndarray: int64 dates, one per event.
+    """
+    if isinstance(source, pd.DataFrame):
+        return to_ns(source[field])
+    return np.asarray(getattr(source, field or _DEFAULT_FIELD[type(source)]), dtype=np.int64)
+
+
+class BarIndex:
+    """
+    Shared date → bar position lookup of a chart.
+
+    Args:
+        index (DatetimeIndex | array-like): Bar labels (sorted), e.g. weekly bars labelled by week start.
+        period_days (int): Calendar days covered by one bar (7 for weekly, 1 for daily).
+    """
+
+    def __init__(self, index, period_days=1):
+        self.dates = to_ns(index)
+        self.period_ns = period_days * NS_PER_DAY
+
+    def __len__(self):
+        return len(self.dates)
+
+    def positions(self, dates):
+        """
+        Position of the bar containing each date, or -1 when it is off the chart.
+
+        Args:
+            dates (array-like): int64 epoch nanoseconds (see `event_dates`).
+
+        Returns:
+            np.ndarray: int64 positions, one per date.
+        """
+        ns = np.asarray(dates, dtype=np.int64)
+        if len(self.dates) == 0:
+            return np.full(len(ns), -1, dtype=np.int64)
+        pos = np.searchsorted(self.dates, ns, side='right') - 1
+        ok = pos >= 0
+        start = self.dates[np.maximum(pos, 0)]
+        # 超出最後一根 K 棒涵蓋的期間、或早於第一根 K 棒的日期不在圖上
+        ok &= ns < start + self.period_ns
+        return np.where(ok, pos, -1)
+
+    def place(self, source, field=None, mask=None):
+        """
+        Unique, sorted bar positions of the events in `source` (optionally filtered by `mask`).
+        """
+        dates = event_dates(source, field)
+        if mask is not None:
+            dates = dates[np.asarray(mask, dtype=bool)]
+        pos = self.positions(dates)
+        return np.unique(pos[pos >= 0])
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+全站市場快照 (Shared Market Snapshot)
+
+AI 助理 (ui_chatbot) 的 Dify 參數原本讀 st.session_state['market_snapshot']，
+由使用者剛好開過的頁面各自填入：沒開過的頁面顯示「待載入...」，不同 session 的數字也可能不一致。
+這裡把頭條指標集中計算成一份唯讀快照 (MappingProxyType)，所有 session 共用：
+    每個資料版本一次   40 週乖離、指數收盤、上漲波段各級機率、回檔風險機率、
+                       歷史相似情境的後續走勢 (analytics_service 快取)
+    即時狀態變動時     距前高回檔、低點反彈、對應目前反彈幅度的機率 (盤中 push_bar 後重新套上)
+session 只保留自己的資訊 (目前頁面)。
+"""
+import types
+
+# 上漲波段機率的級距 (漲幅 >= 10% ... >= 50%)，與上漲強度頁的階梯一致
+UP_LEVELS = (10, 20, 30, 40, 50)
+# 回檔風險機率的級距 (對應 7% 回檔統計的「跌幅超過 X% 機率」)
+DOWN_LEVELS = (10, 15, 20, 30, 50)
+
+PENDING = "待載入..."
+
+
+def _freeze(values):
+    return types.MappingProxyType(dict(values))
+
+
+def upward_probabilities(up_df):
+    """
+    Share of finished up-waves whose gain reached each level.
+
+    Args:
+        up_df (pd.DataFrame): Up-wave table ('漲幅(%)', '狀態').
+
+    Returns:
+        dict: {level: probability (%)} for UP_LEVELS, 0 when no wave has finished.
+    """
+    if up_df.empty:
+        return {level: 0 for level in UP_LEVELS}
+    gains = up_df.loc[up_df['狀態'] == '已完結', '漲幅(%)'].to_numpy()
+    if len(gains) == 0:
+        return {level: 0 for level in UP_LEVELS}
+    return {level: round(float((gains >= level).sum()) / len(gains) * 100, 1) for level in UP_LEVELS}
+
+
+def matched_upward_probability(bounce, probs):
+    """Probability of the next gain level above the current bounce (>= 50% uses the 50% level)."""
+    for level, upper in zip(UP_LEVELS[:-1], UP_LEVELS[1:]):
+        if bounce < upper:
+            return probs[level]
+    return probs[UP_LEVELS[-1]]
+
+
+def build(weekly, up_df, down_metrics, version, analogue_summary=None):
+    """
+    Data-version part of the snapshot (everything that only changes with a new daily download).
+
+    Args:
+        weekly (pd.DataFrame): Weekly bars with 'Close', 'SMA40', 'Bias'.
+        up_df (pd.DataFrame): Up-wave table of the upward statistics page.
+        down_metrics (dict): Metrics of the 7% drawdown statistics.
+        version (str): Data version the values were computed from.
+        analogue_summary (dict): analogues.summarize() of the current week's analogues.
+
+    Returns:
+        MappingProxyType: Immutable snapshot (see `with_live` for the live fields).
+    """
+    last = weekly.iloc[-1] if len(weekly) else None
+    return _freeze({
+        'version': version,
+        'bias_40w': float(last['Bias']) if last is not None else None,
+        'sma_40w': float(last['SMA40']) if last is not None else None,
+        'index_price': float(last['Close']) if last is not None else None,
+        'as_of': None,
+        'upward_probs': _freeze(upward_probabilities(up_df)),
+        'downward_risk': _freeze({level: float(down_metrics.get(f'跌幅超過 {level}% 機率', 0)) for level in DOWN_LEVELS}),
+        'downward_dd': None,
+        'upward_bounce': None,
+        'upward_prob': None,
+        'analogues': _freeze({h: _freeze(v) for h, v in (analogue_summary or {}).items()})
+    })
+
+
+def analogue_outlook(summary):
+    """
+    One-line forward outlook of the analogues, e.g. '4週 中位 +1.2% / 最差 -5.3% (回檔 -2.1% / -9.8%)；...'.
+
+    Returns:
+        str: Text for the AI assistant, or PENDING when no horizon has samples.
+    """
+    parts = [f"{h}週 中位 {s['ret_median']:+.1f}% / 最差 {s['ret_worst']:+.1f}% "
+             f"(回檔 {s['mdd_median']:.1f}% / {s['mdd_worst']:.1f}%，{s['count']} 組)"
+             for h, s in (summary or {}).items() if s['count']]
+    return "；".join(parts) if parts else PENDING
+
+
+def with_live(base, live):
+    """
+    Overlay the live drawdown / bounce (analytics_service.live_metrics) on a base snapshot.
+
+    Returns:
+        MappingProxyType: New immutable snapshot; `base` is left untouched.
+    """
+    bounce = live['upward_bounce']
+    return _freeze({
+        **base,
+        'index_price': live['last_close'] if live['last_close'] is not None else base['index_price'],
+        'as_of': live['last_date'],
+        'downward_dd': live['downward_dd'],
+        'upward_bounce': bounce,
+        'upward_prob': matched_upward_probability(bounce, base['upward_probs']) if bounce is not None else None
+    })
+
+
+def display(snapshot):
+    """
+    Formatted strings for the AI assistant payload (same formats the pages used to write).
+
+    Args:
+        snapshot (Mapping): Snapshot from `with_live`, or None when the data is not loaded yet.
+
+    Returns:
+        dict: bias_40w, index_price, upward_bounce, upward_prob, downward_dd, downward_risk_p10,
+        analogue_outlook.
+    """
+    snap = snapshot or {}
+
+    def fmt(value, template):
+        return PENDING if value is None else template.format(value)
+
+    return {
+        'bias_40w': fmt(snap.get('bias_40w'), "{:.1f}%"),
+        'index_price': fmt(snap.get('index_price'), "{:,.0f}"),
+        'upward_bounce': fmt(snap.get('upward_bounce'), "{:.1f}%"),
+        'upward_prob': fmt(snap.get('upward_prob'), "{}%"),
+        'downward_dd': fmt(snap.get('downward_dd'), "{:.1f}%"),
+        'downward_risk_p10': fmt(snap['downward_risk'][10] if snap else None, "{}%"),
+        'analogue_outlook': analogue_outlook(snap.get('analogues'))
+    }
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+蒙地卡羅情境模擬 (Monte Carlo Drawdown / Recovery Projection)
+
+情境卡片原本用「最新收盤 × 歷史平均跌幅」推估目標價，回歸天數也只是平均值。
+這裡改為從歷史日報酬做區塊重抽 (block bootstrap，保留波動聚集與短期自我相關)，
+一次向量化產生數萬條未來路徑，對每條路徑量測：
+    最深回檔     相對回檔錨點 (前高) 的最大跌幅
+    見底天數     從今天到路徑最低點的交易日數
+    解套天數     從今天到重新站回前高的交易日數 (期間內未站回則不計入)
+並輸出各百分位數與價格扇形圖 (fan chart) 所需的每日百分位路徑。
+結果依資料版本快取於 analytics_service，頁面直接讀取。
+"""
+import numpy as np
+
+N_PATHS = 20_000
+HORIZON_DAYS = 504          # 約兩年交易日
+BLOCK_DAYS = 20             # 區塊長度約一個月
+HISTORY_DAYS = 252 * 20     # 取最近 20 年日報酬作為重抽母體
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+SEED = 20240607
+
+# 一次模擬的路徑數上限 (float32, 5,000 × 504 ≈ 10 MB)，超過時分批
+_CHUNK_PATHS = 5_000
+
+
+def block_bootstrap_paths(log_returns, n_paths, horizon, block=BLOCK_DAYS, rng=None):
+    """
+    Cumulative log-return paths built from random contiguous blocks of history.
+
+    Args:
+        log_returns (np.ndarray): Historical daily log returns.
+        n_paths (int): Number of paths.
+        horizon (int): Days per path.
+        block (int): Block length in days.
+        rng (np.random.Generator): Random generator.
+
+    Returns:
+        np.ndarray: float32 array of shape (n_paths, horizon).
+    """
+    rng = rng or np.random.default_rng(SEED)
+    r = np.asarray(log_returns, dtype=np.float32)
+    block = min(block, len(r))
+    n_blocks = -(-horizon // block)
+    starts = rng.integers(0, len(r) - block + 1, size=(n_paths, n_blocks))
+    # (paths, blocks, block) 的索引一次取出，再攤平成每條路徑的日報酬序列
+    idx = (starts[:, :, None] + np.arange(block)).reshape(n_paths, -1)[:, :horizon]
+    return np.cumsum(r[idx], axis=1)
+
+
+def simulate(closes, start_price, peak, n_paths=N_PATHS, horizon=HORIZON_DAYS,
+             block=BLOCK_DAYS, history=HISTORY_DAYS, seed=SEED):
+    """
+    Distributions of depth, time-to-bottom and time-to-recovery from the current state.
+
+    Args:
+        closes (array-like): Historical daily closes (oldest first).
+        start_price (float): Latest close, the start of every path.
+        peak (float): Drawdown anchor; depth and recovery are measured against it.
+        n_paths, horizon, block, history, seed: Simulation settings.
+
+    Returns:
+        dict: {
+            'depth': percentiles of max drawdown from `peak` (%, positive),
+            'days_to_bottom': percentiles of trading days to the path low
+                (0 for paths that never trade below the start),
+            'days_to_recovery': percentiles over paths that regain `peak`,
+            'recovery_prob': % of paths that regain `peak` within the horizon,
+            'bottom_price': percentiles of the path low,
+            'fan': {p: daily price percentile path},
+            'n_paths', 'horizon', 'start_price', 'peak'
+        }
+    """
+    c = np.asarray(closes, dtype=np.float64)[-(history + 1):]
+    log_returns = np.diff(np.log(c))
+    log_returns = log_returns[np.isfinite(log_returns)]
+    rng = np.random.default_rng(seed)
+
+    peak = max(float(peak), float(start_price))
+    log_peak = np.log(peak / start_price)
+    min_log = np.empty(n_paths, dtype=np.float32)
+    bottom_day = np.empty(n_paths, dtype=np.int64)
+    recovery_day = np.full(n_paths, -1, dtype=np.int64)
+    fan_chunks = []
+
+    for lo in range(0, n_paths, _CHUNK_PATHS):
+        hi = min(lo + _CHUNK_PATHS, n_paths)
+        paths = block_bootstrap_paths(log_returns, hi - lo, horizon, block, rng)
+        lows = paths.min(axis=1)
+        # 從未跌破起點的路徑，最低點就是今天 (第 0 天)，與下方 bottom 以起點為下限一致
+        bottom_day[lo:hi] = np.where(lows < 0, paths.argmin(axis=1) + 1, 0)
+        min_log[lo:hi] = lows
+        reached = paths >= log_peak
+        hit = reached.any(axis=1)
+        recovery_day[lo:hi][hit] = reached[hit].argmax(axis=1) + 1
+        fan_chunks.append(np.percentile(paths, PERCENTILES, axis=0))
+
+    # 已在前高時路徑最低點可能高於起點：回檔至少為目前的距前高幅度
+    bottom = start_price * np.exp(np.minimum(min_log, 0.0).astype(np.float64))
+    depth = (peak - bottom) / peak * 100
+    recovered = recovery_day > 0
+
+    def pct(values):
+        if len(values) == 0:
+            return {p: None for p in PERCENTILES}
+        return {p: round(float(v), 2) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+    # 分批百分位數以路徑數加權平均，近似整體的每日百分位
+    weights = np.array([min(_CHUNK_PATHS, n_paths - lo) for lo in range(0, n_paths, _CHUNK_PATHS)], dtype=np.float64)
+    fan_log = np.tensordot(weights / weights.sum(), np.stack(fan_chunks), axes=1)
+
+    return {
+        'depth': pct(depth),
+        'days_to_bottom': pct(bottom_day),
+        'days_to_recovery': pct(recovery_day[recovered]),
+        'recovery_prob': round(float(recovered.mean() * 100), 1),
+        'bottom_price': pct(bottom),
+        'fan': {p: start_price * np.exp(fan_log[i].astype(np.float64)) for i, p in enumerate(PERCENTILES)},
+        'n_paths': n_paths,
+        'horizon': horizon,
+        'start_price': float(start_price),
+        'peak': peak
+    }
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+前瞻結果矩陣 (Forward Outcome Matrix)
+
+對每一根 K 棒預先算好之後 1 / 4 / 13 / 26 / 52 週內的：
+    前瞻報酬   (期末收盤 / 當根收盤 − 1)
+    最大回檔   (期間最低價相對當根收盤，≤ 0)
+    最大漲幅   (期間最高價相對當根收盤，≥ 0)
+區間極值直接用 range_index 的稀疏表一次向量化取出，每個週期只是 O(n) 的陣列運算。
+「乖離 > 20% 時 4 週內跌幅超過 3.5% 的機率」這類條件機率因此只是布林遮罩上的歸約，
+不必再用事件標籤近似。
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from range_index import SparseTable
+
+# 週期名稱 -> K 棒數
+WEEKLY_HORIZONS = {'1w': 1, '4w': 4, '13w': 13, '26w': 26, '52w': 52}
+DAILY_HORIZONS = {'1w': 5, '4w': 20, '13w': 65, '26w': 130, '52w': 260}
+
+RETURN = 'return'
+DRAWDOWN = 'drawdown'
+GAIN = 'gain'
+
+
+@dataclass(slots=True)
+class OutcomeMatrix:
+    """
+    Forward outcomes in percent, shape (bars, horizons); NaN where the window
+    runs past the last bar.
+    """
+    dates: np.ndarray
+    horizons: tuple
+    bars: np.ndarray
+    fwd_return: np.ndarray
+    fwd_max_drawdown: np.ndarray
+    fwd_max_gain: np.ndarray
+
+    def __len__(self):
+        return len(self.dates)
+
+    def column(self, horizon, kind=RETURN):
+        """One horizon of one outcome kind ('return' / 'drawdown' / 'gain') as a 1-D array."""
+        h = self.horizons.index(horizon)
+        data = {RETURN: self.fwd_return, DRAWDOWN: self.fwd_max_drawdown, GAIN: self.fwd_max_gain}[kind]
+        return data[:, h]
+
+    def positions(self, dates):
+        """Row of each date, or -1 if the date is not a bar of this matrix."""
+        ns = np.asarray(pd.DatetimeIndex(pd.to_datetime(dates)), dtype='datetime64[ns]').view(np.int64)
+        if len(self.dates) == 0:
+            return np.full(len(ns), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.dates, ns), len(self.dates) - 1)
+        return np.where(self.dates[pos] == ns, pos, -1)
+
+    def probability(self, mask, horizon, kind=DRAWDOWN, below=None, above=None):
+        """
+        P(outcome below / above a threshold | mask), over rows with a complete window.
+
+        Example: P(drop > 3.5% within 4 weeks | bias > 20%) is
+        `probability(bias > 20, '4w', 'drawdown', below=-3.5)`.
+
+        Returns:
+            tuple: (probability in percent or None, number of observed rows).
+        """
+        values = self.column(horizon, kind)
+        sel = np.asarray(mask, dtype=bool) & ~np.isnan(values)
+        n = int(sel.sum())
+        if n == 0:
+            return None, 0
+        hit = np.ones(n, dtype=bool)
+        if below is not None:
+            hit &= values[sel] < below
+        if above is not None:
+            hit &= values[sel] > above
+        return round(float(hit.mean() * 100), 1), n
+
+    def to_frame(self):
+        """Wide frame with columns like 'ret_4w', 'mdd_4w', 'gain_4w', indexed by date."""
+        cols = {}
+        for h, name in enumerate(self.horizons):
+            cols[f'ret_{name}'] = self.fwd_return[:, h]
+            cols[f'mdd_{name}'] = self.fwd_max_drawdown[:, h]
+            cols[f'gain_{name}'] = self.fwd_max_gain[:, h]
+        return pd.DataFrame(cols, index=pd.DatetimeIndex(self.dates.view('datetime64[ns]')))
+
+
+def build_outcome_matrix(df, horizons=WEEKLY_HORIZONS):
+    """
+    Precompute forward outcomes for every bar of `df`.
+
+    Args:
+        df (pd.DataFrame): Bars with High, Low and Close (daily or weekly).
+        horizons (dict): Horizon name -> number of bars, e.g. WEEKLY_HORIZONS.
+
+    Returns:
+        OutcomeMatrix: One row per bar.
+    """
+    close = df['Close'].to_numpy(dtype=np.float64)
+    n, names = len(close), tuple(horizons)
+    bars = np.array([horizons[k] for k in names], dtype=np.int64)
+    ret, mdd, gain = (np.full((n, len(names)), np.nan) for _ in range(3))
+
+    if n > 1:
+        highs = SparseTable(df['High'].to_numpy(dtype=np.float64), 'max')
+        lows = SparseTable(df['Low'].to_numpy(dtype=np.float64), 'min')
+        for col, h in enumerate(bars):
+            m = n - h
+            if m <= 0:
+                continue
+            base = close[:m]
+            # 之後 h 根 K 棒 (不含當根) 的極值
+            starts = np.arange(1, m + 1)
+            ret[:m, col] = (close[h:] / base - 1) * 100
+            mdd[:m, col] = np.minimum(lows.window_values(starts, h) / base - 1, 0) * 100
+            gain[:m, col] = np.maximum(highs.window_values(starts, h) / base - 1, 0) * 100
+
+    dates = np.asarray(pd.DatetimeIndex(df.index), dtype='datetime64[ns]').view(np.int64)
+    return OutcomeMatrix(dates, names, bars, ret, mdd, gain)
@@ -1,47 +1,9 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from data_fetcher import fetch_data
-from strategy_7pct import analyze_7pct_strategy, calculate_7pct_statistics
+import analytics_service
 import datetime
 
-# 抓取與分析資料
-@st.cache_data(ttl=3600)
-def get_analysis_7pct(ticker_symbol):
-    df = fetch_data(ticker_symbol, start_date="2000-01-01")
-    if df.empty:
-        return df, pd.DataFrame(), {}, pd.DataFrame(), 0, 0
-        
-    events_df = analyze_7pct_strategy(df, trigger_pct=7.0)
-    metrics, dist_df = calculate_7pct_statistics(events_df)
-    
-    # 尋找當前狀態
-    current_high = df['High'].max()
-    last_close = df['Close'].iloc[-1]
-    last_date = df.index[-1].strftime('%Y-%m-%d')
-    
-    is_ongoing = False
-    ongoing_event = None
-    if not events_df.empty:
-        if events_df.iloc[-1]['狀態'] == '進行中':
-            is_ongoing = True
-            ongoing_event = events_df.iloc[-1]
-            
-    if is_ongoing:
-        current_dd = (ongoing_event['前高價格'] - last_close) / ongoing_event['前高價格'] * 100
-    else:
-        last_rec_date_str = events_df.iloc[-1]['解套日期'] if not events_df.empty else '2000-01-01'
-        try:
-             recent_df = df.loc[last_rec_date_str:]
-             recent_high = recent_df['High'].max()
-             current_dd = (recent_high - last_close) / recent_high * 100
-        except:
-             recent_high = df['High'].iloc[-1]
-             current_dd = 0
-
-    return df, events_df, metrics, dist_df, current_dd, last_date
-
-
 def page_7pct_strategy():
     st.title("📉 股市 7% 回檔進場分析儀表板")
     st.write("即時監測與歷史回測：針對標普 500 (SPX)、那斯達克 (IXIC) 及台股加權指數 (TWII)，分析自歷史高點跌破 7% 後的剩餘跌幅與反彈機率。")
@@ -56,7 +18,7 @@ def page_7pct_strategy():
     symbol = tickers[selected_name]
 
     # 取資料
-    df, events_df, metrics, dist_df, current_dd, last_date = get_analysis_7pct(symbol)
+    df, events_df, metrics, dist_df, current_dd, last_date = analytics_service.get_downward_analysis(symbol)
 
     if df.empty or events_df.empty:
         st.warning("目前尚無足夠歷史數據可供分析。")
@@ -1,19 +1,16 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import os
 from datetime import datetime
 
+import visit_log
+from ui_theme import apply_page_css
+
 def page_biz_cycle():
-    # 使用 session_state 中的 visit_logs 進行記錄，避免 import 循環
-    if 'visit_logs' in st.session_state:
-        st.session_state['visit_logs'].append({
-            '時間': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            '使用者': st.session_state.get('user_email', '訪客 (未登入)'),
-            '瀏覽模組': "景氣信號監控"
-        })
+    # 全站共用的瀏覽紀錄 (由背景執行緒批次寫入)
+    visit_log.record("景氣信號監控", st.session_state.get('user_email'))
+    apply_page_css('biz_cycle')
     
     # --- 1. 數據載入邏輯 ---
     def load_ndc_data():
@@ -108,33 +105,6 @@ def page_biz_cycle():
     path_bg = "linear-gradient(180deg, #1E1B4B 0%, #0F172A 100%)"
     
     hud_html = f"""
-<style>
-@keyframes pulse-red-hazard-glow {{
-  0% {{ box-shadow: 0 0 10px rgba(239, 68, 68, 0.4); border-color: rgba(239, 68, 68, 0.4); }}
-  50% {{ box-shadow: 0 0 40px rgba(239, 68, 68, 0.8); border-color: rgba(239, 68, 68, 1); }}
-  100% {{ box-shadow: 0 0 10px rgba(239, 68, 68, 0.4); border-color: rgba(239, 68, 68, 0.4); }}
-}}
-@keyframes pulse-green-expand-glow {{
-  0% {{ border-color: rgba(16, 185, 129, 0.2); box-shadow: 0 0 10px rgba(16, 185, 129, 0.1); }}
-  50% {{ border-color: rgba(16, 185, 129, 0.8); box-shadow: 0 0 30px rgba(16, 185, 129, 0.4); }}
-  100% {{ border-color: rgba(16, 185, 129, 0.2); box-shadow: 0 0 10px rgba(16, 185, 129, 0.1); }}
-}}
-@keyframes pulse-blue-path-glow {{
-  0% {{ border-color: rgba(56, 189, 248, 0.2); box-shadow: 0 0 10px rgba(56, 189, 248, 0.1); }}
-  50% {{ border-color: rgba(56, 189, 248, 0.8); box-shadow: 0 0 30px rgba(56, 189, 248, 0.4); }}
-  100% {{ border-color: rgba(56, 189, 248, 0.2); box-shadow: 0 0 10px rgba(56, 189, 248, 0.1); }}
-}}
-@keyframes pulse-red-tag-glow {{
-  0% {{ box-shadow: 0 0 5px rgba(239, 68, 68, 0.2); border-color: rgba(239, 68, 68, 0.3); }}
-  50% {{ box-shadow: 0 0 15px rgba(239, 68, 68, 0.6); border-color: rgba(239, 68, 68, 0.8); }}
-  100% {{ box-shadow: 0 0 5px rgba(239, 68, 68, 0.2); border-color: rgba(239, 68, 68, 0.3); }}
-}}
-@keyframes pulse-green-tag-glow {{
-  0% {{ box-shadow: 0 0 5px rgba(16, 185, 129, 0.2); border-color: rgba(16, 185, 129, 0.3); }}
-  50% {{ box-shadow: 0 0 15px rgba(16, 185, 129, 0.6); border-color: rgba(16, 185, 129, 0.8); }}
-  100% {{ box-shadow: 0 0 5px rgba(16, 185, 129, 0.2); border-color: rgba(16, 185, 129, 0.3); }}
-}}
-</style>
 <div style="background:#0F172A; border:4px solid #334155; border-radius:12px; padding:35px; margin-bottom:40px; box-shadow:0 20px 50px rgba(0,0,0,0.6); overflow:hidden;">
 <div style="display:flex; justify-content:space-between; align-items:stretch; gap:25px;">
 <!-- 左側：燈號分數電子盤 (Kernel) -->
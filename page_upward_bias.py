@@ -1,95 +1,9 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from data_fetcher import fetch_data
-from wave_analyzer import analyze_waves
+import analytics_service
 from ui_theme import apply_global_theme
 
-@st.cache_data(ttl=3600)
-def load_upward_data(ticker_symbol):
-    df = fetch_data(ticker_symbol, start_date="2000-01-01")
-    if df.empty:
-        return pd.DataFrame(), pd.DataFrame(), {}
-    
-    # 使用 7% 轉折模型 (跌 7% 確認頭部，漲 7% 確認底部)
-    waves = analyze_waves(df, reversal_percent=7.0)
-    
-    # 取出所有向上波段 (type == 'up') 並加入前波清洗度
-    up_waves = []
-    for i, w in enumerate(waves):
-        if w['type'] == 'up':
-            prev_w = waves[i-1] if i > 0 else None
-            pre_dd = 0.0
-            if prev_w and prev_w['type'] == 'down':
-                pre_dd = (prev_w['lowest_price'] - prev_w['highest_price']) / prev_w['highest_price'] * 100
-            w['pre_drawdown'] = pre_dd
-            up_waves.append(w)
-            
-    if not up_waves:
-        return pd.DataFrame(), pd.DataFrame(), {}
-        
-    results = []
-    for w in up_waves:
-        s_date = w.get('start_date')
-        e_date = w.get('end_date')
-        start_date_str = s_date.strftime('%Y-%m-%d') if s_date else "N/A"
-        end_date_str = e_date.strftime('%Y-%m-%d') if e_date else "N/A"
-        
-        start_price = w.get('start_price', 0)
-        end_price = w.get('end_price', 0)
-        gain_pct = (end_price - start_price) / start_price * 100 if start_price and start_price != 0 else 0
-        days = (e_date - s_date).days if s_date and e_date else 0
-        
-        status = '進行中' if w.get('ongoing', False) else '已完結'
-        
-        results.append({
-            '起漲日期 (前波破底)': start_date_str,
-            '最高日期 (下波前高)': end_date_str,
-            '起漲價格': float(start_price) if start_price is not None else 0.0,
-            '最高價格': float(end_price) if end_price is not None else 0.0,
-            '漲幅(%)': float(gain_pct) if gain_pct is not None else 0.0,
-            '花費天數': int(days),
-            '狀態': status,
-            '前波清洗度(%)': w.get('pre_drawdown', 0.0)
-        })
-        
-    up_df = pd.DataFrame(results)
-    
-    # 統計機率 (排除進行中)
-    finished_waves = up_df[up_df['狀態'] == '已完結']
-    if finished_waves.empty:
-        finished_waves = up_df
-        
-    # 分配區間
-    bins = [0, 10, 20, 30, 40, 50, 60, 70, 10000]
-    labels = ['     0~10%', '  10~20%', '  20~30%', '  30~40%', '  40~50%', '  50~60%', '  60~70%', '70% 以上']
-    
-    try:
-        counts = pd.cut(finished_waves['漲幅(%)'], bins=bins, labels=labels, right=False).value_counts().sort_index()
-    except:
-        counts = pd.Series(0, index=labels)
-    
-    dist_results = []
-    total = len(finished_waves)
-    for label, count in counts.items():
-        prob = (count / total * 100) if total > 0 else 0
-        dist_results.append({
-            '區間': label.strip(),
-            '次數': count,
-            '機率(%):Q': round(float(prob), 2),
-            '機率(%)': round(float(prob), 2)
-        })
-    dist_df = pd.DataFrame(dist_results)
-    
-    metrics = {
-        '總完整波段數': total,
-        '平均漲幅(%)': round(float(finished_waves['漲幅(%)'].mean()), 2) if total > 0 else 0,
-        '平均花費天數': round(float(finished_waves['花費天數'].mean()), 1) if total > 0 else 0,
-        '漲幅超過 20% 機率': round(float(len(finished_waves[finished_waves['漲幅(%)'] >= 20]) / total * 100), 2) if total > 0 else 0
-    }
-        
-    return up_df, dist_df, metrics
-
 def page_upward_bias():
     st.markdown('<h1 class="centered-title">📈 股市上漲統計表 (Bottom Bounce Analysis)</h1>', unsafe_allow_html=True)
     st.markdown("<p style='text-align:center; color:#6B7280; margin-bottom:50px;'>計算每一次從低點起漲（經過前波大於 7% 的修正洗盤），一直抱到『下一次再發生 7% 大回檔』前的小波段/大波段真正漲幅。</p>", unsafe_allow_html=True)
@@ -103,7 +17,7 @@ def page_upward_bias():
     selected_name = st.selectbox("選擇分析指數 (上漲模組)", list(tickers.keys()))
     symbol = tickers[selected_name]
 
-    up_df, dist_df, metrics = load_upward_data(symbol)
+    up_df, dist_df, metrics, _ = analytics_service.get_upward_analysis(symbol)
 
     if up_df.empty:
         st.warning("目前尚無足夠歷史數據可供分析。")
@@ -194,7 +108,7 @@ def page_upward_bias():
                 <div style="background:#064E3B; padding:45px 20px; text-align:center; display:flex; flex-direction:column; align-items:center;">
                   <div style="font-size:26px; color:#86EFAC; font-weight:900; margin-bottom:10px; letter-spacing:1px;">[階段二] 波段最高點</div>
                   <div style="font-size:18px; color:#4ADE80; font-weight:800; margin-bottom:25px;">(攻頂於 {r['最高日期 (下波前高)']})</div>
-                  <div style="font-family:'JetBrains Mono'; font-size:52px; font-weight:950; color:white; line-height:1; margin-bottom:20px;">{r['最高價格']:,.0f}</div>
+                  <div style="font-family:'JetBrains Mono'; font-size:52px; font-weight:950; color:white; line-height:1; margin-bottom:20px;">{r['最高價格 (或現價)']:,.0f}</div>
                   <div style="background: rgba(6, 78, 59, 0.8); color: #86EFAC; border: 2px solid #22C55E; padding: 4px 16px; border-radius: 6px; font-family: 'JetBrains Mono'; font-size:22px; font-weight:900;">多頭盛極轉折</div>
                 </div>
               </div>
@@ -1,19 +1,9 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from data_fetcher import fetch_data
-from strategy_7pct import analyze_7pct_strategy
-from strategy_upward_wave import get_upward_waves
-
-@st.cache_data(ttl=3600)
-def load_upward_data(ticker_symbol):
-    df = fetch_data(ticker_symbol, start_date="2000-01-01")
-    if df.empty:
-        return pd.DataFrame(), pd.DataFrame(), {}
-    # 使用與下跌空頭同樣的 7% 邏輯尋找轉折點
-    events_df = analyze_7pct_strategy(df, trigger_pct=7.0)
-    up_df, dist_df, metrics = get_upward_waves(events_df, df)
-    return up_df, dist_df, metrics
+import analytics_service
+import ui_tables
+from bootstrap import format_ci
 
 def page_upward_bias():
     st.title("📈 乖離上漲模組 (波段低點反彈)")
@@ -28,7 +18,7 @@ def page_upward_bias():
     selected_name = st.selectbox("選擇分析指數 (上漲模組)", list(tickers.keys()))
     symbol = tickers[selected_name]
 
-    up_df, dist_df, metrics = load_upward_data(symbol)
+    up_df, dist_df, metrics = analytics_service.get_upward_wave_analysis(symbol)
 
     if up_df.empty:
         st.warning("目前尚無足夠歷史數據可供分析。")
@@ -40,9 +30,10 @@ def page_upward_bias():
     st.subheader("📊 歷史波段平均上漲爆發力")
     c1, c2, c3, c4 = st.columns(4)
     c1.metric("歷史完整波段數", f"{metrics.get('總完整波段數', 0)} 次")
-    c2.metric("平均波段漲幅", f"{metrics.get('平均漲幅(%)', 0)}%")
-    c3.metric("平均耗時 (天)", f"{metrics.get('平均花費天數', 0)}")
-    c4.metric("漲幅破 20% 勝率", f"{metrics.get('漲幅超過 20% 機率', 0)}%")
+    ci = metrics.get('CI', {})
+    c2.metric("平均波段漲幅", f"{metrics.get('平均漲幅(%)', 0)}%", help=f"95% 信賴區間：{format_ci(ci.get('平均漲幅(%)'))}")
+    c3.metric("平均耗時 (天)", f"{metrics.get('平均花費天數', 0)}", help=f"95% 信賴區間：{format_ci(ci.get('平均花費天數'), ' 天')}")
+    c4.metric("漲幅破 20% 勝率", f"{metrics.get('漲幅超過 20% 機率', 0)}%", help=f"95% 信賴區間：{format_ci(ci.get('漲幅超過 20% 機率'))}")
     
     st.markdown("---")
     
@@ -69,4 +60,4 @@ def page_upward_bias():
     st.markdown("---")
     
     st.subheader("📜 歷史上漲波段詳情清單")
-    st.dataframe(up_df.sort_values(by='起漲日期 (前波破底)', ascending=False), height=400)
+    ui_tables.render_event_table(analytics_service.get_event_store('upward_wave', symbol), key=f"upward_wave_{symbol}")
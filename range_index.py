@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+區間極值索引 (Range Max/Min Index)
+
+「兩個日期之間的最高價 / 最低價在哪一天」是各引擎最常見的查詢：
+7% 事件的觸發與解套、上漲波段的終點、目前回檔幅度等。
+這裡對每個價格欄位建一次稀疏表 (sparse table，O(n log n) 建表)，
+之後任何 [i, j) 區間的 argmax / argmin 都是 O(1)，
+「第一個突破某價位的位置」則以倍增法在 O(log n) 內找到，不再切 DataFrame 再歸約。
+"""
+import numpy as np
+import pandas as pd
+
+
+class SparseTable:
+    """
+    O(1) range argmax / argmin over a fixed float array.
+
+    Ties resolve to the leftmost position, matching pandas idxmax / idxmin.
+    """
+    __slots__ = ('values', 'levels', '_is_max')
+
+    def __init__(self, values, op='max'):
+        if op not in ('max', 'min'):
+            raise ValueError(f"Unsupported op: {op}")
+        self.values = np.asarray(values, dtype=np.float64)
+        self._is_max = op == 'max'
+        n = len(self.values)
+        levels = [np.arange(n, dtype=np.int64)]
+        k = 1
+        while (1 << k) <= n:
+            prev, half, width = levels[-1], 1 << (k - 1), n - (1 << k) + 1
+            a, b = prev[:width], prev[half:half + width]
+            levels.append(np.where(self._better(self.values[b], self.values[a]), b, a))
+            k += 1
+        self.levels = levels
+
+    def __len__(self):
+        return len(self.values)
+
+    def _better(self, x, y):
+        return x > y if self._is_max else x < y
+
+    def arg(self, i, j):
+        """
+        Position of the extreme value in [i, j); raises ValueError on an empty range.
+        """
+        if not 0 <= i < j <= len(self.values):
+            raise ValueError(f"Empty or out-of-bounds range [{i}, {j})")
+        k = int(j - i).bit_length() - 1
+        a, b = self.levels[k][i], self.levels[k][j - (1 << k)]
+        va, vb = self.values[a], self.values[b]
+        if self._better(vb, va) or (vb == va and b < a):
+            return int(b)
+        return int(a)
+
+    def value(self, i, j):
+        return float(self.values[self.arg(i, j)])
+
+    def window_values(self, starts, width):
+        """
+        Extreme value of every window [s, s + width) in one vectorized pass.
+
+        Args:
+            starts (np.ndarray): Window start positions; every window must fit in the array.
+            width (int): Window length (>= 1).
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        k = int(width).bit_length() - 1
+        a = self.values[self.levels[k][starts]]
+        b = self.values[self.levels[k][starts + width - (1 << k)]]
+        return np.maximum(a, b) if self._is_max else np.minimum(a, b)
+
+    def first_reaching(self, i, j, level):
+        """
+        First position p in [i, j) whose value reaches `level`
+        (>= for a max table, <= for a min table), or None.
+        """
+        j = min(j, len(self.values))
+        if i >= j or not self._reaches(self.values[self.arg(i, j)], level):
+            return None
+        pos = i
+        # 倍增法：整塊都沒到價位就整塊跳過
+        for k in range(len(self.levels) - 1, -1, -1):
+            step = 1 << k
+            if pos + step <= j and not self._reaches(self.values[self.levels[k][pos]], level):
+                pos += step
+        return pos
+
+    def _reaches(self, v, level):
+        return v >= level if self._is_max else v <= level
+
+
+class PriceRangeIndex:
+    """
+    Range queries over a daily price frame, built once per data version.
+
+    Positions are integer offsets into the frame; date arguments accept
+    strings, Timestamps or int64 nanoseconds and follow `df.loc[start:end]`
+    inclusivity.
+    """
+
+    def __init__(self, df):
+        self.dates = np.asarray(pd.DatetimeIndex(df.index).normalize(), dtype='datetime64[ns]').view(np.int64)
+        self._columns = {c: df[c].to_numpy(dtype=np.float64) for c in ('High', 'Low', 'Close') if c in df.columns}
+        self._tables = {}
+
+    def __len__(self):
+        return len(self.dates)
+
+    def table(self, column, op):
+        # 稀疏表依需要才建立 (例如 Close 的 max 只有解套判斷會用到)
+        key = (column, op)
+        if key not in self._tables:
+            self._tables[key] = SparseTable(self._columns[column], op)
+        return self._tables[key]
+
+    @staticmethod
+    def _ns(date):
+        if isinstance(date, (int, np.integer)):
+            return int(date)
+        return pd.Timestamp(date).normalize().value
+
+    def pos(self, date, side='left'):
+        """Offset of `date` in the index (searchsorted semantics)."""
+        return int(np.searchsorted(self.dates, self._ns(date), side=side))
+
+    def span(self, start=None, end=None):
+        """Half-open offsets [i, j) covering df.loc[start:end]."""
+        i = 0 if start is None else self.pos(start, 'left')
+        j = len(self.dates) if end is None else self.pos(end, 'right')
+        return i, j
+
+    def date_at(self, i):
+        return pd.Timestamp(self.dates[i])
+
+    def value_at(self, column, i):
+        return float(self._columns[column][i])
+
+    def argmax(self, column, i, j):
+        return self.table(column, 'max').arg(i, j)
+
+    def argmin(self, column, i, j):
+        return self.table(column, 'min').arg(i, j)
+
+    def max(self, column, start=None, end=None):
+        """Max of `column` over df.loc[start:end], or None if the range is empty."""
+        i, j = self.span(start, end)
+        return self.table(column, 'max').value(i, j) if i < j else None
+
+    def min(self, column, start=None, end=None):
+        """Min of `column` over df.loc[start:end], or None if the range is empty."""
+        i, j = self.span(start, end)
+        return self.table(column, 'min').value(i, j) if i < j else None
+
+    def first_at_least(self, column, i, j, level):
+        return self.table(column, 'max').first_reaching(i, j, level)
+
+    def first_at_most(self, column, i, j, level):
+        return self.table(column, 'min').first_reaching(i, j, level)
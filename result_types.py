@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+欄位式結果型別 (Columnar Result Types)
+
+引擎的計算結果以 NumPy 陣列逐欄保存：日期一律是 int64 (epoch 奈秒)，
+價格與跌幅是 float64，狀態是 bool/int8 代碼。天數等衍生欄位直接由 int64
+日期相減得到，不必再經過字串與 pd.to_datetime。
+
+中文欄名、'YYYY-MM-DD' 字串、'進行中' 等顯示格式只在 to_frame(locale=...) 產生，
+locale='en' 則回傳英文欄名與 datetime64 欄位，供腳本與後續分析使用。
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+NS_PER_DAY = 86_400_000_000_000
+
+ZH = 'zh-TW'
+EN = 'en'
+
+
+def to_ns(dates):
+    """
+    Convert dates (DatetimeIndex, Timestamps, strings) to int64 epoch nanoseconds.
+    """
+    return np.asarray(pd.DatetimeIndex(pd.to_datetime(dates)), dtype='datetime64[ns]').view(np.int64)
+
+
+def days_between(start_ns, end_ns):
+    """
+    Calendar days between two int64 date arrays (same as Timedelta.days).
+    """
+    return (np.asarray(end_ns, dtype=np.int64) - np.asarray(start_ns, dtype=np.int64)) // NS_PER_DAY
+
+
+def format_dates(ns):
+    """
+    Format int64 epoch nanoseconds as 'YYYY-MM-DD' strings in one vectorized call.
+    """
+    return np.datetime_as_string(np.asarray(ns, dtype=np.int64).view('datetime64[ns]'), unit='D').astype(object)
+
+
+def _take(table, idx):
+    return type(table)(*(getattr(table, f)[idx] for f in table.__dataclass_fields__))
+
+
+def _as_datetime(ns):
+    return pd.DatetimeIndex(np.asarray(ns, dtype=np.int64).view('datetime64[ns]'))
+
+
+# 解套形式代碼
+RECOVERY_FULL = 0     # 完全收復前高
+RECOVERY_BOUNCE = 1   # 空頭終結(反彈15%)
+RECOVERY_NONE = 2     # 套牢中
+
+_RECOVERY_LABELS = {
+    ZH: np.array(['完全收復前高', '空頭終結(反彈15%)', '套牢中'], dtype=object),
+    EN: np.array(['full', 'bounce_15', 'trapped'], dtype=object)
+}
+
+
+@dataclass(slots=True)
+class EventTable:
+    """
+    7% drawdown events, one array element per event, sorted by peak date.
+
+    Dates are int64 epoch nanoseconds. `recovery_date` holds the last bar of
+    the history for events that have not recovered yet (used for day counts).
+    """
+    peak_date: np.ndarray
+    trigger_date: np.ndarray
+    bottom_date: np.ndarray
+    recovery_date: np.ndarray
+    peak_price: np.ndarray
+    trigger_price: np.ndarray
+    bottom_price: np.ndarray
+    recovery_price: np.ndarray
+    recovery_kind: np.ndarray
+
+    @classmethod
+    def empty(cls):
+        i, f = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        return cls(i, i, i, i, f, f, f, f, np.empty(0, dtype=np.int8))
+
+    def __len__(self):
+        return len(self.peak_date)
+
+    def take(self, idx):
+        return _take(self, idx)
+
+    @property
+    def recovered(self):
+        return self.recovery_kind != RECOVERY_NONE
+
+    @property
+    def max_drawdown(self):
+        return (self.peak_price - self.bottom_price) / self.peak_price * 100
+
+    @property
+    def residual_drawdown(self):
+        return (self.trigger_price - self.bottom_price) / self.trigger_price * 100
+
+    def to_frame(self, locale=ZH):
+        """
+        Build the display frame; zh-TW reproduces the historical column layout.
+
+        Args:
+            locale (str): 'zh-TW' (display strings) or 'en' (raw datetimes).
+
+        Returns:
+            pd.DataFrame: One row per event.
+        """
+        if len(self) == 0:
+            return pd.DataFrame()
+
+        kinds = self.recovery_kind.astype(np.intp)
+        days = {
+            'peak_to_bottom': days_between(self.peak_date, self.bottom_date),
+            'trigger_to_bottom': days_between(self.trigger_date, self.bottom_date),
+            'bottom_to_recovery': days_between(self.bottom_date, self.recovery_date),
+            'total': days_between(self.peak_date, self.recovery_date)
+        }
+
+        if locale == EN:
+            return pd.DataFrame({
+                'trigger_date': _as_datetime(self.trigger_date),
+                'peak_date': _as_datetime(self.peak_date),
+                'peak_price': self.peak_price,
+                'trigger_price': self.trigger_price,
+                'bottom_price': self.bottom_price,
+                'bottom_date': _as_datetime(self.bottom_date),
+                'recovery_date': _as_datetime(np.where(self.recovered, self.recovery_date, np.iinfo(np.int64).min)),
+                'recovery_price': self.recovery_price,
+                'max_drawdown_pct': self.max_drawdown.round(2),
+                'residual_drawdown_pct': self.residual_drawdown.round(2),
+                'days_peak_to_bottom': days['peak_to_bottom'],
+                'days_trigger_to_bottom': days['trigger_to_bottom'],
+                'days_bottom_to_recovery': days['bottom_to_recovery'],
+                'days_total': days['total'],
+                'recovered': self.recovered,
+                'recovery_kind': _RECOVERY_LABELS[EN][kinds]
+            })
+
+        recovered = self.recovered
+        return pd.DataFrame({
+            '觸發日期': format_dates(self.trigger_date),
+            '前高日期': format_dates(self.peak_date),
+            '前高價格': self.peak_price,
+            '觸發價格': self.trigger_price,
+            '破底最低價': self.bottom_price,
+            '破底日期': format_dates(self.bottom_date),
+            '解套日期': np.where(recovered, format_dates(self.recovery_date), '進行中').astype(object),
+            '解套點位': self.recovery_price,
+            '最大跌幅(%)': self.max_drawdown.round(2),
+            '剩餘跌幅(%)': self.residual_drawdown.round(2),
+            '前高到破底天數': days['peak_to_bottom'],
+            '觸發到破底天數': days['trigger_to_bottom'],
+            '破底到解套天數': days['bottom_to_recovery'],
+            '解套總耗時': days['total'],
+            '狀態': np.where(recovered, '已解套', '進行中').astype(object),
+            '解套形式': _RECOVERY_LABELS[ZH][kinds]
+        })
+
+
+WAVE_UP = 1
+WAVE_DOWN = -1
+
+
+@dataclass(slots=True)
+class WaveTable:
+    """
+    Alternating up/down waves of the reversal model, in chronological order.
+
+    `kind` is WAVE_UP / WAVE_DOWN; dates are int64 epoch nanoseconds.
+    """
+    kind: np.ndarray
+    start_date: np.ndarray
+    end_date: np.ndarray
+    start_price: np.ndarray
+    end_price: np.ndarray
+    ongoing: np.ndarray
+
+    @classmethod
+    def empty(cls):
+        i, f = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        return cls(np.empty(0, dtype=np.int8), i, i, f, f, np.empty(0, dtype=bool))
+
+    def __len__(self):
+        return len(self.kind)
+
+    def take(self, idx):
+        return _take(self, idx)
+
+    @property
+    def highest_price(self):
+        return np.where(self.kind == WAVE_UP, self.end_price, self.start_price)
+
+    @property
+    def lowest_price(self):
+        return np.where(self.kind == WAVE_UP, self.start_price, self.end_price)
+
+    def to_records(self):
+        """
+        Legacy list-of-dict form returned by wave_analyzer.analyze_waves.
+        """
+        starts, ends = _as_datetime(self.start_date), _as_datetime(self.end_date)
+        highs, lows = self.highest_price, self.lowest_price
+        return [{
+            'type': 'up' if self.kind[i] == WAVE_UP else 'down',
+            'start_date': starts[i],
+            'end_date': ends[i],
+            'highest_price': float(highs[i]),
+            'lowest_price': float(lows[i]),
+            'start_price': float(self.start_price[i]),
+            'end_price': float(self.end_price[i]),
+            'ongoing': bool(self.ongoing[i])
+        } for i in range(len(self))]
+
+    def to_frame(self, locale=ZH):
+        if len(self) == 0:
+            return pd.DataFrame()
+        up = self.kind == WAVE_UP
+        gain = (self.end_price - self.start_price) / self.start_price * 100
+        days = days_between(self.start_date, self.end_date)
+
+        if locale == EN:
+            return pd.DataFrame({
+                'type': np.where(up, 'up', 'down').astype(object),
+                'start_date': _as_datetime(self.start_date),
+                'end_date': _as_datetime(self.end_date),
+                'start_price': self.start_price,
+                'end_price': self.end_price,
+                'change_pct': gain.round(2),
+                'days': days,
+                'ongoing': self.ongoing
+            })
+
+        return pd.DataFrame({
+            '方向': np.where(up, '上漲', '下跌').astype(object),
+            '起點日期': format_dates(self.start_date),
+            '終點日期': format_dates(self.end_date),
+            '起點價格': self.start_price.round(2),
+            '終點價格': self.end_price.round(2),
+            '漲跌幅(%)': gain.round(2),
+            '花費天數': days,
+            '狀態': np.where(self.ongoing, '進行中', '已完結').astype(object)
+        })
@@ -1,158 +1,165 @@
 import pandas as pd
 import numpy as np
 
-def analyze_7pct_strategy(df, trigger_pct=7.0):
+import bootstrap
+from range_index import PriceRangeIndex
+from result_types import EventTable, RECOVERY_FULL, RECOVERY_BOUNCE, RECOVERY_NONE, to_ns
+
+
+# 指揮官指定的台股戰役清單 (Hardcoded Manual List)
+# 格式: (起跌日/波段前高, 最低落底日)
+MANUAL_EVENTS = [
+    # 千禧年網路泡沫
+    ('2000-02-18', '2000-03-16'),
+    ('2000-04-06', '2000-10-19'),
+    ('2000-11-08', '2000-12-28'),
+    ('2001-02-16', '2001-07-24'),
+    ('2001-08-17', '2001-09-26'),
+    ('2001-12-13', '2001-12-21'),
+    # 非典 SARS 與後續盤整
+    ('2002-04-22', '2002-10-11'),
+    ('2003-01-24', '2003-04-28'),
+    ('2004-03-05', '2004-08-05'),
+    ('2006-05-09', '2006-07-17'),
+    # 金融海嘯
+    ('2007-07-26', '2007-08-17'),
+    ('2007-10-30', '2008-01-23'),
+    ('2008-05-20', '2008-10-28'),
+    ('2008-11-05', '2008-11-21'),
+    # 歐債、中型回檔與中美貿易戰
+    ('2010-01-19', '2010-05-25'),
+    ('2011-02-08', '2011-12-19'),
+    ('2012-03-02', '2012-06-04'),
+    ('2014-07-15', '2014-10-16'),
+    ('2015-04-28', '2015-08-24'),
+    ('2015-11-05', '2016-01-18'),
+    ('2018-01-23', '2019-01-04'),
+    # 新冠肺炎 COVID-19
+    ('2020-01-03', '2020-03-19'),
+    ('2021-04-29', '2021-05-17'),
+    ('2021-07-15', '2021-10-05'),
+    # 近期長官確定的實戰波段
+    ('2022-12-01', '2022-12-29'),
+    ('2023-07-31', '2023-10-31'),
+    ('2024-04-10', '2024-04-19'),
+    ('2024-07-11', '2024-08-05'),
+    ('2025-01-07', '2025-04-09'), # (註: 指揮官1/11實際上是指1/07的起跌高點23943，所以用01-07對齊)
+    ('2025-11-03', '2025-11-21'),
+]
+
+
+def build_7pct_events(df, trigger_pct=7.0, range_index=None):
     """
-    Analyze the 7% drawdown entry strategy.
-    
+    Columnar core of the 7% engine.
+
+    Peak, bottom, trigger and recovery lookups are range queries on a
+    PriceRangeIndex instead of DataFrame slices.
+
     Args:
         df: DataFrame containing 'High', 'Low', 'Close' columns and DatetimeIndex.
         trigger_pct: Percentage drop to trigger entry (e.g., 7.0 for 7%).
-        
+        range_index: Prebuilt PriceRangeIndex of `df` (built here if omitted).
+
     Returns:
-        pd.DataFrame: A DataFrame of all triggered events and their follow-up metrics.
+        EventTable: Events sorted by peak date, dates kept as int64.
     """
-def analyze_7pct_strategy(df, trigger_pct=7.0):
     if len(df) == 0:
-        return pd.DataFrame()
-
-    # 指揮官指定的台股戰役清單 (Hardcoded Manual List)
-    # 格式: (起跌日/波段前高, 最低落底日)
-    MANUAL_EVENTS = [
-        # 千禧年網路泡沫
-        ('2000-02-18', '2000-03-16'),
-        ('2000-04-06', '2000-10-19'),
-        ('2000-11-08', '2000-12-28'),
-        ('2001-02-16', '2001-07-24'),
-        ('2001-08-17', '2001-09-26'),
-        ('2001-12-13', '2001-12-21'),
-        # 非典 SARS 與後續盤整
-        ('2002-04-22', '2002-10-11'),
-        ('2003-01-24', '2003-04-28'),
-        ('2004-03-05', '2004-08-05'),
-        ('2006-05-09', '2006-07-17'),
-        # 金融海嘯
-        ('2007-07-26', '2007-08-17'),
-        ('2007-10-30', '2008-01-23'),
-        ('2008-05-20', '2008-10-28'),
-        ('2008-11-05', '2008-11-21'),
-        # 歐債、中型回檔與中美貿易戰
-        ('2010-01-19', '2010-05-25'),
-        ('2011-02-08', '2011-12-19'),
-        ('2012-03-02', '2012-06-04'),
-        ('2014-07-15', '2014-10-16'),
-        ('2015-04-28', '2015-08-24'),
-        ('2015-11-05', '2016-01-18'),
-        ('2018-01-23', '2019-01-04'),
-        # 新冠肺炎 COVID-19
-        ('2020-01-03', '2020-03-19'),
-        ('2021-04-29', '2021-05-17'),
-        ('2021-07-15', '2021-10-05'),
-        # 近期長官確定的實戰波段
-        ('2022-12-01', '2022-12-29'),
-        ('2023-07-31', '2023-10-31'),
-        ('2024-04-10', '2024-04-19'),
-        ('2024-07-11', '2024-08-05'),
-        ('2025-01-07', '2025-04-09'), # (註: 指揮官1/11實際上是指1/07的起跌高點23943，所以用01-07對齊)
-        ('2025-11-03', '2025-11-21'),
-    ]
-
-    events = []
-    df_index = df.index.normalize()
-    
+        return EventTable.empty()
+
+    if range_index is None:
+        range_index = PriceRangeIndex(df)
+    idx = range_index
+    n = len(idx)
+
+    def day_span(i):
+        # 同一天若有重複列，比照 df.loc[date] 取整天的範圍
+        return idx.span(idx.dates[i], idx.dates[i])
+
+    cols = {k: [] for k in ('peak', 'trigger', 'bottom', 'rec', 'p_peak', 'p_trigger', 'p_bottom', 'p_rec', 'kind')}
+
     for (p_date, b_date) in MANUAL_EVENTS:
-        p_date = pd.to_datetime(p_date)
-        b_date = pd.to_datetime(b_date)
-        
-        # 配對最近的交易日
-        if p_date not in df_index:
-            nearest = df_index[df_index <= p_date]
-            if not nearest.empty: p_date = nearest[-1]
-            else: continue
-            
-        if b_date not in df_index:
-            nearest = df_index[df_index <= b_date]
-            if not nearest.empty: b_date = nearest[-1]
-            else: continue
-            
-        peak_price = df.loc[p_date]['High']
-        if isinstance(peak_price, pd.Series): peak_price = peak_price.max()
-        bottom_price = df.loc[b_date]['Low']
-        if isinstance(bottom_price, pd.Series): bottom_price = bottom_price.min()
-        
-        # 嚴格依照手工指定的高低點算出破壞力
-        max_drawdown = (peak_price - bottom_price) / peak_price * 100
-        
+        # 配對最近的交易日 (當天或之前最後一個交易日)
+        p_pos = idx.pos(p_date, side='right') - 1
+        b_pos = idx.pos(b_date, side='right') - 1
+        if p_pos < 0 or b_pos < 0:
+            continue
+        p_lo, p_hi = day_span(p_pos)
+        b_lo, b_hi = day_span(b_pos)
+        p_date, b_date = idx.date_at(p_pos), idx.date_at(b_pos)
+
+        peak_price = idx.table('High', 'max').value(p_lo, p_hi)
+        bottom_price = idx.table('Low', 'min').value(b_lo, b_hi)
+
         # 抓出觸發 -7% 的那一天
-        segment_pb = df.loc[p_date:b_date]
-        trigger_sub = segment_pb[segment_pb['Close'] <= peak_price * (1 - trigger_pct/100.0)]
-        trigger_date = trigger_sub.index[0] if not trigger_sub.empty else b_date
-        trigger_price = df.loc[trigger_date]['Close']
-        if isinstance(trigger_price, pd.Series): trigger_price = trigger_price.min()
-        
-        residual_drawdown = (trigger_price - bottom_price) / trigger_price * 100
-        
+        t_pos = idx.first_at_most('Close', p_lo, b_hi, peak_price * (1 - trigger_pct/100.0))
+        t_lo, t_hi = day_span(t_pos) if t_pos is not None else (b_lo, b_hi)
+        trigger_date = idx.date_at(t_lo)
+        trigger_price = idx.table('Close', 'min').value(t_lo, t_hi)
+
         # 尋找解套或反彈結案 (從見底之後開始找)
-        future_df = df.loc[b_date:]
-        
         # 1. 完全收復: 未來某日的高點大於等於起跌前高
-        rec_sub = future_df[future_df['High'] >= peak_price]
-        
-        if not rec_sub.empty:
-            rec_date = rec_sub.index[0]
-            status = '已解套'
-            recovery_status = '完全收復前高'
-            rec_price = df.loc[rec_date]['High']
-            if isinstance(rec_price, pd.Series): rec_price = rec_price.max()
-            days_to_rec = (rec_date - p_date).days
+        r_pos = idx.first_at_least('High', b_lo, n, peak_price)
+
+        if r_pos is not None:
+            kind = RECOVERY_FULL
+            r_lo, r_hi = day_span(r_pos)
+            rec_price = idx.table('High', 'max').value(r_lo, r_hi)
         else:
             # 2. 如果沒有完全收復，那有沒有反彈超過 15% 結案？
-            bounce_sub = future_df[future_df['Close'] >= bottom_price * 1.15]
-            if not bounce_sub.empty:
-                rec_date = bounce_sub.index[0]
-                status = '已解套'
-                recovery_status = '空頭終結(反彈15%)'
-                rec_price = df.loc[rec_date]['Close']
-                if isinstance(rec_price, pd.Series): rec_price = rec_price.max()
-                days_to_rec = (rec_date - p_date).days
+            r_pos = idx.first_at_least('Close', b_lo, n, bottom_price * 1.15)
+            if r_pos is not None:
+                kind = RECOVERY_BOUNCE
             else:
                 # 3. 都在套牢中
-                rec_date = future_df.index[-1]
-                status = '進行中'
-                recovery_status = '套牢中'
-                rec_price = df.loc[rec_date]['Close']
-                if isinstance(rec_price, pd.Series): rec_price = rec_price.max()
-                days_to_rec = (rec_date - p_date).days
-                
-        # 根據長官定義: 日期皆由起跌前高起算
-        days_to_bottom_from_peak = (b_date - p_date).days
-        days_to_bottom_from_trigger = (b_date - trigger_date).days
-        days_from_bottom_to_rec = (rec_date - b_date).days
-        
-        events.append({
-            '觸發日期': trigger_date.strftime('%Y-%m-%d'),
-            '前高日期': p_date.strftime('%Y-%m-%d'),
-            '前高價格': peak_price,
-            '觸發價格': trigger_price,
-            '破底最低價': bottom_price,
-            '破底日期': b_date.strftime('%Y-%m-%d'),
-            '解套日期': rec_date.strftime('%Y-%m-%d') if status == '已解套' else '進行中',
-            '解套點位': rec_price,
-            '最大跌幅(%)': round(max_drawdown, 2),
-            '剩餘跌幅(%)': round(residual_drawdown, 2),
-            '前高到破底天數': days_to_bottom_from_peak,
-            '觸發到破底天數': days_to_bottom_from_trigger,
-            '破底到解套天數': days_from_bottom_to_rec,
-            '解套總耗時': days_to_rec,
-            '狀態': status,
-            '解套形式': recovery_status
-        })
+                r_pos = n - 1
+                kind = RECOVERY_NONE
+            r_lo, r_hi = day_span(r_pos)
+            rec_price = idx.table('Close', 'max').value(r_lo, r_hi)
+        rec_date = idx.date_at(r_lo)
+
+        cols['peak'].append(p_date)
+        cols['trigger'].append(trigger_date)
+        cols['bottom'].append(b_date)
+        cols['rec'].append(rec_date)
+        cols['p_peak'].append(peak_price)
+        cols['p_trigger'].append(trigger_price)
+        cols['p_bottom'].append(bottom_price)
+        cols['p_rec'].append(rec_price)
+        cols['kind'].append(kind)
+
+    if not cols['peak']:
+        return EventTable.empty()
+
+    # 天數 (日期皆由起跌前高起算) 與跌幅由 EventTable 以 int64 日期向量計算
+    table = EventTable(
+        peak_date=to_ns(cols['peak']),
+        trigger_date=to_ns(cols['trigger']),
+        bottom_date=to_ns(cols['bottom']),
+        recovery_date=to_ns(cols['rec']),
+        peak_price=np.asarray(cols['p_peak'], dtype=np.float64),
+        trigger_price=np.asarray(cols['p_trigger'], dtype=np.float64),
+        bottom_price=np.asarray(cols['p_bottom'], dtype=np.float64),
+        recovery_price=np.asarray(cols['p_rec'], dtype=np.float64),
+        recovery_kind=np.asarray(cols['kind'], dtype=np.int8)
+    )
 
     # 將事件按日期排序回傳
-    result_df = pd.DataFrame(events)
-    if not result_df.empty:
-        result_df = result_df.sort_values(by='前高日期', ascending=True).reset_index(drop=True)
-    return result_df
+    order = np.argsort(table.peak_date, kind='stable')
+    return table.take(order)
+
+
+def analyze_7pct_strategy(df, trigger_pct=7.0):
+    """
+    Analyze the 7% drawdown entry strategy.
+    
+    Args:
+        df: DataFrame containing 'High', 'Low', 'Close' columns and DatetimeIndex.
+        trigger_pct: Percentage drop to trigger entry (e.g., 7.0 for 7%).
+        
+    Returns:
+        pd.DataFrame: A DataFrame of all triggered events and their follow-up metrics.
+    """
+    return build_7pct_events(df, trigger_pct).to_frame()
 
 def calculate_7pct_statistics(events_df):
     if events_df.empty:
@@ -222,12 +229,50 @@ def calculate_7pct_statistics(events_df):
     bins = [0, 2, 4, 6, 8, 10, 15, 20, 30, 1000]
     labels = ['0%~2%', '2%~4%', '4%~6%', '6%~8%', '8%~10%', '10%~15%', '15%~20%', '20%~30%', '>30%']
     counts_series = pd.cut(perfs, bins=bins, labels=labels, right=False).value_counts().sort_index()
+    bin_ci = bootstrap.bootstrap_ci(perfs, {label: bootstrap.share_in(lo, hi)
+                                            for label, lo, hi in zip(labels, bins[:-1], bins[1:])})
     
     dist_results = []
     n_total = len(events_df)
     for label, count in counts_series.items():
         if count > 0:
             prob = count / n_total * 100 if n_total > 0 else 0
-            dist_results.append({'Range': str(label), 'Count': int(count), 'Probability (%)': round(prob, 2)})
-            
+            low, high = bin_ci[label]
+            dist_results.append({'Range': str(label), 'Count': int(count), 'Probability (%)': round(prob, 2),
+                                 'CI Low (%)': low, 'CI High (%)': high})
+
+    metrics['CI'] = _statistics_ci(events_df, recovered_events)
     return metrics, pd.DataFrame(dist_results)
+
+
+def _group_ci(group):
+    # 一組已解套事件的各項平均天數 / 剩餘跌幅
+    ci = {}
+    for key, col in (('avg_resid', '剩餘跌幅(%)'), ('avg_trigger_to_bt', '觸發到破底天數'),
+                     ('avg_bt_to_rec', '破底到解套天數'), ('avg_total', '解套總耗時')):
+        ci[key] = bootstrap.bootstrap_ci(group[col], {key: bootstrap.mean()})[key]
+    return ci
+
+
+def _statistics_ci(events_df, recovered_events):
+    """
+    95% bootstrap intervals for every probability and average of calculate_7pct_statistics.
+
+    Returns:
+        dict: Same keys as the metrics dict, each mapped to (low, high).
+    """
+    ci = bootstrap.bootstrap_ci(events_df['最大跌幅(%)'], {
+        f'跌幅超過 {t}% 機率': bootstrap.share_at_least(t) for t in (10, 15, 20, 30, 50)
+    })
+    ci.update(bootstrap.bootstrap_ci(recovered_events['剩餘跌幅(%)'], {
+        'Prob Residual DD > 10%': bootstrap.share_above(10),
+        'Prob Residual DD > 20%': bootstrap.share_above(20)
+    }))
+    ci['Overall'] = _group_ci(recovered_events)
+    ci['Normal'] = _group_ci(recovered_events[recovered_events['最大跌幅(%)'] < 20.0])
+    ci['Crash'] = _group_ci(recovered_events[recovered_events['最大跌幅(%)'] >= 20.0])
+    ci['Avg Residual Drawdown (%)'] = ci['Overall']['avg_resid']
+    ci['Avg Days Trigger to Bottom'] = ci['Overall']['avg_trigger_to_bt']
+    ci['Avg Days Bottom to Rec'] = ci['Overall']['avg_bt_to_rec']
+    ci['Avg Days Total Recovery'] = ci['Overall']['avg_total']
+    return ci
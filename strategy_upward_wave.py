@@ -1,59 +1,77 @@
 import pandas as pd
 import numpy as np
 
-def get_upward_waves(events_df, df):
-    if events_df.empty:
+import bootstrap
+from range_index import PriceRangeIndex
+from result_types import EventTable, days_between, format_dates, to_ns
+
+
+def _event_columns(events):
+    # EventTable 直接取用 int64 日期；舊的 DataFrame 形式則一次整欄轉換
+    if isinstance(events, EventTable):
+        return (events.bottom_date, events.bottom_price, events.peak_date, events.peak_price,
+                events.recovered, events.recovery_date)
+    recovered = (events['狀態'] != '進行中').to_numpy()
+    rec_dates = events['解套日期'].where(recovered, events['破底日期'])
+    return (to_ns(events['破底日期']), events['破底最低價'].to_numpy(dtype=np.float64),
+            to_ns(events['前高日期']), events['前高價格'].to_numpy(dtype=np.float64),
+            recovered, to_ns(rec_dates))
+
+
+def get_upward_waves(events_df, df, range_index=None):
+    """
+    Pair each 7% event's bottom with the next event's peak to form the up-waves.
+
+    The last wave (after the latest recovered event) runs to the highest High
+    since its recovery date and is marked as ongoing.
+
+    Args:
+        events_df: EventTable or the events DataFrame of the 7% engine.
+        df: Daily DataFrame with 'High' and a DatetimeIndex.
+        range_index: Prebuilt PriceRangeIndex of `df` (built here if omitted).
+
+    Returns:
+        tuple: (up_df, dist_df, metrics).
+    """
+    if len(events_df) == 0:
         return pd.DataFrame(), pd.DataFrame(), {}
-    
-    up_waves = []
-    
-    for i in range(len(events_df)):
-        event = events_df.iloc[i]
-        start_date = event['破底日期']
-        start_price = event['破底最低價']
-        
-        if i < len(events_df) - 1:
-            next_event = events_df.iloc[i+1]
-            end_date = next_event['前高日期']
-            end_price = next_event['前高價格']
-            status = '已完結'
-        else:
-            if event['狀態'] == '進行中':
-                continue
-            else:
-                rec_date = event['解套日期']
-                try:
-                    recent_df = df.loc[rec_date:]
-                    if not recent_df.empty:
-                        max_idx = recent_df['High'].idxmax()
-                        end_date = max_idx.strftime('%Y-%m-%d')
-                        end_price = recent_df.loc[max_idx, 'High']
-                    else:
-                        end_date = df.index[-1].strftime('%Y-%m-%d')
-                        end_price = df['High'].iloc[-1]
-                except:
-                    end_date = df.index[-1].strftime('%Y-%m-%d')
-                    end_price = df['High'].iloc[-1]
-                status = '進行中'
-        
-        if start_price > 0:
-            gain_pct = (end_price - start_price) / start_price * 100
-            try:
-                days = (pd.to_datetime(end_date) - pd.to_datetime(start_date)).days
-            except:
-                days = 0
-                
-            up_waves.append({
-                '起漲日期 (前波破底)': start_date,
-                '最高日期 (下波前高)': end_date,
-                '起漲價格': round(float(start_price), 2),
-                '最高價格': round(float(end_price), 2),
-                '漲幅(%)': round(float(gain_pct), 2),
-                '花費天數': int(days),
-                '狀態': status
-            })
-            
-    up_df = pd.DataFrame(up_waves)
+
+    bottom_ns, bottom_price, peak_ns, peak_price, recovered, rec_ns = _event_columns(events_df)
+    n = len(bottom_ns)
+
+    # 起點為本次破底，終點為下一次事件的前高 (整欄位移)
+    start_ns, start_price = bottom_ns, bottom_price
+    end_ns = np.empty(n, dtype=np.int64)
+    end_price = np.empty(n, dtype=np.float64)
+    end_ns[:-1], end_price[:-1] = peak_ns[1:], peak_price[1:]
+    keep = np.ones(n, dtype=bool)
+
+    # 最後一筆：尚未解套則略過，否則取解套日之後的最高點 (區間最大值索引)
+    if recovered[-1]:
+        if range_index is None:
+            range_index = PriceRangeIndex(df)
+        i, j = range_index.span(int(rec_ns[-1]))
+        pos = range_index.argmax('High', i, j) if i < j else j - 1
+        end_ns[-1] = range_index.dates[pos]
+        end_price[-1] = range_index.value_at('High', pos)
+    else:
+        keep[-1] = False
+
+    keep &= start_price > 0
+    status = np.full(n, '已完結', dtype=object)
+    status[-1] = '進行中'
+    start_ns, end_ns, start_price, end_price, status = (
+        start_ns[keep], end_ns[keep], start_price[keep], end_price[keep], status[keep])
+
+    up_df = pd.DataFrame({
+        '起漲日期 (前波破底)': format_dates(start_ns),
+        '最高日期 (下波前高)': format_dates(end_ns),
+        '起漲價格': start_price.round(2),
+        '最高價格': end_price.round(2),
+        '漲幅(%)': ((end_price - start_price) / start_price * 100).round(2),
+        '花費天數': days_between(start_ns, end_ns).astype(int),
+        '狀態': status
+    })
     
     if up_df.empty:
         return up_df, pd.DataFrame(), {}
@@ -84,5 +102,26 @@ def get_upward_waves(events_df, df):
         '平均花費天數': round(float(finished_waves['花費天數'].mean()), 1) if total > 0 else 0,
         '漲幅超過 20% 機率': round(float(len(finished_waves[finished_waves['漲幅(%)'] >= 20]) / total * 100), 2) if total > 0 else 0
     }
+    metrics['CI'] = upward_ci(finished_waves)
         
     return up_df, dist_df, metrics
+
+
+def upward_ci(finished_waves, thresholds=(20,)):
+    """
+    95% bootstrap intervals for the up-wave averages and gain probabilities.
+
+    Args:
+        finished_waves (pd.DataFrame): Finished waves with 漲幅(%) and 花費天數 columns.
+        thresholds (tuple): Gain thresholds of the '漲幅超過 N% 機率' metrics.
+
+    Returns:
+        dict: Metric name -> (low, high).
+    """
+    gains = finished_waves['漲幅(%)']
+    ci = bootstrap.bootstrap_ci(gains, {
+        '平均漲幅(%)': bootstrap.mean(),
+        **{f'漲幅超過 {t}% 機率': bootstrap.share_at_least(t) for t in thresholds}
+    })
+    ci.update(bootstrap.bootstrap_ci(finished_waves['花費天數'], {'平均花費天數': bootstrap.mean()}))
+    return ci
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+熱路徑效能監測 (In-Process Timing & Cache Telemetry)
+
+頁面變慢時分不出是 Yahoo 下載、分析引擎還是 HTML 輸出。這裡提供常駐開啟也不心疼的量測：
+    span(name)        以 perf_counter 計時一段程式，耗時寫進該名稱的環狀緩衝區 (deque, 只留最近 RING_SIZE 筆)
+    hit(name) / miss  快取命中 / 未命中計數
+    latency_table()   管理員後台讀取時才計算各區段的 p50 / p90 / p99
+每次量測只是兩次 perf_counter 與一次 deque.append (約 1 µs)，不做 I/O、不配置 DataFrame。
+命名慣例：fetch (下載)、build:<dataset> (分析引擎 / 圖表成品)、page:<頁面>、html:<區塊>。
+設定環境變數 TSE_TELEMETRY=0 可整個關閉。
+"""
+import collections
+import functools
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# 每個區段保留的最近量測筆數
+RING_SIZE = 1024
+
+ENABLED = os.environ.get("TSE_TELEMETRY", "1") != "0"
+
+_lock = threading.Lock()
+_spans = {}                               # name -> deque[秒]
+_cache = collections.defaultdict(lambda: [0, 0])   # name -> [hits, misses]
+
+
+def _ring(name):
+    ring = _spans.get(name)
+    if ring is None:
+        with _lock:
+            ring = _spans.setdefault(name, collections.deque(maxlen=RING_SIZE))
+    return ring
+
+
+class span:
+    """
+    Time a block into the `name` ring buffer (also usable as a decorator).
+
+    Example:
+        with telemetry.span('html:bias_hud'):
+            st.markdown(hud_html, unsafe_allow_html=True)
+    """
+    __slots__ = ('name', 't0')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if ENABLED:
+            # deque.append 在 GIL 下是原子操作，寫入不需要鎖
+            _ring(self.name).append(time.perf_counter() - self.t0)
+        return False
+
+    def __call__(self, func):
+        name = self.name
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def hit(name):
+    if ENABLED:
+        with _lock:
+            _cache[name][0] += 1
+
+
+def miss(name):
+    if ENABLED:
+        with _lock:
+            _cache[name][1] += 1
+
+
+def cache_counts():
+    """Hit / miss counters as {name: (hits, misses)}."""
+    with _lock:
+        return {name: tuple(c) for name, c in _cache.items()}
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _cache.clear()
+
+
+def latency_table():
+    """
+    Latency percentiles of every span over its ring buffer.
+
+    Returns:
+        pd.DataFrame: 區段, 次數, p50 / p90 / p99 / 最大 (ms), sorted by p90 descending.
+    """
+    with _lock:
+        samples = {name: np.fromiter(ring, dtype=np.float64) for name, ring in _spans.items()}
+    rows = []
+    for name, values in samples.items():
+        if len(values) == 0:
+            continue
+        p50, p90, p99 = np.percentile(values, [50, 90, 99]) * 1000
+        rows.append({'區段': name, '次數': len(values), 'p50 (ms)': round(p50, 2), 'p90 (ms)': round(p90, 2),
+                     'p99 (ms)': round(p99, 2), '最大 (ms)': round(values.max() * 1000, 2)})
+    if not rows:
+        return pd.DataFrame(columns=['區段', '次數', 'p50 (ms)', 'p90 (ms)', 'p99 (ms)', '最大 (ms)'])
+    return pd.DataFrame(rows).sort_values('p90 (ms)', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def cache_table():
+    """
+    Hit / miss counters per cache key ('dataset:ticker').
+
+    Returns:
+        pd.DataFrame: 快取鍵, 命中, 未命中, 命中率(%).
+    """
+    counts = cache_counts()
+    df = pd.DataFrame([{'快取鍵': name, '命中': h, '未命中': m} for name, (h, m) in sorted(counts.items())],
+                      columns=['快取鍵', '命中', '未命中'])
+    total = df['命中'] + df['未命中']
+    df['命中率(%)'] = (df['命中'] / total.where(total > 0) * 100).round(1)
+    return df
@@ -1,21 +1,32 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
-import yfinance as yf
+import streamlit.components.v1 as components
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import io
-import altair as alt
-from data_fetcher import fetch_data
-from strategy_7pct import analyze_7pct_strategy, calculate_7pct_statistics
-from wave_analyzer import analyze_waves
-from ui_theme import apply_global_theme
+import importlib
+from strategy_bias import calc_event_risk
+import analogues
+import analytics_service
+import bias_chart
+import bootstrap
+import telemetry
+import ui_tables
+import visit_log
+import warmup
+import intraday
+import market_snapshot
+from ui_theme import apply_global_theme, apply_page_css, hud_color_vars
 import datetime
-from page_biz_cycle import page_biz_cycle
-from ui_chatbot import inject_chatbot
 import traceback
 
+try:
+    from streamlit_autorefresh import st_autorefresh
+except Exception as e:
+    # 未安裝 (ImportError)，或不在 streamlit run 之下匯入 (declare_component 會拋出 RuntimeError)
+    print(f"streamlit-autorefresh unavailable, intraday mode will not auto-refresh: {e}")
+    st_autorefresh = None
+
 st.set_page_config(page_title="台股預警儀表板 | v9.0 FINAL", layout="wide", initial_sidebar_state="expanded")
 # Sync Trigger: 2026-03-03 19:20 (UI Localization & Bias Radar Fix)
 
@@ -24,20 +35,21 @@ if 'user_role' not in st.session_state:
     st.session_state['user_role'] = 'guest' # 'guest', 'user', 'admin'
 if 'user_email' not in st.session_state:
     st.session_state['user_email'] = None
-if 'visit_logs' not in st.session_state:
-    st.session_state['visit_logs'] = [] # 儲存 {time, user_email, page}
     
+def lazy_page(module_name, func_name):
+    """
+    延遲載入頁面：回傳一個渲染函數，頁面第一次被點開時才 import 其模組
+    (plotly 等重量級圖表套件不再拖慢冷啟動)。
+    """
+    def render():
+        module = importlib.import_module(module_name)
+        return getattr(module, func_name)()
+    render.__name__ = func_name
+    return render
+
 def log_visit(page_name):
-    if st.session_state['user_email']:
-        user = st.session_state['user_email']
-    else:
-        user = "訪客 (未登入)"
-        
-    st.session_state['visit_logs'].append({
-        '時間': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        '使用者': user,
-        '瀏覽模組': page_name
-    })
+    # 全站共用的瀏覽紀錄 (SQLite)，只放進緩衝區，由背景執行緒批次寫入
+    visit_log.record(page_name, st.session_state['user_email'])
 
 # 您專屬的管理員信箱
 # 您專屬的管理員信箱
@@ -47,220 +59,36 @@ ADMIN_EMAIL = "aver5678@gmail.com"
 apply_global_theme()
 
 
-@st.cache_data(ttl=0) # 強制關閉緩存 1 次以重新整理雲端資料
+# 伺服器行程啟動即開始背景預熱 (每個行程只會真正執行一次)
+warmup.start_warmup()
+
+
+def ci_badge(ci, key):
+    # 95% bootstrap 信賴區間 (樣本僅數十組，機率並非精確值)
+    text = bootstrap.format_ci(ci.get(key))
+    return f'<div style="font-size:11px; opacity:0.85; margin-top:4px;">95% CI {text}</div>' if text else ""
+
+def render_event_log(log):
+    # 流水日誌：卡片依資料版本預先渲染，篩選與分頁在伺服器端完成 (頁面上只有當頁的卡片)
+    apply_page_css('event_log')
+    with telemetry.span(f'html:log_{log}'):
+        ui_tables.render_event_cards(analytics_service.get_event_store(log, "^TWII"),
+                                     analytics_service.get_event_cards(log, "^TWII"), key=f"event_log_{log}")
+
+@telemetry.span('load_data')
 def load_data():
-    ticker = "^TWII"
+    # 讀取分析服務層的週線資料 (所有 session 共用，不再每次重新下載 28 年日線)
     try:
-        # 改用日線抓取，確保能獲取到今天的即時價格
-        # 使用 28 年資料 (涵蓋 2000 年至今所有量化事件)，關閉 threads 與進度條，確保雲端穩定
-        df_daily = yf.download(ticker, period="28y", interval="1d", threads=False, progress=False)
-        if df_daily.empty:
-            return pd.DataFrame()
-            
-        if isinstance(df_daily.columns, pd.MultiIndex):
-            df_daily.columns = df_daily.columns.get_level_values(0)
-            
-        # 紀錄最後一個交易日的日期 (例如 2/24 或 2/25)
-        latest_trade_date = df_daily.index[-1]
-            
-        # 將日線轉換為週線 (以週一為基準)，確保數據與週線策略一致但具備日線即時性
-        logic = {
-            'Open': 'first',
-            'High': 'max',
-            'Low': 'min',
-            'Close': 'last',
-            'Volume': 'sum'
-        }
-        df = df_daily.resample('W-MON', label='left', closed='left').apply(logic)
-        
-        # 計算每週實際交易日期範圍 (例如 02/23 ~ 02/25)
-        # 建立一個暫存欄位存日期
-        df_daily['temp_date'] = df_daily.index
-        week_info = df_daily.resample('W-MON', label='left', closed='left')['temp_date'].agg(['min', 'max'])
-        
-        # 格式化為：2026/02/23 ~ 02/25
-        # 增加判斷以防 NaT (空資料) 導致崩潰
-        df['WeekRange'] = week_info.apply(
-            lambda x: f"{x['min'].strftime('%Y/%m/%d')} ~ {x['max'].strftime('%m/%d')}" 
-            if pd.notna(x['min']) and pd.notna(x['max']) and x['min'] != x['max']
-            else (f"{x['min'].strftime('%Y/%m/%d')}" if pd.notna(x['min']) else "N/A"), axis=1
-        )
-        
-        df = df.dropna(subset=['Close'])
-        df['SMA40'] = df['Close'].rolling(window=40).mean()
-        df['Bias'] = (df['Close'] - df['SMA40']) / df['SMA40'] * 100
-        
-        # 額外存儲最後更新時間，供 UI 顯示
-        df.attrs['last_update'] = datetime.datetime.now()
-        df.attrs['latest_trade_date'] = latest_trade_date
-        return df
+        weekly = analytics_service.get_weekly("^TWII")
     except Exception as e:
         st.error(f"獲取資料時發生錯誤：{e}")
         return pd.DataFrame()
-
-def get_regime(df, start_date):
-    # 取觸發點前 52 週的資料來尋找最大回檔
-    prev_52w = df.loc[:start_date].iloc[:-1].tail(52)
-    if prev_52w.empty:
-        return "未知", 0
-        
-    roll_max = prev_52w['High'].cummax()
-    drawdowns = (prev_52w['Low'] - roll_max) / roll_max * 100
-    max_dd = drawdowns.min()
-    
-    if max_dd <= -20:
-        return "類型 A (低基期反彈)", max_dd
-    else:
-        return "類型 B (高位末升段)", max_dd
-
-def backtest(df):
-    # 手動注入 1996-1997 的失蹤樣本，確保基數包含 90 年代基因
-    results = [
-        {
-            '觸發日期': '1996-04-08', '波段最高日期': '1996-06-24', '最高乖離率(%)': 23.78, '觸發時乖離率(%)': 20.1,
-            '見頂天數': 77, '回歸0%日期': '1996-09-02', '類型': '類型 B (高位末升段)',
-            '最高噴出漲幅(%)': 18.5, '回歸0%總跌幅(%)': -15.2, '完成回檔所需天數': 147,
-            '觸發時指數': 5236, '波段最高指數': 6205, '回歸0%指數': 5261, '20%警戒線指數': 5180, '前12月最大回檔(%)': 12.5
-        },
-        {
-            '觸發日期': '1997-03-03', '波段最高日期': '1997-04-21', '最高乖離率(%)': 22.36, '觸發時乖離率(%)': 20.2,
-            '見頂天數': 49, '回歸0%日期': '1997-05-26', '類型': '類型 B (高位末升段)',
-            '最高噴出漲幅(%)': 12.4, '回歸0%總跌幅(%)': -10.8, '完成回檔所需天數': 84,
-            '觸發時指數': 7820, '波段最高指數': 8789, '回歸0%指數': 7840, '20%警戒線指數': 7750, '前12月最大回檔(%)': 8.3
-        },
-        {
-            '觸發日期': '1997-06-30', '波段最高日期': '1997-07-28', '最高乖離率(%)': 26.38, '觸發時乖離率(%)': 20.5,
-            '見頂天數': 28, '回歸0%日期': '1997-09-01', '類型': '類型 B (高位末升段)',
-            '最高噴出漲幅(%)': 15.6, '回歸0%總跌幅(%)': -18.4, '完成回檔所需天數': 63,
-            '觸發時指數': 9012, '波段最高指數': 10416, '回歸0%指數': 8500, '20%警戒線指數': 8950, '前12月最大回檔(%)': 5.2
-        },
-        {
-            '觸發日期': '2021-04-05', '波段最高日期': '2021-04-26', '最高乖離率(%)': 22.04, '觸發時乖離率(%)': 20.41,
-            '見頂天數': 21, '回歸0%日期': '2021-05-10', '類型': '類型 B (高位末升段)',
-            '最高噴出漲幅(%)': 5.07, '回歸0%總跌幅(%)': -10.63, '完成回檔所需天數': 35,
-            '觸發時指數': 16854, '波段最高指數': 17709, '回歸0%指數': 15827, '20%警戒線指數': 16520, '前12月最大回檔(%)': 8.5
-        }
-    ]
-    
-    in_danger = False
-    start_date = None
-    trigger_price = None
-    init_bias = None
-    max_bias = 0
-    trigger_warning_price = None
-    max_price = 0
-    max_date = None
-    regime = None
-    max_dd = 0
-    
-    TRIGGER_LEVEL = 20.0
-    RESET_LEVEL = 15.0
-    
-    for date, row in df.iterrows():
-        bias = row['Bias']
-        close_p = row['Close']
-        if pd.isna(bias):
-            continue
-            
-        # 安全過濾：跳過 2021 年上半年的自動回測，改由手動錄入確保精準
-        if date >= pd.to_datetime('2021-01-01') and date <= pd.to_datetime('2021-05-10'):
-            continue
-            
-        if not in_danger:
-            if bias >= TRIGGER_LEVEL:
-                in_danger = True
-                start_date = date
-                trigger_price = close_p
-                init_bias = bias
-                max_bias = bias
-                trigger_warning_price = row['SMA40'] * (1 + TRIGGER_LEVEL/100)
-                max_price = close_p
-                max_date = date
-                regime, max_dd = get_regime(df, date)
-        else:
-            curr_high = row['High']
-            if curr_high > max_price:
-                max_price = curr_high
-                max_date = date
-            if bias > max_bias:
-                max_bias = bias
-                
-            # 結束判定：跌破 15% (視為此度熱度結案)
-            if bias < RESET_LEVEL:
-                in_danger = False
-                end_date = date
-                drop_price = close_p
-                
-                max_surge = (max_price - trigger_price) / trigger_price * 100 if trigger_price and trigger_price != 0 else 0
-                total_drop = (drop_price - max_price) / max_price * 100 if max_price and max_price != 0 else 0
-                weeks = int((end_date - start_date).days) if start_date and end_date else 0
-                
-                results.append({
-                    '觸發日期': start_date.strftime('%Y-%m-%d'),
-                    '類型': regime if regime else "未知",
-                    '前12月最大回檔(%)': round(float(max_dd), 2),
-                    '觸發時指數': round(float(trigger_price), 2),
-                    '觸發時乖離率(%)': round(float(init_bias), 2),
-                    '最高乖離率(%)': round(float(max_bias), 2),
-                    '20%警戒線指數': round(float(trigger_warning_price), 2),
-                    '波段最高日期': max_date.strftime('%Y-%m-%d'),
-                    '波段最高指數': round(float(max_price), 2),
-                    '最高噴出漲幅(%)': round(float(max_surge), 2),
-                    '回歸0%日期': end_date.strftime('%Y-%m-%d'),
-                    '回歸0%指數': round(float(drop_price), 2),
-                    '回歸0%總跌幅(%)': round(float(total_drop), 2),
-                    '完成回檔所需天數': weeks,
-                    '見頂天數': int((max_date - start_date).days)
-                })
-                
-    if in_danger:
-        max_surge = (max_price - trigger_price) / trigger_price * 100 if trigger_price and trigger_price != 0 else 0
-        results.append({
-            '觸發日期': start_date.strftime('%Y-%m-%d'),
-            '類型': regime if regime else "未知",
-            '前12月最大回檔(%)': round(float(max_dd), 2),
-            '觸發時指數': round(float(trigger_price), 2),
-            '觸發時乖離率(%)': round(float(init_bias), 2),
-            '最高乖離率(%)': round(float(max_bias), 2),
-            '20%警戒線指數': round(float(trigger_warning_price), 2),
-            '波段最高日期': max_date.strftime('%Y-%m-%d'),
-            '波段最高指數': round(float(max_price), 2),
-            '最高噴出漲幅(%)': round(float(max_surge), 2),
-            '回歸0%日期': None,
-            '回歸0%指數': None,
-            '回歸0%總跌幅(%)': None,
-            '見頂天數': int((max_date - start_date).days)
-        })
-        
-    return pd.DataFrame(results)
-
-def calc_event_risk(b_df):
-    """
-    基於已發生的「警戒事件」計算一個月內的閃跌風險。
-    定義：觸發後 4 週內，若出現過跌幅 > 3.5% 的情況即視為閃跌。
-    """
-    if b_df.empty:
-        return 0, 0
-    
-    # 僅統計已結案的歷史樣本 (或至少有足夠時間觀察 4 週的樣本)
-    total_samples = len(b_df)
-    flash_drops = 0
-    
-    for _, r in b_df.iterrows():
-        # 這裡我們利用「最高噴出漲幅」與「回歸跌幅」的邏輯判斷
-        # 實務上我們看觸發後是否先上再跌，或直接跌。
-        # 為了簡化且對齊用戶直覺，我們判斷「類型 B」且「修正天數」短的情況。
-        # 但更精確的做法是看觸發後的前 4 週表現。
-        # 此處我們模擬一個「高壓回測」：若為類型 B，其修正壓力通常伴隨閃跌。
-        if "類型 B" in r['類型']:
-            flash_drops += 1
-            
-    risk_pct = (flash_drops / total_samples) * 100 if total_samples > 0 else 0
-    return round(risk_pct, 1), total_samples
-
+    # 共用物件不可直接修改 (盤中模式會覆寫本週 K 棒)，先複製一份
+    return weekly.copy()
 
 def page_bias_analysis():
     log_visit("40週乖離率分析")
+    apply_page_css('bias_hud')
     # 標題將移動到資料載入後，以便顯示動態燈號
     
     with st.spinner('連線抓取最新市場資料中...'):
@@ -269,14 +97,31 @@ def page_bias_analysis():
     if df.empty:
         st.warning("⚠️ 查無資料，請稍後再試。")
         return
-        
+
+    # --- 盤中即時模式：只輪詢最新報價，以 40 格環狀緩衝區 O(1) 更新本週收盤 / SMA40 / Bias ---
+    intraday_on = st.toggle("⚡ 盤中即時模式", key="bias_intraday_mode",
+                            help=f"交易時段內每 {intraday.POLL_SECONDS} 秒更新本週 K 棒、SMA40 與乖離率，不重新下載歷史資料")
+    if intraday_on:
+        # 盤中模式：由瀏覽器端計時器每 POLL_SECONDS 秒觸發 rerun (歷史資料皆來自快取，只有本週數值會變)，
+        # 伺服器不必為每個 session 佔住一條執行緒 sleep
+        if st_autorefresh is not None:
+            st_autorefresh(interval=intraday.POLL_SECONDS * 1000, key="bias_intraday_refresh")
+        else:
+            st.caption("⚠️ 未安裝 streamlit-autorefresh，盤中數值請手動重新整理頁面")
+        snap = intraday.start_intraday("^TWII").snapshot()
+        if snap['as_of'] is not None:
+            row = {**snap['bar'], 'SMA40': snap['sma40'], 'Bias': snap['bias']}
+            if snap['week'] not in df.index:
+                row['WeekRange'] = snap['week'].strftime('%Y/%m/%d')
+            df.loc[snap['week'], list(row)] = list(row.values())
+            df.attrs['last_update'] = snap['as_of'].to_pydatetime()
+            df.attrs['latest_trade_date'] = snap['as_of']
+
     latest_close = df['Close'].iloc[-1]
     latest_sma = df['SMA40'].iloc[-1]
     latest_bias = df['Bias'].iloc[-1]
     
-    # --- [核心數據同步至 AI] ---
-    st.session_state['market_snapshot']['bias_40w'] = f"{latest_bias:.1f}%"
-    st.session_state['market_snapshot']['index_price'] = f"{latest_close:,.0f}"
+    # 頭條指標由全站共用快照提供 (analytics_service.get_market_snapshot)，session 只記錄目前頁面
     st.session_state['market_snapshot']['current_page'] = "40週乖離監控"
     
     # --- 頂部區域：一體化戰情標頭 (Hero Header) ---
@@ -295,8 +140,8 @@ def page_bias_analysis():
     </div>"""
     st.markdown(hero_header_html, unsafe_allow_html=True)
     
-    # 執行回測以獲取所有標籤
-    b_df = backtest(df)
+    # 執行回測以獲取所有標籤 (由分析服務層預先計算)
+    b_df = analytics_service.get_bias_backtest("^TWII")
     
     # --- 頂部區域：作戰戰略抬頭顯示器 (HUD) ---
     st.markdown('<div style="margin-top:-20px;"></div>', unsafe_allow_html=True)
@@ -318,23 +163,6 @@ def page_bias_analysis():
         alert_anim_style = "background: linear-gradient(135deg, #451A03 0%, #171717 100%); border: 2px solid #F6AD55; animation: alert-bg-breathing-warm 4s ease-in-out infinite;"
 
     hud_html = f"""
-<style>
-@keyframes alert-high-risk-flash {{
-    0% {{ box-shadow: 0 0 15px rgba(239, 68, 68, 0.4); filter: brightness(1); }}
-    50% {{ box-shadow: 0 0 45px rgba(239, 68, 68, 0.8); filter: brightness(1.3); }}
-    100% {{ box-shadow: 0 0 15px rgba(239, 68, 68, 0.4); filter: brightness(1); }}
-}}
-@keyframes alert-bg-breathing-warm {{
-    0% {{ filter: brightness(1); }}
-    50% {{ filter: brightness(1.2); box-shadow: 0 0 25px rgba(251, 191, 36, 0.3); }}
-    100% {{ filter: brightness(1); }}
-}}
-@keyframes cyber-scan-pulse {{
-    0% {{ box-shadow: 0 0 20px rgba(56, 189, 248, 0.2); border-color: rgba(56, 189, 248, 0.3); filter: brightness(1); }}
-    50% {{ box-shadow: 0 0 60px rgba(56, 189, 248, 0.7); border-color: rgba(56, 189, 248, 1); filter: brightness(1.5); }}
-    100% {{ box-shadow: 0 0 20px rgba(56, 189, 248, 0.2); border-color: rgba(56, 189, 248, 0.3); filter: brightness(1); }}
-}}
-</style>
 <div style="background:#0F172A; border:4px solid #334155; border-radius:15px; padding:35px 50px; margin-bottom:45px; display:flex; align-items:stretch; box-shadow:0 30px 60px rgba(0,0,0,0.6);">
 <div style="flex:1 1 0; width:0; min-width:0; display:flex; flex-direction:column; align-items:center; text-align:center; justify-content:center; gap:10px; padding:30px; border-radius:15px; {alert_anim_style}">
 <div style="font-size:18px; color:#FCA5A5; font-weight:850; letter-spacing:1px; opacity:0.9;">🔴 目前即時乖離率 (40W Bias)</div>
@@ -362,7 +190,8 @@ def page_bias_analysis():
 </div>
 </div>
 """
-    st.markdown(hud_html, unsafe_allow_html=True)
+    with telemetry.span('html:bias_hud'):
+        st.markdown(hud_html, unsafe_allow_html=True)
 
     # --- 歷史雷達戰術導讀：解讀引力與軌跡 ---
     chart_guide_html = f"""
@@ -386,117 +215,13 @@ def page_bias_analysis():
     """
     st.markdown(chart_guide_html, unsafe_allow_html=True)
         
-    # 準備 K 線圖的動態警告文字 (門檻對齊 15% 預警)
-    df['WarningText'] = df['Bias'].apply(lambda x: f'<br><b style="color:#EF4444;">🚨 偵測到極端乖離: {x:.1f}%</b><br><b style="color:#EF4444;">注意修正風險！</b>' if x >= 20 
-                                         else (f'<br><b style="color:#FBBF24;">⚠️ 進入警戒區域: {x:.1f}%</b>' if x >= 15 else ''))
-    
-    # 計算 20% 警戒軌跡線 (用來畫在 K 線圖上)
-    df['WarningTrack'] = df['SMA40'] * 1.20
-    
-    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, 
-                        vertical_spacing=0.05, 
-                        subplot_titles=('<b style="font-size:24px; color:#F1F5F9; font-family:\'JetBrains Mono\';">📡 歷史雷達觀測圖 (K線 vs 乖離率同步掃描)</b>', '<b style="color:#94A3B8; font-family:\'JetBrains Mono\';">40週乖離率 (%)</b>'),
-                        row_width=[0.3, 0.7])
-
-    fig.add_trace(go.Candlestick(x=df['WeekRange'],
-                    open=df['Open'], high=df['High'], low=df['Low'], close=df['Close'],
-                    customdata=np.stack((df['Bias'], df['WarningText']), axis=-1),
-                    name='📊 加權指數',
-                    increasing_line_color='#10B981', decreasing_line_color='#EF4444',
-                    hovertemplate='<b>開盤:</b> %{open:,.0f}<br>' +
-                                  '<b>最高:</b> %{high:,.0f}<br>' +
-                                  '<b>最低:</b> %{low:,.0f}<br>' +
-                                  '<b>收盤:</b> %{close:,.0f}<br>' +
-                                  '────────────────<br>' +
-                                  '<b style="color:#38BDF8;">📈 目前40W乖離: %{customdata[0]:.2f}%</b>' +
-                                  '%{customdata[1]}<extra></extra>'), row=1, col=1)
-                    
-    fig.add_trace(go.Scatter(x=df['WeekRange'], y=df['SMA40'], 
-                             line={'color': '#94A3B8', 'width': 2}, 
-                             name='🛡️ 40週生命線',
-                             hovertemplate='均線點位: %{y:,.0f}<extra></extra>'), row=1, col=1)
-
-    fig.add_trace(go.Scatter(x=df['WeekRange'], y=df['WarningTrack'], 
-                             line={'color': '#EF4444', 'width': 1.5, 'dash': 'dash'}, 
-                             name='🚨 20% 極端警戒',
-                             hovertemplate='警戒位: %{y:,.0f}<extra></extra>'), row=1, col=1)
-
-    # --- 新裝：K線下方高壓地雷紅球 (Bias >= 20%) ---
-    danger_mask = df['Bias'] >= 20
-    if danger_mask.any():
-        danger_points = df[danger_mask]
-        fig.add_trace(go.Scatter(
-            x=danger_points['WeekRange'],
-            y=danger_points['Low'] * 0.97, # 放在最低點下方 3%
-            mode='markers',
-            name='高壓警報',
-            marker=dict(
-                color='#EF4444', 
-                size=10, 
-                symbol='circle',
-                line=dict(width=2, color='rgba(239, 68, 68, 0.5)') # 呼吸燈暈影感
-            ),
-            hoverinfo='skip' 
-        ), row=1, col=1)
-                             
-    fig.add_trace(go.Scatter(x=df['WeekRange'], y=df['Bias'], 
-                             line={'color': '#38BDF8', 'width': 2}, 
-                             name='📉 乖離率數據',
-                             fill='tozeroy', fillcolor='rgba(56, 189, 248, 0.1)',
-                             hovertemplate='當前乖離: %{y:.2f}%<extra></extra>'), row=2, col=1)
-                             
-    if not b_df.empty:
-        # 使用 WeekRange 對齊歷史標記
-        type_a_indices = b_df[b_df['類型'].str.contains('類型 A')].index
-        type_b_indices = b_df[b_df['類型'].str.contains('類型 B')].index
-        
-        # 從 df 中抓取對應的 WeekRange 名稱
-        valid_a_df = df[df.index.isin(type_a_indices)]
-        valid_b_df = df[df.index.isin(type_b_indices)]
-
-        fig.add_trace(go.Scatter(x=valid_a_df['WeekRange'], y=valid_a_df['Bias'],
-                                 mode='markers', marker={'color': '#10B981', 'size': 10, 'symbol': 'circle', 'line': {'width': 2, 'color': '#047857'}},
-                                 name='類型 A (歷史低點)'), row=2, col=1)
-                                 
-        fig.add_trace(go.Scatter(x=valid_b_df['WeekRange'], y=valid_b_df['Bias'],
-                                 mode='markers', marker={'color': '#EF4444', 'size': 10, 'symbol': 'circle', 'line': {'width': 2, 'color': '#B91C1C'}},
-                                 name='類型 B (歷史極端)'), row=2, col=1)
-
-    fig.add_hline(y=0, line_dash="solid", line_color="#475569", row=2, col=1)
-    
-    # 正向過熱區 (紅色實線)
-    fig.add_hline(y=20, line_dash="solid", line_color="#EF4444", row=2, col=1, 
-                  annotation_text="20% 極端警戒線", annotation_font_color="#EF4444", annotation_position="top left")
-    
-    fig.update_layout(height=700, xaxis_rangeslider_visible=False,
-                      plot_bgcolor="#0F172A",
-                      paper_bgcolor="#0F172A",
-                      font=dict(color="#F1F5F9", family="JetBrains Mono"),
-                      hovermode="x unified", # 恢復統一橫拉條模式
-                      hoverlabel=dict(bgcolor="rgba(15, 23, 42, 0.9)", font_size=15, font_family="JetBrains Mono", bordercolor="#475569"),
-                      margin=dict(l=50, r=50, t=60, b=40),
-                      showlegend=False,
-                      dragmode="pan") # 預設平移，配合滾輪縮放
-                      
-    fig.update_xaxes(type='category', showgrid=True, gridwidth=1, gridcolor='#1E293B', 
-                     showticklabels=False, # 隱藏底部的日期區間標籤，資訊已整合進 Hover 視窗
-                     showspikes=True, spikemode="across", spikesnap="cursor", 
-                     showline=False, spikedash="solid", spikethickness=1, spikecolor="#38BDF8",
-                     # 初始顯示範圍 (使用索引)
-                     range=[len(df)-100, len(df)-1])
-                     
-    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='#1E293B', showline=False,
-                     autorange=True, fixedrange=True) # 禁止滾輪縮放 Y 軸，解決扁平化問題，讓它自動撐開高度
-    
-    # 圖表設定 (仿專業操盤軟體配置)
-    chart_config = {
-        'scrollZoom': True, # 恢復滾輪，搭配平移模式
-        'displaylogo': False,
-        'modeBarButtonsToRemove': ['lasso2d', 'select2d', 'autoScale2d', 'toggleSpikelines'],
-        'toImageButtonOptions': {'format': 'png', 'filename': 'TSE_40W_Bias_Radar'}
-    }
-    
-    st.plotly_chart(fig, use_container_width=True, config=chart_config)
+    # 雷達圖規格每個資料版本只建一次並序列化快取。盤中模式也沿用同一份 JSON：
+    # iframe 內容不變就不會每次自動更新時重新載入 (保留使用者的縮放 / 平移)，本週即時數值由上方 HUD 顯示
+    if intraday_on:
+        st.caption("⚡ 盤中模式：雷達圖為最近收盤資料，本週即時 K 棒、SMA40 與乖離率請見上方儀表")
+    chart_json = analytics_service.get_bias_chart("^TWII")['json']
+    with telemetry.span('html:bias_chart'):
+        components.html(bias_chart.render_html(chart_json), height=bias_chart.CHART_HEIGHT + 10)
 
 
     # --- 戰情樞紐：歷史回測決策建議 (旗艦比例重構版) ---
@@ -507,7 +232,7 @@ def page_bias_analysis():
     """, unsafe_allow_html=True)
     
     # --- 戰略模擬邏輯升級：與 A/B 類型深度掛鉤 ---
-    risk_val, total_events = calc_event_risk(b_df)
+    risk_val, total_events = calc_event_risk(b_df, analytics_service.get_outcomes("^TWII", 'weekly'))
     prob_color = "#EF4444" if risk_val > 50 else "#FBBF24" if risk_val > 30 else "#10B981"
     
     avg_a, avg_b = 0, 0
@@ -531,19 +256,27 @@ def page_bias_analysis():
         sc1_val, sc1_target, sc1_label = avg_a, target_a, "🆘 劇本一：災難級崩盤 (對標歷史極端)"
         sc2_val, sc2_target, sc2_label = avg_b, target_b, "✅ 劇本二：技術性回檔 (對標正常回測)"
 
-    # --- 戰略模擬計算優化 (基於 13 組歷史樣本精確校準) ---
-    # 邏輯：0 天 (快速見頂), 21 天 (典型中位數), 77 天 (強勢極端大限 - 排除 2021 離群值)
-    min_p = 0
-    med_p = 21
-    max_p = 77
-    
-    # 獲取基準觸發日期 (若目前在危險中)
-    current_event = b_df[b_df['回歸0%日期'].isna()]
-    if not current_event.empty:
-        # 強制抓取最後一組「進行中」的事件觸發日
-        ref_date = pd.to_datetime(current_event.iloc[-1]['觸發日期'])
+    # --- 戰略模擬計算優化：以歷史相似情境校準見頂窗口 ---
+    # 取最接近目前狀態的 10 個歷史週，統計其後 26 週內最高點出現在幾天後 (最快 / 中位數 / 最晚)
+    try:
+        similar = analytics_service.find_analogues("^TWII", k=10, overrides={'bias': float(latest_bias)})
+    except Exception as e:
+        print(f"Analogue search failed: {e}")
+        similar = None
+    peak = analogues.peak_calibration(similar)
+    if peak:
+        min_p, med_p, max_p, sample_count = peak['fast'], peak['typical'], peak['extreme'], peak['count']
+        # 天數自相似週起算，對應到目前這一週
+        ref_date = pd.Timestamp(df.index[-1]).to_pydatetime()
     else:
-        ref_date = datetime.datetime.now()
+        # 相似情境無法計算時，沿用 13 組乖離事件的歷史校準：0 天 (快速見頂), 21 天 (典型中位數), 77 天 (極端大限)
+        min_p, med_p, max_p, sample_count = 0, 21, 77, 13
+        current_event = b_df[b_df['回歸0%日期'].isna()]
+        if not current_event.empty:
+            # 強制抓取最後一組「進行中」的事件觸發日
+            ref_date = pd.to_datetime(current_event.iloc[-1]['觸發日期'])
+        else:
+            ref_date = datetime.datetime.now()
         
     today = datetime.datetime.now()
     dates = []
@@ -558,12 +291,12 @@ def page_bias_analysis():
         if i == 2: # 極端大限 (核心預報)
             d_start = d - datetime.timedelta(days=7)
             d_end = d + datetime.timedelta(days=7)
-            range_str = f"{d_start.strftime('%m / %d')} ~ {d_end.strftime('%m / %d')}"
+            range_str = f"{d_start.strftime('%Y / %m / %d')} ~ {d_end.strftime('%m / %d')}"
             date_color = "#FFFFFF" 
             text_color = "#FFFFFF"
             status_text = " (大限窗口 🚨)"
             opacity = "1.0"
-            dates.append(f"<div style='opacity:{opacity}; color:{text_color}; font-weight:700; font-size:13px;'>{label}：<span style='font-family:\"JetBrains Mono\"; color:{date_color};'>2026 / {range_str}</span> <span style='font-size:11px; opacity:0.8;'>{status_text}</span></div>")
+            dates.append(f"<div style='opacity:{opacity}; color:{text_color}; font-weight:700; font-size:13px;'>{label}：<span style='font-family:\"JetBrains Mono\"; color:{date_color};'>{range_str}</span> <span style='font-size:11px; opacity:0.8;'>{status_text}</span></div>")
         else: # 快速/典型 (已越過或即將到來)
             date_color = "#FDE68A" # 淡金黃，提升辨識度
             text_color = "#F1F5F9" # 明亮白灰
@@ -572,13 +305,6 @@ def page_bias_analysis():
             dates.append(f"<div style='opacity:{opacity}; color:{text_color}; font-weight:700; font-size:13px;'>{label}：<span style='font-family:\"JetBrains Mono\"; color:{date_color};'>{d.strftime('%Y / %m / %d')}</span> <span style='font-size:11px; opacity:0.8;'>{status_text}</span></div>")
 
     decision_html = f"""
-<style>
-@keyframes pulse-solar-glow {{
-0% {{ box-shadow: 0 0 15px rgba(249, 115, 22, 0.4); border-color: rgba(249, 115, 22, 0.6); }}
-50% {{ box-shadow: 0 0 40px rgba(249, 115, 22, 0.9); border-color: rgba(249, 115, 22, 1); }}
-100% {{ box-shadow: 0 0 15px rgba(249, 115, 22, 0.4); border-color: rgba(249, 115, 22, 0.6); }}
-}}
-</style>
 <div style="background:#0F172A; border:4px solid #334155; border-radius:15px; padding:45px; margin-bottom:40px; box-shadow:0 30px 60px rgba(0,0,0,0.6);">
 <div style="display:flex; gap:35px; align-items:stretch; margin-bottom:25px;">
 <div style="flex:1; display:flex; flex-direction:column; gap:25px;">
@@ -588,7 +314,7 @@ def page_bias_analysis():
 <div style="background:linear-gradient(135deg, #FBBF24 0%, #F97316 100%); border:2.5px solid #FEF08A; border-radius:16px; padding:30px 20px; display:flex; flex-direction:column; align-items:center; text-align:center; box-shadow:0 20px 50px rgba(249, 115, 22, 0.5); animation: pulse-solar-glow 2.5s infinite; flex:1; justify-content:center;">
 <div style="height:24px;"></div> 
 <div style="color:white; font-size:20px; font-weight:950; margin-bottom:10px; text-shadow:0 1px 3px rgba(0,0,0,0.3);">歷史統計總次數</div>
-<div style="font-family:'JetBrains Mono'; font-size:52px; font-weight:950; color:white; margin-bottom:15px; text-shadow:0 4px 10px rgba(0,0,0,0.3);">13 <span style="font-size:22px;">組</span></div>
+<div style="font-family:'JetBrains Mono'; font-size:52px; font-weight:950; color:white; margin-bottom:15px; text-shadow:0 4px 10px rgba(0,0,0,0.3);">{sample_count} <span style="font-size:22px;">組</span></div>
 <div style="width:100%; border-top:1px dashed rgba(255,255,255,0.4); margin-bottom:15px;"></div>
 <div style="font-size:14px; color:rgba(255,255,255,0.9); margin-bottom:10px; font-weight:900;">🛡️ 預報波段頂點日期</div>
 <div style="text-align:left; width:100%; padding-left:10px; display:flex; flex-direction:column; gap:6px;">
@@ -629,7 +355,25 @@ def page_bias_analysis():
 </div>
 </div>
 </div>"""
-    st.markdown(decision_html, unsafe_allow_html=True)
+    with telemetry.span('html:decision'):
+        st.markdown(decision_html, unsafe_allow_html=True)
+
+    # --- 蒙地卡羅情境：以歷史日報酬區塊重抽的路徑分布補充上方的平均值劇本 ---
+    with st.expander("🎲 蒙地卡羅情境模擬 (歷史日報酬區塊重抽)"):
+        try:
+            mc = analytics_service.get_monte_carlo("^TWII")
+            st.caption(f"{mc['n_paths']:,} 條路徑 × {mc['horizon']} 個交易日，自最近收盤 {mc['start_price']:,.0f} 點起算；回檔以前高 {mc['peak']:,.0f} 點為基準，"
+                       f"期間內站回前高的機率 {mc['recovery_prob']}%")
+            pct_cols = {5: 'P5', 25: 'P25', 50: '中位數', 75: 'P75', 95: 'P95'}
+            st.dataframe(pd.DataFrame({
+                '最深回檔(%)': [mc['depth'][p] for p in pct_cols],
+                '最低點位': [mc['bottom_price'][p] for p in pct_cols],
+                '見底天數': [mc['days_to_bottom'][p] for p in pct_cols],
+                '解套天數': [mc['days_to_recovery'][p] for p in pct_cols]
+            }, index=list(pct_cols.values())).T, use_container_width=True)
+            st.line_chart(pd.DataFrame({pct_cols[p]: mc['fan'][p] for p in pct_cols}), height=320)
+        except Exception as e:
+            st.warning(f"情境模擬失敗：{e}")
 
 
 
@@ -668,162 +412,8 @@ def page_bias_analysis():
 
 
     if not b_df.empty:
-        # 建立流水日誌介面
-        for _, r in b_df.sort_values(by='觸發日期', ascending=False).iterrows():
-            # 取得基礎計算數據 (使用 get 確保穩定性)
-            max_surge = float(r.get('最高噴出漲幅(%)', 0))
-            max_drop = float(r.get('回歸0%總跌幅(%)', 0)) if pd.notna(r.get('回歸0%總跌幅(%)')) else 0
-            days_total = r.get('完成回檔所需天數', 0)
-            type_full = r.get('類型', '未知')
-            type_tag = type_full.split(' (')[0] if type_full else "未知"
-            tag_color = "#3B82F6" if "類型 A" in str(type_full) else "#EF4444"
-            tag_bg = "#EFF6FF" if "類型 A" in str(type_full) else "#FEF2F2"
-            
-            # 計算能量條寬度 (假設上限 40%)
-            surge_w = min(100.0, float(max_surge / 40 * 100))
-            drop_w = min(100.0, float(abs(max_drop) / 40 * 100))
-
-            # 取得點位數據
-            line_20 = r.get('20%警戒線指數', 0)
-            peak_val = r.get('波段最高指數', 0)
-            recover_val = r.get('回歸0%指數', 0) if pd.notna(r.get('回歸0%指數')) else 0
-            
-            # --- 新增：階段耗時與點位差演算法 (P1->P2, P2->P3) ---
-            t1 = pd.to_datetime(r['觸發日期'])
-            t2 = pd.to_datetime(r['波段最高日期'])
-            days_spurt = (t2 - t1).days
-            # 安全計算：若警報進行中，回檔天數設為 0，避免 NaN 型轉報錯
-            days_correction = int(days_total - days_spurt) if pd.notna(days_total) else 0
-            
-            # 價差演算 (對齊卡片顯示的「觸發時指數」與「波段最高指數」，確保用戶可直接驗算)
-            trigger_close = r['觸發時指數']
-            point_diff = int(peak_val - trigger_close) if pd.notna(trigger_close) and pd.notna(peak_val) else 0
-            
-            # --- 新增：故事線與狀態判定邏輯 ---
-            is_ongoing = pd.isna(r['回歸0%日期'])
-            
-            # 狀態標籤與耗時標題
-            if is_ongoing:
-                status_badge = '<span style="color:#EF4444; background:rgba(239, 68, 68, 0.1); padding:6px 16px; border-radius:8px; font-size:20px; font-weight:900; border:2px solid rgba(239, 68, 68, 0.3);">🚨 警報持續中</span>'
-                days_label = "警報已持續"
-            else:
-                status_badge = '<span style="color:#10B981; background:rgba(16, 185, 129, 0.1); padding:6px 16px; border-radius:8px; font-size:20px; font-weight:900; border:2px solid rgba(16, 185, 129, 0.3);">✅ 歷史結案</span>'
-                days_label = "完整修復耗時"
-                
-            # 日期轉白話文輔助函數 (例如 '2026-01-05' -> '2026/01/05')
-            def format_short_date(d_str):
-                if pd.isna(d_str) or not d_str or d_str == "N/A" or d_str == "None": 
-                    return ""
-                
-                # 將輸入轉為日期物件以便比較
-                target_date = pd.to_datetime(d_str)
-                date_val = target_date.strftime('%Y/%m/%d')
-                
-                # 取得資料庫中最後一個交易日
-                latest_trade_date = df.attrs.get('latest_trade_date', df.index[-1])
-                
-                # 如果該日期就是最後一個交易日且事件進行中，則標註為即時
-                if target_date.date() >= latest_trade_date.date():
-                    return f"即時偵測中 - {date_val}"
-                return f"發生於 {date_val}"
-                
-            trigger_date_str = format_short_date(r.get('觸發日期'))
-            peak_date_str = format_short_date(r.get('波段最高日期'))
-            recover_date_str = format_short_date(r.get('回歸0%日期')) if not is_ongoing else "等待均線跟上"
-            
-            # 預處理顯示文字，避免 f-string 語法錯誤
-            line_20_str = f"{line_20:,.0f}" if pd.notna(line_20) else "--"
-            peak_val_str = f"{peak_val:,.0f}" if pd.notna(peak_val) else "--"
-            recover_val_str = f"{recover_val:,.0f}" if recover_val > 0 else "--"
-            days_str = str(int(days_total)) if pd.notna(days_total) else "--"
-            
-            # 建構「作戰中心：終極數據牆版 (完整故事線)」HTML
-            html_code = f"""
-<style>
-/* 方案 A: Neon Pro - 硬核電子儀表 */
-@keyframes neon-pulse-red {{
-  0% {{ box-shadow: 0 0 5px rgba(239, 68, 68, 0.4); border-color: rgba(239, 68, 68, 0.5); transform: scale(1); }}
-  50% {{ box-shadow: 0 0 20px rgba(239, 68, 68, 0.9); border-color: rgba(239, 68, 68, 1); transform: scale(1.02); }}
-  100% {{ box-shadow: 0 0 5px rgba(239, 68, 68, 0.4); border-color: rgba(239, 68, 68, 0.5); transform: scale(1); }}
-}}
-@keyframes neon-pulse-green {{
-  0% {{ box-shadow: 0 0 5px rgba(34, 197, 94, 0.4); border-color: rgba(34, 197, 94, 0.5); transform: scale(1); }}
-  50% {{ box-shadow: 0 0 20px rgba(34, 197, 94, 0.9); border-color: rgba(34, 197, 94, 1); transform: scale(1.02); }}
-  100% {{ box-shadow: 0 0 5px rgba(34, 197, 94, 0.4); border-color: rgba(34, 197, 94, 0.5); transform: scale(1); }}
-}}
-@keyframes neon-pulse-gray {{
-  0% {{ box-shadow: 0 0 5px rgba(148, 163, 184, 0.4); border-color: rgba(148, 163, 184, 0.5); }}
-  50% {{ box-shadow: 0 0 15px rgba(148, 163, 184, 0.8); border-color: rgba(148, 163, 184, 1); }}
-  100% {{ box-shadow: 0 0 5px rgba(148, 163, 184, 0.4); border-color: rgba(148, 163, 184, 0.5); }}
-}}
-.bias-neon-red {{
-  animation: neon-pulse-red 1.5s infinite ease-in-out;
-  background: rgba(69, 10, 10, 0.8); color: #FCA5A5; border: 2px solid #EF4444;
-  padding: 4px 16px; border-radius: 6px; font-family: 'JetBrains Mono';
-}}
-.bias-neon-green {{
-  animation: neon-pulse-green 1.5s infinite ease-in-out;
-  background: rgba(6, 78, 59, 0.8); color: #86EFAC; border: 2px solid #22C55E;
-  padding: 4px 16px; border-radius: 6px; font-family: 'JetBrains Mono';
-}}
-.bias-neon-gray {{
-  animation: neon-pulse-gray 2s infinite ease-in-out;
-  background: rgba(30, 41, 59, 0.8); color: #CBD5E1; border: 2px solid #94A3B8;
-  padding: 4px 12px; border-radius: 6px; font-family: 'JetBrains Mono';
-}}
-</style>
-<div style="background:#0F172A; border:5px solid #334155; border-radius:12px; margin-bottom:50px; overflow:hidden; width:100%; box-shadow:0 30px 60px rgba(0,0,0,0.5);">
-  <!-- 頂部區：巨星標題磚 -->
-  <div style="display:grid; grid-template-columns: 1fr 1fr; align-items:stretch; background:#1E293B; border-bottom:4px solid #475569;">
-    <div style="padding:35px 30px; border-right:4px solid #475569;">
-      <div style="display:flex; align-items:center; gap:20px; margin-bottom:15px;">
-        {status_badge}
-        <span style="font-size:24px; color:#94A3B8; font-weight:800; letter-spacing:1px;">異常乖離發生日：</span>
-      </div>
-      <div style="font-size:52px; color:white; font-weight:950; letter-spacing:-2px; line-height:1;">📅 {r["觸發日期"]}</div>
-      <div style="margin-top:25px; display:flex; align-items:center; gap:25px;">
-        <span style="color:#FFF; background:{tag_color}; padding:8px 25px; border-radius:10px; font-size:38px; font-weight:900; white-space:nowrap; border:2px solid rgba(255,255,255,0.3);">{type_tag}</span>
-        <span style="font-size:32px; color:#94A3B8; font-weight:800; white-space:nowrap;">前期回撤: <span style="color:#F1F5F9;">{r['前12月最大回檔(%)']:.1f}%</span></span>
-      </div>
-    </div>
-    <div style="text-align:center; background:rgba(239, 68, 68, 0.05); padding:35px 30px; display:flex; flex-direction:column; justify-content:center; align-items:center;">
-      <div style="font-size:24px; color:#FCA5A5; font-weight:800; letter-spacing:1px; margin-bottom:15px;">末升段衝刺總耗時：</div>
-      <div style="font-size:52px; color:#EF4444; font-weight:950; letter-spacing:-1px; line-height:1; margin-bottom:20px;">🚀 {days_spurt} <span style="font-size:28px; font-weight:800;">個交易日</span></div>
-      <div style="font-size:42px; color:#F87171; font-weight:900; white-space:nowrap;">▲ +{point_diff:,} <span style="font-size:24px; font-weight:800; margin-left:5px;">點</span></div>
-    </div>
-  </div>
-
-  <!-- 中間層：故事線點位 (雙欄紅綠配強化版) -->
-  <div style="display:grid; grid-template-columns:1fr 1fr; gap:0; border-bottom:4px solid #475569;">
-    <div style="background:#450A0A; padding:45px 20px; text-align:center; border-right:4px solid #475569; display:flex; flex-direction:column; align-items:center;">
-      <div style="font-size:26px; color:#FCA5A5; font-weight:900; margin-bottom:10px; letter-spacing:1px;">[階段一] 警報點位</div>
-      <div style="font-size:18px; color:#F87171; font-weight:800; margin-bottom:25px;">({trigger_date_str})</div>
-      <div style="font-family:'JetBrains Mono'; font-size:52px; font-weight:950; color:white; line-height:1; margin-bottom:20px;">{r['觸發時指數']:,.0f}</div>
-      <div class="bias-neon-red" style="font-size:22px; font-weight:900;">當日乖離率 {r['觸發時乖離率(%)']:+.1f}%</div>
-    </div>
-    <div style="background:#064E3B; padding:45px 20px; text-align:center; display:flex; flex-direction:column; align-items:center;">
-      <div style="font-size:26px; color:#86EFAC; font-weight:900; margin-bottom:10px; letter-spacing:1px;">[階段二] 波段最高峰</div>
-      <div style="font-size:18px; color:#4ADE80; font-weight:800; margin-bottom:25px;">({peak_date_str})</div>
-      <div style="font-family:'JetBrains Mono'; font-size:52px; font-weight:950; color:white; line-height:1; margin-bottom:20px;">{peak_val_str}</div>
-      <div class="bias-neon-green" style="font-size:22px; font-weight:900;">當日乖離率 {r['最高乖離率(%)']:+.1f}%</div>
-    </div>
-  </div>
-
-  <!-- 底部層：高端金屬能量總結 (夕陽黃橙版) -->
-  <div style="background:#0F172A; padding:45px 50px; border:3px solid #F97316; margin:0;">
-    <div style="display:flex; justify-content:space-between; align-items:flex-end; margin-bottom:35px;">
-      <div style="font-size:34px; color:white; font-weight:950; display:flex; align-items:center; gap:15px; line-height:1;">☀️ 乖離極端漲幅：</div>
-      <div style="font-size:42px; color:#FBBF24; font-weight:950; letter-spacing:-1.5px; line-height:1; text-shadow: 0 0 20px rgba(251, 191, 36, 0.4); display:flex; align-items:baseline; gap:15px;">
-        <span>{max_surge:+.1f}%</span>
-      </div>
-    </div>
-    <div style="height:38px; background:rgba(2,6,23,0.95); border-radius:12px; overflow:hidden; border:3px solid #F97316; padding:3px; box-shadow:inset 0 4px 10px rgba(0,0,0,0.6);">
-      <div style="width:{surge_w}%; height:100%; background:linear-gradient(90deg, #FDE68A 0%, #FBBF24 50%, #F97316 100%); border-radius:8px; box-shadow:0 0 25px rgba(249, 115, 22, 0.4);"></div>
-    </div>
-  </div>
-</div>
-""".strip()
-            st.markdown(html_code, unsafe_allow_html=True)
+        # 建立流水日誌介面 (卡片依資料版本預先渲染，分頁顯示)
+        render_event_log('bias')
 
         st.markdown('<div style="margin-top:50px; text-align:center;"></div>', unsafe_allow_html=True)
         
@@ -834,219 +424,40 @@ def page_bias_analysis():
     else:
         st.info("歷史上查無此極端數據。")
 
+    # --- 歷史相似情境：以目前乖離 / 回檔 / 波段週數在所有歷史週中找最近鄰 ---
+    with st.expander("🧭 歷史相似情境 (最接近目前狀態的歷史週)"):
+        if similar is None:
+            st.warning("相似情境計算失敗，見頂窗口改用乖離事件的歷史校準。")
+        else:
+            st.dataframe(similar.rename(columns={
+                'date': '日期', 'distance': '相似距離', 'bias': '乖離(%)', 'drawdown': '距前高(%)',
+                'max_dd_52w': '52週最大回檔(%)', 'wave_age': '波段週數',
+                'ret_4w': '4週後報酬(%)', 'mdd_4w': '4週內最大回檔(%)',
+                'ret_13w': '13週後報酬(%)', 'mdd_13w': '13週內最大回檔(%)',
+                'ret_26w': '26週後報酬(%)', 'mdd_26w': '26週內最大回檔(%)',
+                'peak_days': '26週內見高(天)'
+            }).round(2), use_container_width=True, hide_index=True)
+
     st.write("<p style='text-align:center; color:#9CA3AF; font-size:12px; margin-top:50px;'>系統由 aver5678 量化模組驅動 | 視覺化引擎: Command-Center v3.0</p>", unsafe_allow_html=True)
 
 def page_upward_bias():
     log_visit("股市上漲統計表")
-
-    @st.cache_data(ttl=3600)
-    def load_upward_data(ticker_symbol):
-        df = fetch_data(ticker_symbol, start_date="2000-01-01")
-        if df.empty:
-            return pd.DataFrame(), pd.DataFrame(), {}
-        
-        # 使用 7% 轉折模型 (跌 7% 確認頭部，漲 7% 確認底部)
-        waves = analyze_waves(df, reversal_percent=7.0)
-        
-        # 取出所有向上波段 (type == 'up') 並加入前波清洗度
-        up_waves = []
-        for i, w in enumerate(waves):
-            if w['type'] == 'up':
-                prev_w = waves[i-1] if i > 0 else None
-                pre_dd = 0.0
-                if prev_w and prev_w['type'] == 'down':
-                    pre_dd = (prev_w['lowest_price'] - prev_w['highest_price']) / prev_w['highest_price'] * 100
-                w['pre_drawdown'] = pre_dd
-                up_waves.append(w)
-        
-        if not up_waves:
-            return pd.DataFrame(), pd.DataFrame(), {}
-            
-        results = []
-        for w in up_waves:
-            start_date = w['start_date'].strftime('%Y-%m-%d')
-            status = '進行中' if w.get('ongoing', False) else '已完結'
-            
-            if status == '進行中':
-                end_date_str = f"至今 ({df.index[-1].strftime('%m/%d')})"
-                end_price = df['Close'].iloc[-1]
-                days = (df.index[-1] - w['start_date']).days
-                gain_pct = (end_price - w['start_price']) / w['start_price'] * 100
-            else:
-                end_date_str = w['end_date'].strftime('%Y-%m-%d')
-                end_price = w['end_price']
-                days = (w['end_date'] - w['start_date']).days
-                gain_pct = (end_price - w['start_price']) / w['start_price'] * 100
-            
-            results.append({
-                '起漲日期 (前波破底)': start_date,
-                '最高日期 (下波前高)': end_date_str,
-                '起漲價格': round(float(w['start_price']), 2),
-                '最高價格 (或現價)': round(float(end_price), 2),
-                '漲幅(%)': round(float(gain_pct), 2),
-                '花費天數': int(days),
-                '狀態': status,
-                '前波清洗度(%)': w.get('pre_drawdown', 0.0)
-            })
-            
-        up_df = pd.DataFrame(results)
-        
-        # 統計機率 (排除進行中)
-        finished_waves = up_df[up_df['狀態'] == '已完結']
-        if finished_waves.empty:
-            finished_waves = up_df
-            
-        # 分配區間
-        bins = [0, 10, 20, 30, 40, 50, 60, 70, 10000]
-        labels = ['     0~10%', '  10~20%', '  20~30%', '  30~40%', '  40~50%', '  50~60%', '  60~70%', '70% 以上']
-        
-        try:
-             count_series = pd.cut(finished_waves['漲幅(%)'], bins=bins, labels=labels, right=False).value_counts().sort_index()
-        except:
-             count_series = pd.Series(0, index=labels)
-        
-        dist_results = []
-        total = len(finished_waves)
-        for label, count in count_series.items():
-            prob = (count / total * 100) if total > 0 else 0
-            dist_results.append({
-                '區間': label.strip(),
-                '次數': count,
-                '機率(%):Q': round(float(prob), 2),
-                '機率(%)': round(float(prob), 2)
-            })
-        dist_df = pd.DataFrame(dist_results)
-        
-        metrics = {
-            '總完整波段數': total,
-            '平均漲幅(%)': round(float(finished_waves['漲幅(%)'].mean()), 2) if total > 0 else 0,
-            '平均花費天數': round(float(finished_waves['花費天數'].mean()), 1) if total > 0 else 0,
-            '漲幅超過 10% 機率': round(float(len(finished_waves[finished_waves['漲幅(%)'] >= 10]) / total * 100), 1) if total > 0 else 0,
-            '漲幅超過 20% 機率': round(float(len(finished_waves[finished_waves['漲幅(%)'] >= 20]) / total * 100), 1) if total > 0 else 0,
-            '漲幅超過 30% 機率': round(float(len(finished_waves[finished_waves['漲幅(%)'] >= 30]) / total * 100), 1) if total > 0 else 0,
-            '漲幅超過 40% 機率': round(float(len(finished_waves[finished_waves['漲幅(%)'] >= 40]) / total * 100), 1) if total > 0 else 0,
-            '漲幅超過 50% 機率': round(float(len(finished_waves[finished_waves['漲幅(%)'] >= 50]) / total * 100), 1) if total > 0 else 0
-        }
-            
-        is_ongoing = False
-        current_bounce = 0.0
-        if not df.empty:
-            last_close = df['Close'].iloc[-1]
-            if not up_df.empty and up_df.iloc[-1]['狀態'] == '進行中':
-                is_ongoing = True
-                current_bounce = float(up_df.iloc[-1]['漲幅(%)'])
-            elif not up_df.empty and len(finished_waves) == len(up_df):
-                last_end_date_str = up_df.iloc[-1]['最高日期 (下波前高)']
-                try:
-                    date_str = last_end_date_str
-                    if "至今" not in date_str:
-                        recent_df = df.loc[date_str:]
-                        if not recent_df.empty:
-                            recent_low = recent_df['Low'].min()
-                            current_bounce = (last_close - recent_low) / recent_low * 100
-                except:
-                    current_bounce = 0.0
-
-        return up_df, dist_df, metrics, current_bounce
-
+    apply_page_css('wave_hud')
 
     # 固定鎖定台灣加權指數
     symbol = "^TWII"
     selected_name = "台灣加權指數 (^TWII)"
 
-    up_df, dist_df, metrics, current_bounce = load_upward_data(symbol)
+    try:
+        up_df, dist_df, metrics, current_bounce = analytics_service.get_upward_analysis(symbol)
+    except Exception as e:
+        st.error(f"獲取資料時發生錯誤：{e}")
+        return
 
     if up_df.empty:
         st.warning("目前尚無足夠歷史數據可供分析。")
         return
 
-    # --- [ 手動波段整合區：根據 USER 精確大局觀進行修正 ] ---
-    if not up_df.empty:
-        # 1. 處理 2024-08-06 至 2025-01-07 的大整合
-        target_indices = up_df[up_df['起漲日期 (前波破底)'].isin(['2024-08-06', '2024-09-04'])].index.tolist()
-        if len(target_indices) >= 2:
-            base_idx = target_indices[0] if up_df.loc[target_indices[0], '起漲日期 (前波破底)'] == '2024-08-06' else target_indices[1]
-            tail_idx = target_indices[1] if base_idx == target_indices[0] else target_indices[0]
-            up_df.at[base_idx, '最高價格 (或現價)'] = max(up_df.loc[base_idx, '最高價格 (或現價)'], up_df.loc[tail_idx, '最高價格 (或現價)'])
-            up_df.at[base_idx, '最高日期 (下波前高)'] = up_df.loc[tail_idx, '最高日期 (下波前高)']
-            up_df.at[base_idx, '狀態'] = up_df.loc[tail_idx, '狀態']
-            p_start = up_df.loc[base_idx, '起漲價格']
-            p_end = up_df.loc[base_idx, '最高價格 (或現價)']
-            up_df.at[base_idx, '漲幅(%)'] = (p_end - p_start) / p_start * 100
-            d_start = pd.to_datetime(up_df.loc[base_idx, '起漲日期 (前波破底)'])
-            d_end_raw = up_df.loc[base_idx, '最高日期 (下波前高)']
-            if '(' in d_end_raw:
-                d_end_str = d_end_raw.split('(')[1].split(')')[0]
-                d_end = pd.to_datetime(f"2025-{d_end_str.replace('/', '-')}")
-            else:
-                d_end = pd.to_datetime(d_end_raw)
-            up_df.at[base_idx, '花費天數'] = (d_end - d_start).days
-            up_df = up_df.drop(tail_idx)
-
-        # 2. 手動移除特定碎步波段
-        remove_dates = [
-            '2022-07-12', '2022-05-12', '2021-08-20', '2021-05-12', '2018-10-26', 
-            '2011-08-22', '2011-08-09', '2008-12-24', '2008-12-05', '2008-11-21', 
-            '2008-10-28', '2008-10-13', '2008-09-18', '2008-09-05', '2008-08-05', 
-            '2008-07-16', '2008-01-09', '2007-12-18', '2007-11-27', '2006-06-09',
-            '2004-05-17', '2003-04-01', '2003-03-11', '2002-08-06', '2002-07-03', 
-            '2002-05-07', '2001-05-21', '2001-03-02', '2001-02-08', '2000-11-21', 
-            '2000-11-02', '2000-10-19', '2000-10-13', '2000-10-05', '2000-08-08', 
-            '2000-07-05', '2000-05-26', '2000-05-11', '2000-04-17'
-        ]
-        up_df = up_df[~up_df['起漲日期 (前波破底)'].isin(remove_dates)]
-
-        # 3. 手動修正波段終點
-        target_2020 = up_df[up_df['起漲日期 (前波破底)'] == '2020-03-19'].index
-        if not target_2020.empty:
-            idx = target_2020[0]
-            try:
-                hist_data = fetch_data("^TWII", start_date="2020-07-20", end_date="2020-08-01")
-                if not hist_data.empty and '2020-07-28' in hist_data.index.strftime('%Y-%m-%d'):
-                    new_price = hist_data.loc[hist_data.index.strftime('%Y-%m-%d') == '2020-07-28', 'Close'].iloc[0]
-                    up_df.at[idx, '最高日期 (下波前高)'] = '2020-07-28'
-                    up_df.at[idx, '最高價格 (或現價)'] = round(float(new_price), 2)
-                    p_start = up_df.loc[idx, '起漲價格']
-                    up_df.at[idx, '漲幅(%)'] = round((new_price - p_start) / p_start * 100, 2)
-                    up_df.at[idx, '花費天數'] = (pd.to_datetime('2020-07-28') - pd.to_datetime('2020-03-19')).days
-            except: pass
-
-        # 4. 手動修正波段起點
-        target_2012 = up_df[up_df['起漲日期 (前波破底)'] == '2012-06-04'].index
-        if not target_2012.empty:
-            idx = target_2012[0]
-            try:
-                hist_data_2012 = fetch_data("^TWII", start_date="2012-07-20", end_date="2012-08-01")
-                if not hist_data_2012.empty and '2012-07-25' in hist_data_2012.index.strftime('%Y-%m-%d'):
-                    new_start_price = hist_data_2012.loc[hist_data_2012.index.strftime('%Y-%m-%d') == '2012-07-25', 'Close'].iloc[0]
-                    up_df.at[idx, '起漲日期 (前波破底)'] = '2012-07-25'
-                    up_df.at[idx, '起漲價格'] = round(float(new_start_price), 2)
-                    p_end = up_df.loc[idx, '最高價格 (或現價)']
-                    up_df.at[idx, '漲幅(%)'] = round((p_end - new_start_price) / new_start_price * 100, 2)
-                    up_df.at[idx, '花費天數'] = (pd.to_datetime(up_df.loc[idx, '最高日期 (下波前高)']) - pd.to_datetime('2012-07-25')).days
-            except: pass
-
-        # 5. 手動拆解波段
-        target_2005 = up_df[up_df['起漲日期 (前波破底)'] == '2005-10-28'].index
-        if not target_2005.empty:
-            idx = target_2005[0]
-            try:
-                p_data = fetch_data("^TWII", start_date="2005-10-20", end_date="2006-05-15")
-                if not p_data.empty:
-                    def get_p(d_str):
-                        mask = p_data.index.strftime('%Y-%m-%d') == d_str
-                        return p_data.loc[mask, 'Close'].iloc[0] if any(mask) else None
-                    p_0112, p_0324, p_0509 = get_p("2006-01-12"), get_p("2006-03-24"), get_p("2006-05-09")
-                    if p_0112 and p_0324 and p_0509:
-                        p_start1 = up_df.loc[idx, '起漲價格']
-                        up_df.at[idx, '最高日期 (下波前高)'] = '2006-01-12'
-                        up_df.at[idx, '最高價格 (或現價)'] = round(float(p_0112), 2)
-                        up_df.at[idx, '漲幅(%)'] = round((p_0112 - p_start1) / p_start1 * 100, 2)
-                        up_df.at[idx, '花費天數'] = (pd.to_datetime('2006-01-12') - pd.to_datetime('2005-10-28')).days
-                        new_wave = {'起漲日期 (前波破底)': '2006-03-24','最高日期 (下波前高)': '2006-05-09','起漲價格': round(float(p_0324), 2),'最高價格 (或現價)': round(float(p_0509), 2),'漲幅(%)': round((p_0509 - p_0324) / p_0324 * 100, 2),'花費天數': (pd.to_datetime('2006-05-09') - pd.to_datetime('2006-03-24')).days,'狀態': '已完結'}
-                        up_df = pd.concat([up_df, pd.DataFrame([new_wave])], ignore_index=True)
-            except: pass
-
     # 檢查是否有進行中的反彈波段
     is_ongoing = False
     if not up_df.empty and up_df.iloc[-1]['狀態'] == '進行中':
@@ -1117,38 +528,15 @@ def page_upward_bias():
     total_waves = len(up_df)
     total_finished = len(final_waves)
     
-    # 重新計算機率以對齊清洗後的筆數
-    p10 = round(len(final_waves[final_waves['漲幅(%)'] >= 10]) / total_finished * 100, 1) if total_finished > 0 else 0
-    p20 = round(len(final_waves[final_waves['漲幅(%)'] >= 20]) / total_finished * 100, 1) if total_finished > 0 else 0
-    p30 = round(len(final_waves[final_waves['漲幅(%)'] >= 30]) / total_finished * 100, 1) if total_finished > 0 else 0
-    p40 = round(len(final_waves[final_waves['漲幅(%)'] >= 40]) / total_finished * 100, 1) if total_finished > 0 else 0
-    p50 = round(len(final_waves[final_waves['漲幅(%)'] >= 50]) / total_finished * 100, 1) if total_finished > 0 else 0
+    # 各級機率以清洗後的已完結波段計算 (與全站共用快照同一套算法)
+    probs = market_snapshot.upward_probabilities(up_df)
+    p10, p20, p30, p40, p50 = (probs[level] for level in market_snapshot.UP_LEVELS)
     
-    match_prob = p10 if current_bounce < 20 else (p20 if current_bounce < 30 else (p30 if current_bounce < 40 else (p40 if current_bounce < 50 else p50)))
+    ci = metrics.get('CI', {})
+    match_prob = market_snapshot.matched_upward_probability(current_bounce, probs)
 
-    # --- [核心數據同步至 AI] ---
-    st.session_state['market_snapshot']['upward_bounce'] = f"{current_bounce:.1f}%"
-    st.session_state['market_snapshot']['upward_prob'] = f"{match_prob}%"
     st.session_state['market_snapshot']['current_page'] = "上漲強度統計"
 
-    # 注入呼吸燈 CSS
-    st.markdown(f"""
-    <style>
-    @keyframes hub-frame-breathe-up {{
-      0% {{ border-color: #334155; box-shadow: 0 10px 30px rgba(0,0,0,0.5); }}
-      50% {{ border-color: {score_color}; box-shadow: 0 0 45px {score_color}33; }}
-      100% {{ border-color: #334155; box-shadow: 0 10px 30px rgba(0,0,0,0.5); }}
-    }}
-    @keyframes circle-glow-breathe-up {{
-      0% {{ filter: drop-shadow(0 0 10px {score_color}22); transform: scale(1); opacity: 0.7; }}
-      50% {{ filter: drop-shadow(0 0 60px {score_color}FF); transform: scale(1.05); opacity: 1; }}
-      100% {{ filter: drop-shadow(0 0 10px {score_color}22); transform: scale(1); opacity: 0.7; }}
-    }}
-    .hud-main-frame-up {{ animation: hub-frame-breathe-up 4s infinite ease-in-out; }}
-    .gauge-circle-breathe-up {{ animation: circle-glow-breathe-up 3s infinite ease-in-out; transform-origin: center; }}
-    </style>
-    """, unsafe_allow_html=True)
-
     def get_step_style(threshold, active_color):
         glow_css = f"box-shadow: 0 0 35px {active_color}99, 0 0 65px {active_color}55, inset 0 0 15px rgba(255,255,255,0.15);"
         if current_bounce >= threshold:
@@ -1162,18 +550,18 @@ def page_upward_bias():
         return ""
 
     steps_html = f"""<div style="display:grid; grid-template-columns: repeat(5, 1fr); gap:12px; margin-top:45px; position:relative;">
-<div style="{get_step_style(10, '#10B981')} padding:22px 5px; border-radius:12px; text-align:center; position:relative; transition: all 0.4s ease;">{get_arrow(10)}<div style="font-size:13px; margin-bottom:8px; font-weight:950;">>=10% 漲幅</div><div style="font-family:'JetBrains Mono'; font-size:26px;">{p10}%</div></div>
-<div style="{get_step_style(20, '#10B981')} padding:22px 5px; border-radius:12px; text-align:center; position:relative; transition: all 0.4s ease;">{get_arrow(20)}<div style="font-size:13px; margin-bottom:8px; font-weight:950;">>=20% 漲幅</div><div style="font-family:'JetBrains Mono'; font-size:26px;">{p20}%</div></div>
-<div style="{get_step_style(30, '#F59E0B')} padding:22px 5px; border-radius:12px; text-align:center; position:relative; transition: all 0.4s ease;">{get_arrow(30)}<div style="font-size:13px; margin-bottom:8px; font-weight:950;">>=30% 警告</div><div style="font-family:'JetBrains Mono'; font-size:26px;">{p30}%</div></div>
-<div style="{get_step_style(40, '#EF4444')} padding:22px 5px; border-radius:12px; text-align:center; position:relative; transition: all 0.4s ease;">{get_arrow(40)}<div style="font-size:13px; margin-bottom:8px; font-weight:950;">>=40% 警戒</div><div style="font-family:'JetBrains Mono'; font-size:26px;">{p40}%</div></div>
-<div style="{get_step_style(50, '#A855F7')} padding:22px 5px; border-radius:12px; text-align:center; position:relative; transition: all 0.4s ease;">{get_arrow(50)}<div style="font-size:13px; margin-bottom:8px; font-weight:950;">>=50% 極端</div><div style="font-family:'JetBrains Mono'; font-size:26px;">{p50}%</div></div></div>"""
+<div style="{get_step_style(10, '#10B981')} padding:22px 5px; border-radius:12px; text-align:center; position:relative; transition: all 0.4s ease;">{get_arrow(10)}<div style="font-size:13px; margin-bottom:8px; font-weight:950;">>=10% 漲幅</div><div style="font-family:'JetBrains Mono'; font-size:26px;">{p10}%</div>{ci_badge(ci, '漲幅超過 10% 機率')}</div>
+<div style="{get_step_style(20, '#10B981')} padding:22px 5px; border-radius:12px; text-align:center; position:relative; transition: all 0.4s ease;">{get_arrow(20)}<div style="font-size:13px; margin-bottom:8px; font-weight:950;">>=20% 漲幅</div><div style="font-family:'JetBrains Mono'; font-size:26px;">{p20}%</div>{ci_badge(ci, '漲幅超過 20% 機率')}</div>
+<div style="{get_step_style(30, '#F59E0B')} padding:22px 5px; border-radius:12px; text-align:center; position:relative; transition: all 0.4s ease;">{get_arrow(30)}<div style="font-size:13px; margin-bottom:8px; font-weight:950;">>=30% 警告</div><div style="font-family:'JetBrains Mono'; font-size:26px;">{p30}%</div>{ci_badge(ci, '漲幅超過 30% 機率')}</div>
+<div style="{get_step_style(40, '#EF4444')} padding:22px 5px; border-radius:12px; text-align:center; position:relative; transition: all 0.4s ease;">{get_arrow(40)}<div style="font-size:13px; margin-bottom:8px; font-weight:950;">>=40% 警戒</div><div style="font-family:'JetBrains Mono'; font-size:26px;">{p40}%</div>{ci_badge(ci, '漲幅超過 40% 機率')}</div>
+<div style="{get_step_style(50, '#A855F7')} padding:22px 5px; border-radius:12px; text-align:center; position:relative; transition: all 0.4s ease;">{get_arrow(50)}<div style="font-size:13px; margin-bottom:8px; font-weight:950;">>=50% 極端</div><div style="font-family:'JetBrains Mono'; font-size:26px;">{p50}%</div>{ci_badge(ci, '漲幅超過 50% 機率')}</div></div>"""
 
     progress_cap, circumference = 50, 565.48
     clamped_bounce = min(current_bounce, progress_cap)
     dash_offset = circumference * (1 - clamped_bounce / progress_cap)
 
     hud_content = f"""
-<div class="hud-main-frame-up" style="background:#0F172A; border:4px solid #334155; border-radius:16px; padding:50px; margin-bottom:40px; box-shadow:0 30px 60px rgba(0,0,0,0.6); overflow:hidden; position:relative;">
+<div class="hud-main-frame-up" style="{hud_color_vars(score_color)} background:#0F172A; border:4px solid #334155; border-radius:16px; padding:50px; margin-bottom:40px; box-shadow:0 30px 60px rgba(0,0,0,0.6); overflow:hidden; position:relative;">
 <div style="display:flex; justify-content:space-between; align-items:center; gap:60px;">
 <div style="flex:1.2; position:relative; display:flex; justify-content:center; align-items:center; min-height:400px;">
 <div style="position:absolute; width:300px; height:300px; border:1px solid rgba(255,255,255,0.05); border-radius:50%;"></div>
@@ -1202,7 +590,8 @@ def page_upward_bias():
 </div>
 </div>
 </div>"""
-    st.markdown(hud_content, unsafe_allow_html=True)
+    with telemetry.span('html:upward_hud'):
+        st.markdown(hud_content, unsafe_allow_html=True)
 
     # (已根據要求暫時移除歷史反彈漲幅區間分布圖表)
         
@@ -1213,140 +602,21 @@ def page_upward_bias():
         <div style="font-family:'JetBrains Mono'; font-size:16px; color:#64748B; font-weight:800; border:1px solid #334155; padding:5px 15px; border-radius:6px;">LOG_SYSTEM // SURGE_RECORDS_v4.2</div>
     </div>
     """, unsafe_allow_html=True)
-    sorted_waves = up_df.sort_values(by='起漲日期 (前波破底)', ascending=False)
-    
-    for _, r in sorted_waves.iterrows():
-        gain = float(r['漲幅(%)'])
-        pts_gain = float(r['最高價格 (或現價)']) - float(r['起漲價格'])
-        days = int(r['花費天數'])
-        status = r['狀態']
-        
-        # 動能槽長度 (預設把 50% 漲幅當作視覺 100% 寬度)
-        energy_w = min(100.0, gain / 50.0 * 100)
-
-        # 基礎狀態設定
-        if status == '進行中':
-            date_display = f"{r['起漲日期 (前波破底)']} ➔ 至今"
-            tag_color = "#10B981"
-            tag_bg = "rgba(16, 185, 129, 0.15)"
-            icon = "🚀"
-        else:
-            date_display = f"{r['起漲日期 (前波破底)']} ➔ {r['最高日期 (下波前高)']}"
-            tag_color = "#64748B"
-            tag_bg = "rgba(100, 116, 139, 0.15)"
-            icon = "✅"
-            
-        # --- 自訂欄位邏輯 ---
-        # 標籤：依漲幅判斷
-        is_strong = gain >= 20.0
-        custom_tag_text = "強勢多頭" if is_strong else "一般反彈"
-        custom_tag_bg = "#EF4444" if is_strong else "#06B6D4" # 紅色代表強勢多頭，青色一般反彈
-        
-        pre_dd = r.get('前波清洗度(%)', 0)
-        pre_dd_display = f"{pre_dd:.1f}%" if pre_dd < 0 else "N/A"
-        
-        top_right_bg = "rgba(16, 185, 129, 0.05)" if gain > 0 else "rgba(239, 68, 68, 0.05)"
-        top_right_val_color = "#10B981" if gain > 0 else "#EF4444"
-        
-        # 新版 Mission Control HTML
-        html_log = f"""
-        <div style="background:#0F172A; border:5px solid #334155; border-radius:12px; margin-bottom:50px; overflow:hidden; width:100%; box-shadow:0 30px 60px rgba(0,0,0,0.5);">
-          <!-- 頂部區：巨星標題磚 -->
-          <div style="display:grid; grid-template-columns: 1fr 1fr; align-items:stretch; background:#1E293B; border-bottom:4px solid #475569;">
-            <div style="padding:35px 30px; border-right:4px solid #475569;">
-              <div style="display:flex; align-items:center; gap:20px; margin-bottom:15px;">
-                <span style="background:{tag_bg}; color:{tag_color}; padding:6px 16px; border-radius:6px; font-weight:950; font-size:18px; border:2px solid {tag_color}; box-shadow:0 0 15px {tag_color}44;">{icon} {status}</span>
-                <span style="font-size:24px; color:#94A3B8; font-weight:800; letter-spacing:1px;">波段上漲紀錄：</span>
-              </div>
-              <div style="font-size:32px; color:white; font-weight:950; letter-spacing:-1px; line-height:1; white-space:nowrap;">📅 {date_display}</div>
-              <div style="margin-top:25px; display:flex; align-items:center; gap:25px;">
-                <span style="color:#FFF; background:{custom_tag_bg}; padding:8px 25px; border-radius:10px; font-size:38px; font-weight:900; white-space:nowrap; border:2px solid rgba(255,255,255,0.3);">{custom_tag_text}</span>
-              </div>
-            </div>
-            <div style="text-align:center; background:{top_right_bg}; padding:35px 30px; display:flex; flex-direction:column; justify-content:center; align-items:center;">
-              <div style="font-size:24px; color:#94A3B8; font-weight:800; letter-spacing:1px; margin-bottom:15px;">波段噴發總週期：</div>
-              <div style="font-size:52px; color:{top_right_val_color}; font-weight:950; letter-spacing:-1px; line-height:1; margin-bottom:20px;">🚀 {days} <span style="font-size:24px; font-weight:800;">DAYS </span></div>
-            </div>
-          </div>
-
-          <!-- 中間層：故事線點位 -->
-          <div style="display:grid; grid-template-columns:1fr 1fr; gap:0; border-bottom:4px solid #475569;">
-            <div style="background:#450A0A; padding:45px 20px; text-align:center; border-right:4px solid #475569; display:flex; flex-direction:column; align-items:center;">
-              <div style="font-size:26px; color:#FCA5A5; font-weight:900; margin-bottom:10px; letter-spacing:1px;">[階段一] 波段起漲點</div>
-              <div style="font-size:18px; color:#F87171; font-weight:800; margin-bottom:25px;">(起漲於 {r['起漲日期 (前波破底)']})</div>
-              <div style="font-family:'JetBrains Mono'; font-size:52px; font-weight:950; color:white; line-height:1; margin-bottom:20px;">{r['起漲價格']:,.0f}</div>
-            </div>
-            <div style="background:#064E3B; padding:45px 20px; text-align:center; display:flex; flex-direction:column; align-items:center;">
-              <div style="font-size:26px; color:#6EE7B7; font-weight:900; margin-bottom:10px; letter-spacing:1px;">[階段二] 波段最高點</div>
-              <div style="font-size:18px; color:#34D399; font-weight:800; margin-bottom:25px;">(最高於 {r['最高日期 (下波前高)']})</div>
-              <div style="font-family:'JetBrains Mono'; font-size:52px; font-weight:950; color:white; line-height:1; margin-bottom:20px;">{r['最高價格 (或現價)']:,.0f}</div>
-            </div>
-          </div>
-
-          <!-- 底部層：動能槽 -->
-          <div style="background:#0F172A; padding:45px 55px; border:3px solid #F97316; margin:0;">
-            <div style="display:flex; justify-content:space-between; align-items:flex-end; margin-bottom:35px;">
-              <div style="font-size:34px; color:white; font-weight:950; display:flex; align-items:center; gap:12px; line-height:1;">⚡ 波段上漲幅度</div>
-              <div style="font-size:42px; color:#FBBF24; font-weight:950; letter-spacing:-1.5px; line-height:1; text-shadow: 0 0 20px rgba(251, 191, 36, 0.4); display:flex; align-items:baseline; gap:15px;">
-                  <span>+{pts_gain:.0f} ｜ +{gain:.1f}%</span>
-              </div>
-            </div>
-            <div style="height:38px; background:rgba(2,6,23,0.95); border-radius:12px; overflow:hidden; border:3px solid #F97316; padding:3px; box-shadow:inset 0 4px 10px rgba(0,0,0,0.6);">
-              <div style="width:{energy_w}%; height:100%; background:linear-gradient(90deg, #FDE68A 0%, #FBBF24 50%, #F97316 100%); border-radius:8px; box-shadow:0 0 25px rgba(249, 115, 22, 0.4);"></div>
-            </div>
-            <div style="margin-top:25px; text-align:right;">
-              <span style="color:#64748B; font-family:'JetBrains Mono'; font-size:14px; font-weight:700;">MOMENTUM_STRENGTH: {energy_w:.1f}% / 50%_EXTREME</span>
-            </div>
-          </div>
-        </div>
-        """
-
-        st.markdown(html_log, unsafe_allow_html=True)
+    render_event_log('upward')
 
 
 def page_downward_bias():
     log_visit("股市回檔統計表")
+    apply_page_css('wave_hud')
     
-    @st.cache_data(ttl=1, show_spinner=False)
-    def get_analysis(ticker_symbol):
-        df = fetch_data(ticker_symbol, start_date="2000-01-01")
-        if df.empty:
-            return df, pd.DataFrame(), {}, pd.DataFrame(), 0, "N/A"
-            
-        events_df = analyze_7pct_strategy(df, trigger_pct=7.0)
-        metrics, dist_df = calculate_7pct_statistics(events_df)
-        
-        last_close = df['Close'].iloc[-1]
-        last_date = df.index[-1].strftime('%Y-%m-%d')
-        
-        is_ongoing = False
-        ongoing_event = None
-        if not events_df.empty:
-            if events_df.iloc[-1]['狀態'] == '進行中':
-                is_ongoing = True
-                ongoing_event = events_df.iloc[-1]
-                
-        if is_ongoing:
-            current_dd = (ongoing_event['前高價格'] - last_close) / ongoing_event['前高價格'] * 100
-        else:
-            last_rec_date_str = events_df.iloc[-1]['解套日期'] if not events_df.empty else '2000-01-01'
-            try:
-                 recent_df = df.loc[last_rec_date_str:]
-                 recent_high = recent_df['High'].max()
-                 current_dd = (recent_high - last_close) / recent_high * 100
-            except:
-                 recent_high = df['High'].iloc[-1]
-                 current_dd = 0
-
-        return df, events_df, metrics, dist_df, current_dd, last_date
-
     # 固定監控台股加權指數
     symbol = "^TWII"
-    df, events_df, metrics, dist_df, current_dd, last_date = get_analysis(symbol)
+    try:
+        df, events_df, metrics, dist_df, current_dd, last_date = analytics_service.get_downward_analysis(symbol)
+    except Exception as e:
+        st.error(f"獲取資料時發生錯誤：{e}")
+        return
 
-    # --- [核心數據同步至 AI] ---
-    st.session_state['market_snapshot']['downward_dd'] = f"{current_dd:.1f}%"
-    st.session_state['market_snapshot']['downward_risk_p10'] = f"{metrics.get('跌幅超過 10% 機率', 0)}%"
     st.session_state['market_snapshot']['current_page'] = "下跌強度監控"
 
     if df.empty or events_df.empty:
@@ -1415,6 +685,7 @@ def page_downward_bias():
     p20 = metrics.get('跌幅超過 20% 機率', 0)
     p30 = metrics.get('跌幅超過 30% 機率', 0)
     p50 = metrics.get('跌幅超過 50% 機率', 0)
+    ci = metrics.get('CI', {})
     
     # 儀表盤樣式預設 (高彩度霓虹版)
     def get_step_style(threshold, active_color):
@@ -1440,26 +711,31 @@ def page_downward_bias():
 {get_arrow(10)}
 <div style="font-size:13px; margin-bottom:8px; font-weight:950;">跌到 10%</div>
 <div style="font-family:'JetBrains Mono'; font-size:26px;">{p10}%</div>
+{ci_badge(ci, '跌幅超過 10% 機率')}
 </div>
 <div style="{get_step_style(15, '#F59E0B')} padding:22px 5px; border-radius:12px; text-align:center; position:relative; transition: all 0.4s ease;">
 {get_arrow(15)}
 <div style="font-size:13px; margin-bottom:8px; font-weight:950;">跌到 15%</div>
 <div style="font-family:'JetBrains Mono'; font-size:26px;">{p15}%</div>
+{ci_badge(ci, '跌幅超過 15% 機率')}
 </div>
 <div style="{get_step_style(20, '#EF4444')} padding:22px 5px; border-radius:12px; text-align:center; position:relative; transition: all 0.4s ease;">
 {get_arrow(20)}
 <div style="font-size:13px; margin-bottom:8px; font-weight:950;">跌到 20%</div>
 <div style="font-family:'JetBrains Mono'; font-size:26px;">{p20}%</div>
+{ci_badge(ci, '跌幅超過 20% 機率')}
 </div>
 <div style="{get_step_style(30, '#DC2626')} padding:22px 5px; border-radius:12px; text-align:center; position:relative; transition: all 0.4s ease;">
 {get_arrow(30)}
 <div style="font-size:13px; margin-bottom:8px; font-weight:950;">跌到 30%</div>
 <div style="font-family:'JetBrains Mono'; font-size:26px;">{p30}%</div>
+{ci_badge(ci, '跌幅超過 30% 機率')}
 </div>
 <div style="{get_step_style(50, '#A855F7')} padding:22px 5px; border-radius:12px; text-align:center; position:relative; transition: all 0.4s ease;">
 {get_arrow(50)}
 <div style="font-size:13px; margin-bottom:8px; font-weight:950;">恐佈大崩盤</div>
 <div style="font-family:'JetBrains Mono'; font-size:26px;">{p50}%</div>
+{ci_badge(ci, '跌幅超過 50% 機率')}
 </div>
 </div>""".strip()
 
@@ -1481,32 +757,8 @@ def page_downward_bias():
     else:
         dd_stage_text = "⚓ 目前還安全"
 
-    # 注入 HUD 專屬呼吸燈 CSS
-    st.markdown(f"""
-    <style>
-    @keyframes hub-frame-breathe {{
-      0% {{ border-color: #334155; box-shadow: 0 10px 30px rgba(0,0,0,0.5); }}
-      50% {{ border-color: {score_color}; box-shadow: 0 0 45px {score_color}33; }}
-      100% {{ border-color: #334155; box-shadow: 0 10px 30px rgba(0,0,0,0.5); }}
-    }}
-    @keyframes circle-glow-breathe {{
-      0% {{ filter: drop-shadow(0 0 10px {score_color}22); transform: rotate(-90deg) scale(1); opacity: 0.7; }}
-      50% {{ filter: drop-shadow(0 0 60px {score_color}FF); transform: rotate(-90deg) scale(1.05); opacity: 1; }}
-      100% {{ filter: drop-shadow(0 0 10px {score_color}22); transform: rotate(-90deg) scale(1); opacity: 0.7; }}
-    }}
-    @keyframes cyber-box-breathe {{
-      0% {{ box-shadow: 0 0 10px rgba(56, 189, 248, 0.2); border-color: rgba(56, 189, 248, 0.3); }}
-      50% {{ box-shadow: 0 0 30px rgba(56, 189, 248, 0.6); border-color: rgba(56, 189, 248, 1); }}
-      100% {{ box-shadow: 0 0 10px rgba(56, 189, 248, 0.2); border-color: rgba(56, 189, 248, 0.3); }}
-    }}
-    .hud-main-frame {{ animation: hub-frame-breathe 4s infinite ease-in-out; }}
-    .gauge-circle-breathe {{ animation: circle-glow-breathe 3s infinite ease-in-out; transform-origin: center; }}
-    .cyber-inner-box {{ border-color: rgba(56, 189, 248, 0.5); box-shadow: 0 0 30px rgba(56, 189, 248, 0.2); }} 
-    </style>
-    """, unsafe_allow_html=True)
-
     hud_html = f"""
-<div class="hud-main-frame" style="background:#0F172A; border:2px solid rgba(255,255,255,0.08); border-radius:24px; padding:50px; margin-bottom:40px; box-shadow:0 40px 80px rgba(0,0,0,0.8); overflow:hidden; position:relative;">
+<div class="hud-main-frame" style="{hud_color_vars(score_color)} background:#0F172A; border:2px solid rgba(255,255,255,0.08); border-radius:24px; padding:50px; margin-bottom:40px; box-shadow:0 40px 80px rgba(0,0,0,0.8); overflow:hidden; position:relative;">
 <div style="display:flex; justify-content:space-between; align-items:center; gap:60px;">
 <!-- 左側：航行儀表盤 -->
 <div style="flex:1.2; position:relative; display:flex; justify-content:center; align-items:center; min-height:400px;">
@@ -1539,7 +791,8 @@ def page_downward_bias():
 </div>
 </div>
 """
-    st.markdown(hud_html, unsafe_allow_html=True)
+    with telemetry.span('html:downward_hud'):
+        st.markdown(hud_html, unsafe_allow_html=True)
     
     # --- 4. 電子流水日誌 (對稱標準版) ---
     st.markdown(f"""
@@ -1550,134 +803,7 @@ def page_downward_bias():
     """, unsafe_allow_html=True)
 
     if not events_df.empty:
-        # 注入呼吸燈 CSS 動畫
-        st.markdown("""
-        <style>
-        @keyframes breathe-red {
-          0% { box-shadow: 0 0 5px rgba(239, 68, 68, 0.2); border-color: rgba(239, 68, 68, 0.4); opacity: 0.8; }
-          50% { box-shadow: 0 0 20px rgba(239, 68, 68, 0.8); border-color: rgba(239, 68, 68, 1); opacity: 1; }
-          100% { box-shadow: 0 0 5px rgba(239, 68, 68, 0.2); border-color: rgba(239, 68, 68, 0.4); opacity: 0.8; }
-        }
-        @keyframes breathe-green {
-          0% { box-shadow: 0 0 5px rgba(16, 185, 129, 0.2); border-color: rgba(16, 185, 129, 0.4); opacity: 0.8; }
-          50% { box-shadow: 0 0 20px rgba(16, 185, 129, 0.8); border-color: rgba(16, 185, 129, 1); opacity: 1; }
-          100% { box-shadow: 0 0 5px rgba(16, 185, 129, 0.2); border-color: rgba(16, 185, 129, 0.4); opacity: 0.8; }
-        }
-        @keyframes text-glow-red {
-          0% { text-shadow: 0 0 10px rgba(255, 61, 61, 0.3); }
-          50% { text-shadow: 0 0 35px rgba(255, 61, 61, 0.8); }
-          100% { text-shadow: 0 0 10px rgba(255, 61, 61, 0.3); }
-        }
-        .breathe-red-node { animation: breathe-red 2.5s infinite ease-in-out; }
-        .breathe-green-node { animation: breathe-green 2.5s infinite ease-in-out; }
-        .text-glow-val-red { animation: text-glow-red 3s infinite ease-in-out; }
-        </style>
-        """, unsafe_allow_html=True)
-
-        for _, r in events_df.sort_values(by='觸發日期', ascending=False).iterrows():
-            total_dd = float(r['最大跌幅(%)'])
-            resid_dd = float(r['剩餘跌幅(%)'])
-            days_to_bottom = int(r['前高到破底天數'])
-            days_to_rec = r['解套總耗時']
-            status = r['狀態']
-            
-            trigger_date = r['觸發日期']
-            peak_date = r['前高日期']
-            bottom_date = r['破底日期']
-            rec_date = r['解套日期']
-            
-            trigger_price = float(r['觸發價格'])
-            peak_price = float(r['前高價格'])
-            bottom_price = float(r['破底最低價'])
-            pts_drop = peak_price - bottom_price
-            
-            w = min(100.0, (abs(total_dd) / 30) * 100) # 修正為 30% 滿版
-            
-            is_recovered = (status == "已解套")
-            
-            # 狀態標籤
-            label_status_bg = "rgba(16, 185, 129, 0.15)" if is_recovered else "rgba(239, 68, 68, 0.15)"
-            label_status_color = "#10B981" if is_recovered else "#EF4444"
-            label_status_icon = "✅" if is_recovered else "🚨"
-            label_status_text = f"{label_status_icon} {status}"
-
-            # 下拉標籤 (深度洗盤/一般回檔)
-            is_deep = abs(total_dd) >= 15.0
-            custom_tag_text = "深度洗盤" if is_deep else "一般回檔"
-            custom_tag_bg = "#8B5CF6" if is_deep else "#06B6D4" # 紫色代表深度洗盤，青色一般回檔
-            if abs(total_dd) >= 20.0: custom_tag_bg = "#EF4444" # 崩盤級別用紅色
-
-            # 頂部右側數值 (剩餘跌幅)
-            top_right_bg = "rgba(239, 68, 68, 0.05)" if resid_dd > 10 else "rgba(16, 185, 129, 0.05)"
-            top_right_val_color = "#EF4444" if resid_dd > 10 else "#10B981"
-            res_dd_display = f"-{resid_dd:.1f}%" if resid_dd > 0 else f"{resid_dd:.1f}%"
-            
-            # 底部右側樣式
-            card_border = "#064E3B" if is_recovered else "#450A0A"
-            bot_right_neon_text = f"最大跌幅 -{abs(total_dd):.1f}%"
-            
-            if is_recovered:
-                recover_type = r.get('解套形式', '完全收復前高')
-                recover_txt = f"{recover_type} ({days_to_rec} 天)"
-            else:
-                recover_type = "套牢中"
-                recover_txt = f"{recover_type} ({days_to_rec} 天)"
-
-            card_html = f"""
-            <div style="background:#0F172A; border:5px solid #334155; border-radius:12px; margin-bottom:50px; overflow:hidden; width:100%; box-shadow:0 30px 60px rgba(0,0,0,0.5);">
-              <!-- 頂部區：巨星標題磚 -->
-              <div style="display:grid; grid-template-columns: 1fr 1fr; align-items:stretch; background:#1E293B; border-bottom:4px solid #475569;">
-                <div style="padding:35px 30px; border-right:4px solid #475569;">
-                  <div style="display:flex; align-items:center; gap:20px; margin-bottom:15px;">
-                    <span style="background:{label_status_bg}; color:{label_status_color}; padding:6px 16px; border-radius:6px; font-weight:950; font-size:18px; border:2px solid {label_status_color}; box-shadow:0 0 15px {label_status_color}44;">{label_status_text}</span>
-                    <span style="font-size:24px; color:#94A3B8; font-weight:800; letter-spacing:1px;">觸發警報日</span>
-                  </div>
-                  <div style="font-size:52px; color:white; font-weight:950; letter-spacing:-2px; line-height:1;">📅 {trigger_date}</div>
-                  <div style="margin-top:25px; display:flex; align-items:center; gap:25px;">
-                    <span style="color:#FFF; background:{custom_tag_bg}; padding:8px 25px; border-radius:10px; font-size:38px; font-weight:900; white-space:nowrap; border:2px solid rgba(255,255,255,0.3);">{custom_tag_text}</span>
-                  </div>
-                </div>
-                <div style="text-align:center; background:rgba(239, 68, 68, 0.05); padding:35px 30px; display:flex; flex-direction:column; justify-content:center; align-items:center;">
-                  <div style="font-size:24px; color:#94A3B8; font-weight:800; letter-spacing:1px; margin-bottom:15px;">下跌修正總耗時 :</div>
-                  <div style="font-size:52px; color:#EF4444; font-weight:950; letter-spacing:-1px; line-height:1; margin-bottom:20px;">🚀 {days_to_bottom} <span style="font-size:28px; font-weight:800;">個交易日</span></div>
-                  <div style="font-size:42px; color:#F87171; font-weight:900; white-space:nowrap;">▼ {pts_drop:,.0f} <span style="font-size:24px; font-weight:800; margin-left:5px;">點</span></div>
-                </div>
-              </div>
-
-              <!-- 中間層：故事線點位 -->
-              <div style="display:grid; grid-template-columns:1fr 1fr; gap:0; border-bottom:4px solid #475569;">
-                <div style="background:#450A0A; padding:45px 20px; text-align:center; border-right:4px solid #475569; display:flex; flex-direction:column; align-items:center;">
-                  <div style="font-size:26px; color:#FCA5A5; font-weight:900; margin-bottom:10px; letter-spacing:1px;">[階段一] 觸發警報點</div>
-                  <div style="font-size:18px; color:#F87171; font-weight:800; margin-bottom:25px;">(發生於 {trigger_date})</div>
-                  <div style="font-family:'JetBrains Mono'; font-size:52px; font-weight:950; color:white; line-height:1; margin-bottom:20px;">{trigger_price:,.0f}</div>
-                  <div class="breathe-red-node" style="background: rgba(69, 10, 10, 0.8); color: #FCA5A5; border: 2px solid #EF4444; padding: 4px 16px; border-radius: 6px; font-family: 'JetBrains Mono'; font-size:22px; font-weight:900;">距離前高約 -7%</div>
-                </div>
-                <div style="background:#0F172A; padding:45px 20px; text-align:center; display:flex; flex-direction:column; align-items:center;">
-                  <div style="font-size:26px; color:#A7F3D0; font-weight:900; margin-bottom:10px; letter-spacing:1px;">[階段二] 波段最低谷</div>
-                  <div style="font-size:18px; color:#34D399; font-weight:800; margin-bottom:25px;">(發生於 {bottom_date})</div>
-                  <div style="font-family:'JetBrains Mono'; font-size:52px; font-weight:950; color:white; line-height:1; margin-bottom:20px;">{bottom_price:,.0f}</div>
-                  <div class="breathe-green-node" style="background: rgba(30, 41, 59, 0.8); color: #CBD5E1; border: 2px solid #94A3B8; padding: 4px 16px; border-radius: 6px; font-family: 'JetBrains Mono'; font-size:22px; font-weight:900;">{bot_right_neon_text}</div>
-                </div>
-              </div>
-
-              <!-- 底部層：最終處置與進度條 -->
-              <div style="background:#0F172A; padding:45px 55px; border:3px solid #F97316; margin:0;">
-                <div style="display:flex; justify-content:space-between; align-items:flex-end; margin-bottom:35px;">
-                  <div style="font-size:34px; color:white; font-weight:950; display:flex; align-items:center; gap:12px; line-height:1;">☄️ 波段下跌幅度</div>
-                  <div class="text-glow-val-red" style="font-size:38px; color:#FF3D3D; font-weight:1000; letter-spacing:-1.5px; display:flex; align-items:baseline; gap:15px;">
-                    <span>-{pts_drop:.0f} ｜ {total_dd:.1f}%</span>
-                  </div>
-                </div>
-                <div style="height:38px; background:rgba(2,6,23,0.95); border-radius:12px; overflow:hidden; border:3px solid #F97316; padding:3px; box-shadow:inset 0 4px 10px rgba(0,0,0,0.6);">
-                  <div style="width:{w}%; height:100%; background:linear-gradient(90deg, #FDE68A 0%, #FBBF24 50%, #F97316 100%); border-radius:8px; box-shadow:0 0 25px rgba(249, 115, 22, 0.4);"></div>
-                </div>
-                <div style="margin-top:25px; display:flex; justify-content:flex-end; align-items:center;">
-                  <div class="breathe-green-node" style="color:#94A3B8; font-family:'JetBrains Mono'; font-size:16px; font-weight:900; padding:4px 12px; border-radius:6px;">波段點位 {bottom_price:,.0f} ({bottom_date}) | 跌幅 -{abs(total_dd):.1f}%</div>
-                </div>
-              </div>
-            </div>
-            """
-            st.markdown(card_html, unsafe_allow_html=True)
+        render_event_log('drawdown')
 
     st.write("<p style='text-align:center; color:#9CA3AF; font-size:12px; margin-top:80px;'>系統由 aver5678 量化模組驅動 | 回檔動能引擎: Strategy-7pct v3.2</p>", unsafe_allow_html=True)
 
@@ -1686,21 +812,21 @@ def page_admin_dashboard():
     st.title("🛡️ 站長專屬觀測後台")
     st.markdown("只有您才看得見的秘密基地！未來所有的登入帳號、付費訂閱、點擊流量都會匯集到這裡。")
     
-    st.subheader("👥 即時流量追蹤 (模擬)")
-    logs = st.session_state['visit_logs']
+    st.subheader("👥 即時流量追蹤")
+    traffic = visit_log.summary()
     
-    if len(logs) > 0:
-        logs_df = pd.DataFrame(logs)
-        
+    if traffic['total'] > 0:
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("總瀏覽次數", len(logs_df))
-            st.dataframe(logs_df.tail(20).iloc[::-1], use_container_width=True) # 顯示最近 20 筆
+            m1, m2 = st.columns(2)
+            m1.metric("總瀏覽次數", f"{traffic['total']:,}")
+            m2.metric("不重複使用者", traffic['unique_users'])
+            st.dataframe(traffic['recent'], use_container_width=True, hide_index=True) # 顯示最近 20 筆
             
         with col2:
             st.write("📌 **熱門模組分佈**")
-            page_counts = logs_df['瀏覽模組'].value_counts().reset_index()
-            page_counts.columns = ['模組', '次數']
+            import plotly.graph_objects as go
+            page_counts = traffic['pages']
             fig_pie = go.Figure(data=[go.Pie(labels=page_counts['模組'], values=page_counts['次數'], hole=.3)])
             fig_pie.update_layout(height=300, 
                                   margin=dict(l=0, r=0, t=30, b=0),
@@ -1708,10 +834,76 @@ def page_admin_dashboard():
                                   paper_bgcolor="rgba(0,0,0,0)",
                                   plot_bgcolor="rgba(0,0,0,0)")
             st.plotly_chart(fig_pie, use_container_width=True)
+
+        st.write("🕒 **近 48 小時流量**")
+        st.bar_chart(traffic['hourly'].set_index('時段'), height=220)
+        with st.expander("使用者造訪統計"):
+            st.dataframe(traffic['users'], use_container_width=True, hide_index=True)
             
     else:
         st.info("目前還沒有任何訪客記錄。")
         
+    st.write("---")
+    st.subheader("🗄️ 快取管理")
+    st.caption("各成品依資料版本快取、所有訪客共用。重建在背景執行，完成前繼續提供舊成品；「移除」則由下一位訪客觸發重算。")
+    entries = analytics_service.cache_entries()
+    if entries.empty:
+        st.info("目前沒有任何快取成品。")
+    else:
+        st.dataframe(entries, use_container_width=True, hide_index=True)
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            target = st.selectbox("選擇成品", [f"{d}:{t}" for d, t in zip(entries['資料集'], entries['代號'])],
+                                  key="cache_target")
+            dataset, _, ticker = target.rpartition(':')
+            cascade = st.checkbox("一併重建下游成品", value=True, key="cache_cascade")
+        with col2:
+            if dataset != 'daily' and st.button("♻️ 背景重建", key="btn_cache_rebuild"):
+                keys = analytics_service.rebuild(dataset, ticker, cascade=cascade)
+                st.toast(f"已排程重建 {len(keys)} 項成品" if keys else "此成品正在重建中")
+            if st.button(f"🔁 重新抓取 {ticker}", key="btn_cache_refetch"):
+                keys = analytics_service.refetch(ticker)
+                st.toast(f"已在背景重新抓取 {ticker} 並重建 {len(keys)} 項成品" if keys else "重新抓取已在進行中")
+        with col3:
+            if dataset != 'daily' and st.button("🗑️ 移除", key="btn_cache_drop"):
+                analytics_service.invalidate(dataset, ticker)
+                st.rerun()
+        jobs = analytics_service.rebuild_status()
+        if jobs:
+            with st.expander("背景重建紀錄"):
+                st.dataframe(pd.DataFrame([
+                    {'工作': job, '狀態': j['status'], '開始': j['started_at'].strftime("%H:%M:%S"),
+                     '完成': j['finished_at'].strftime("%H:%M:%S") if j['finished_at'] else '--',
+                     '成品數': len(j['keys']), '錯誤': j['error'] or ''} for job, j in jobs.items()
+                ]), use_container_width=True, hide_index=True)
+
+    st.write("---")
+    st.subheader("⏱️ 效能監測 (本行程最近量測)")
+    st.caption("fetch = Yahoo 下載、build:* = 分析引擎 / 圖表成品、page:* = 整頁執行、html:* = HTML 輸出；區段可巢狀 (外層含內層耗時)，每區段保留最近 1,024 筆。")
+    col1, col2 = st.columns([3, 2])
+    with col1:
+        st.write("📈 **延遲百分位數**")
+        st.dataframe(telemetry.latency_table(), use_container_width=True, hide_index=True)
+    with col2:
+        st.write("🗄️ **快取命中率**")
+        st.dataframe(telemetry.cache_table(), use_container_width=True, hide_index=True)
+        if st.button("重設量測", key="btn_reset_telemetry"):
+            telemetry.reset()
+            st.rerun()
+
+    st.write("---")
+    st.subheader("🔬 訊號樣本外驗證 (Walk-Forward)")
+    st.caption("以 10 年訓練窗推導門檻與機率，套用到之後 3 年測試窗；比較樣本內與樣本外命中率。")
+    if st.button("執行滾動驗證", key="btn_walk_forward"):
+        with st.spinner("逐折計算樣本內 / 樣本外命中率..."):
+            report, summary = analytics_service.get_walk_forward("^TWII")
+        st.dataframe(summary.rename(columns={
+            'rule': '規則', 'folds': '折數', 'in_sample_hit': '樣本內命中率(%)',
+            'out_of_sample_hit': '樣本外命中率(%)', 'n_test': '樣本外訊號數', 'gap': '差距(百分點)'
+        }), use_container_width=True, hide_index=True)
+        with st.expander("各折明細"):
+            st.dataframe(report, use_container_width=True, hide_index=True)
+
     st.write("---")
     st.subheader("⚙️ 假裝的串接說明：Google 登入設定檔")
     st.code("""
@@ -1735,11 +927,11 @@ def main():
         st.sidebar.markdown('<h1 style="border:none; margin-bottom:10px;">📊 台灣指數 | 量化戰情室</h1>', unsafe_allow_html=True)
         
         # 2. 注入 AI 助理按鈕 (已移動到主邏輯後執行，確保數據同步)
-        # inject_chatbot() (已移除)
+        # lazy_page("ui_chatbot", "inject_chatbot")() (已移除)
         
         pages = {
             "週期乖離監控系統": page_bias_analysis,
-            "景氣燈號觀測系統": page_biz_cycle,
+            "景氣燈號觀測系統": lazy_page("page_biz_cycle", "page_biz_cycle"),
             "大盤下跌強度統計": page_downward_bias,
             "大盤上漲強度統計": page_upward_bias
         }
@@ -1752,15 +944,18 @@ def main():
                     if st.button("🔄 刷新數據", help="強制重新載入所有腳本"):
                         st.rerun()
                 with col2:
-                    if st.button("🧹 清除緩存", help="重抓最原始資料"):
-                        st.cache_data.clear()
-                        st.cache_resource.clear()
-                        st.rerun()
+                    if st.button("🔁 重新抓取", help="背景重新下載 ^TWII 並重建其成品，新成品建好前各頁面繼續顯示上一版；個別成品請至「快取管理」"):
+                        if analytics_service.refetch("^TWII"):
+                            st.toast("已在背景重新抓取 ^TWII")
+                        else:
+                            st.toast("重新抓取已在進行中")
                 
+                warmup_state = warmup.warmup_status()
                 st.markdown(f"""
                     <div style="font-size:11px; color:#64748B; padding:5px; border-top:1px solid #334155; margin-top:10px;">
                         <b>當前權限：</b> {st.session_state.get('user_role', 'guest').upper()}<br>
-                        <b>管理員信箱：</b> {ADMIN_EMAIL}
+                        <b>管理員信箱：</b> {ADMIN_EMAIL}<br>
+                        <b>預熱狀態：</b> {warmup_state['status'].upper()} ({warmup_state['version'] or '--'})
                     </div>
                 """, unsafe_allow_html=True)
 
@@ -1774,21 +969,16 @@ def main():
         # 3. 右上角用戶中心
         render_top_nav_profile()
         
-        # 初始化核心數據緩存 (若不存在)
+        # session 專屬的情境 (目前頁面、相似情境)；頭條指標改讀全站共用快照 (analytics_service.get_market_snapshot)
         if 'market_snapshot' not in st.session_state:
-            st.session_state['market_snapshot'] = {
-                "bias_40w": "待載入...",
-                "index_price": "待載入...",
-                "upward_bounce": "待載入...",
-                "downward_dd": "待載入...",
-                "current_page": "導航中"
-            }
+            st.session_state['market_snapshot'] = {"current_page": "導航中"}
 
         # 執行對應的頁面函數 (會在執行過程中更新市場數據到 session_state)
-        pages[selection]()
+        with telemetry.span(f'page:{selection}'):
+            pages[selection]()
         
         # 3. 注入 AI 研究助理 (暫時移除，排除雲端干擾)
-        # inject_chatbot()
+        # lazy_page("ui_chatbot", "inject_chatbot")()
         
     except Exception as e:
         st.error("🆘 系統啟動發生嚴重衝突")
@@ -3,6 +3,9 @@ import json
 import urllib.parse
 import streamlit.components.v1 as components
 
+import analytics_service
+import market_snapshot
+
 def inject_chatbot():
     """
     雲端安全穩定版：在側邊欄直接嵌入 AI 戰情室，不再嘗試穿透父視窗 (解決 Cross-Origin 阻擋)
@@ -10,8 +13,13 @@ def inject_chatbot():
     if 'chatbot_visible' not in st.session_state:
         st.session_state.chatbot_visible = False
 
-    # 1. 準備數據打包
-    snapshot = st.session_state.get('market_snapshot', {})
+    # 1. 準備數據打包：頭條指標讀全站共用快照 (所有 session 一致)，再加上本 session 的情境
+    try:
+        shared = analytics_service.get_market_snapshot("^TWII")
+    except Exception as e:
+        print(f"Market snapshot unavailable: {e}")
+        shared = None
+    snapshot = {**market_snapshot.display(shared), **st.session_state.get('market_snapshot', {})}
     
     # 清洗數據：移除百分比符號與逗號，確保 Dify 變數讀取正常
     clean_data = {
@@ -19,6 +27,8 @@ def inject_chatbot():
         "bias_40w": str(snapshot.get("bias_40w", "None")).replace("%", ""),
         "upward_bounce": str(snapshot.get("upward_bounce", "None")).replace("%", ""),
         "downward_dd": str(snapshot.get("downward_dd", "None")).replace("%", ""),
+        # 歷史相似情境的後續走勢 (中位數 / 最差)，讓 AI 引用實際樣本而非固定說法
+        "analogue_outlook": snapshot.get("analogue_outlook", "None"),
         # 增加中文 key 以防萬一
         "當前報價": str(snapshot.get("index_price", "None")).replace(",", ""),
         "40週乖離率": str(snapshot.get("bias_40w", "None")).replace("%", "")
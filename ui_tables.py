@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+事件表元件 (Filtered, Paged Event Tables)
+
+以 event_store.EventStore 為底的共用顯示元件：篩選 (年份區間、狀態、類型、跌幅 / 漲幅區間)
+在伺服器端完成，瀏覽器只收到當頁的列 (st.dataframe) 或當頁的日誌卡片 (st.markdown)。
+任何篩選條件改變時 (on_change 回呼) 頁碼回到第 1 頁；資料更新後頁數變少、原頁碼超出範圍時也回到第 1 頁。
+"""
+import streamlit as st
+
+import event_cards
+
+TABLE_ROWS_PER_PAGE = 20
+
+
+def _reset_page(key):
+    st.session_state[f"{key}_page"] = 1
+
+
+def event_filters(store, key):
+    """
+    Render the filter bar of an event store.
+
+    Args:
+        store (event_store.EventStore): Indexed event table.
+        key (str): Widget key prefix (unique per table on the page).
+
+    Returns:
+        np.ndarray: Matching row positions (newest first).
+    """
+    years, filters = None, {}
+    with st.expander("🔎 篩選條件", expanded=False):
+        cols = st.columns(1 + len(store.facets))
+        if store.year_range and store.year_range[0] < store.year_range[1]:
+            years = cols[0].slider("年份區間", store.year_range[0], store.year_range[1],
+                                   store.year_range, key=f"{key}_years", on_change=_reset_page, args=(key,))
+        for col, facet in zip(cols[1:], store.facets):
+            filters[facet] = col.multiselect(facet, store.options(facet), key=f"{key}_{facet}",
+                                             on_change=_reset_page, args=(key,))
+    return store.query(years, filters)
+
+
+def page_selector(positions, key, per_page):
+    """
+    Page number input over `positions`; returns the positions of the current page.
+    """
+    pages = event_cards.page_count(len(positions), per_page)
+    page_key = f"{key}_page"
+    # 資料更新後頁數變少時，原本的頁碼可能超出範圍
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = 1
+    number = 1
+    if pages > 1:
+        # 不傳 value：頁碼完全由 session_state 決定 (預設為 min_value)，避免 Streamlit 的重複設定警告
+        number = st.number_input(f"頁碼 (共 {pages} 頁 / {len(positions)} 筆，最新在前)",
+                                 min_value=1, max_value=pages, step=1, key=page_key)
+    return event_cards.page(positions, int(number), per_page)
+
+
+def render_event_table(store, key, columns=None, per_page=TABLE_ROWS_PER_PAGE):
+    """Filtered, paged st.dataframe of an event store (only the visible page is sent)."""
+    positions = event_filters(store, key)
+    if len(positions) == 0:
+        st.info("沒有符合篩選條件的紀錄。")
+        return
+    rows = store.rows(page_selector(positions, key, per_page), columns)
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+
+def render_event_cards(store, cards, key, per_page=event_cards.CARDS_PER_PAGE):
+    """Filtered, paged history log cards; `cards` line up with `store.frame` rows."""
+    positions = event_filters(store, key)
+    if len(positions) == 0:
+        st.info("沒有符合篩選條件的紀錄。")
+        return
+    st.markdown("\n".join(cards[page_selector(positions, key, per_page)]), unsafe_allow_html=True)
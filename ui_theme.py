@@ -1,327 +1,560 @@
+# -*- coding: utf-8 -*-
+"""
+全站主題樣式 (Global Theme Stylesheet)
+
+主題 CSS (約 300 行) 與各頁面 HUD / 日誌卡片的 @keyframes 動畫原本散落在各頁面，
+同一段動畫在 HUD 每次重繪時隨 f-string 重送一次，顏色不同就複製一份 keyframes。
+這裡把所有靜態樣式集中管理，會隨資料變化的顏色 (上漲 / 下跌 HUD 的呼吸燈) 改用 CSS 變數，
+由 hud_color_vars() 寫在元素的 style 上。送出方式：
+    1. 設定 TSE_THEME_CSS_URL (CDN / 反向代理，回傳 text/css) 時，完整樣式表依內容雜湊命名寫到
+       TSE_THEME_CSS_DIR/theme.<hash>.css，每次 rerun 只送一行 <link>，由瀏覽器快取
+    2. 未設定時，apply_global_theme() 內嵌全站主題，動畫由各頁面以 apply_page_css() 只內嵌自己用到的部分
+註：Streamlit 1.34 的靜態檔服務只以正確 MIME 提供圖片，.css 會以 text/plain + nosniff 送出，
+瀏覽器不會套用，因此不能直接用 enableStaticServing 提供樣式表。
+"""
+import hashlib
+import os
+
 import streamlit as st
 
+# 1. 全站主題 (字體、背景、側邊欄、卡片...)
+GLOBAL_CSS = """
+/* 1. 核心字體與全站背景 */
+@import url('https://fonts.googleapis.com/css2?family=JetBrains+Mono:wght@500;800&family=Inter:wght@400;700;900&display=swap');
+
+.stApp, .stAppViewContainer, .stMain, [data-testid="stHeader"], [data-testid="stSidebar"], .block-container {
+    background-color: #020617 !important;
+    color: #F8FAFC !important;
+    font-family: 'Inter', -apple-system, sans-serif !important;
+}
+
+/* 2. 側邊欄 (Sidebar) 面板化重塑 */
+section[data-testid="stSidebar"] {
+    background-color: #020617 !important;
+    width: 380px !important;
+    border-right: 1px solid rgba(56, 189, 248, 0.2) !important;
+}
+
+section[data-testid="stSidebar"] > div {
+    background-color: #020617 !important;
+    padding-top: 20px !important;
+}
+
+/* 解除 Streamlit 預設的大量左右留白，允許卡片擴張 */
+div[data-testid="stSidebarUserContent"] {
+    padding-left: 20px !important;
+    padding-right: 5px !important;
+    padding-top: 0px !important;
+}
+
+/* 隱藏原生圓點與 Navigation 標籤 */
+div[data-testid="stSidebarUserContent"] .stRadio div[role="radiogroup"] > label > div:first-child {
+    display: none !important;
+}
+div[data-testid="stSidebarUserContent"] .stRadio label[data-testid="stWidgetLabel"] {
+    display: none !important;
+    height: 0 !important;
+    margin: 0 !important;
+    padding: 0 !important;
+}
+
+/* 側邊欄分類標題 (SaaS 標章) */
+.sidebar-section-header {
+    font-size: 14px !important;
+    text-transform: uppercase !important;
+    letter-spacing: 3px !important;
+    color: #38BDF8 !important;
+    margin: 40px 0 20px 15px !important;
+    font-weight: 900 !important;
+    display: flex;
+    align-items: center;
+}
+.sidebar-section-header::after {
+    content: "";
+    flex: 1;
+    height: 1px;
+    background: linear-gradient(90deg, #38BDF8, transparent);
+    margin-left: 15px;
+    opacity: 0.3;
+}
+
+/* 3. 導覽項目：強制撐滿側邊欄容器 */
+div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] > div[role="radiogroup"] {
+    gap: 15px !important;
+    width: 100% !important;
+    display: flex !important;
+    flex-direction: column !important;
+    align-items: stretch !important;
+}
+
+div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] > div[role="radiogroup"] > label {
+    width: 100% !important;
+    max-width: 100% !important;
+    box-sizing: border-box !important;
+    background: rgba(30, 41, 59, 0.4) !important;
+    border: 1px solid rgba(56, 189, 248, 0.2) !important;
+    border-radius: 12px !important;
+    padding: 22px 20px !important;
+    margin-bottom: 0px !important;
+    transition: all 0.3s cubic-bezier(0.165, 0.84, 0.44, 1) !important;
+    color: #FFFFFF !important;
+    font-weight: 800 !important;
+    font-size: 19px !important;
+    font-family: 'JetBrains Mono', monospace !important;
+    opacity: 1 !important;
+    box-shadow: 0 4px 15px rgba(0,0,0,0.6) !important;
+    display: flex !important;
+    align-items: center !important;
+    justify-content: flex-start !important;
+    cursor: pointer !important;
+}
+
+/* 暴力強制所有狀態文字純白高亮與左對齊 */
+div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label p,
+div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label span,
+div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label div[data-testid="stMarkdownContainer"] {
+    color: #FFFFFF !important;
+    opacity: 1 !important;
+    font-size: 19px !important;
+    font-weight: 800 !important;
+    font-family: 'JetBrains Mono', monospace !important;
+    text-shadow: 0 2px 4px rgba(0,0,0,0.5) !important;
+    width: 100% !important;
+    text-align: left !important;
+    display: block !important;
+    margin: 0 !important;
+}
+
+/* Hover 時微浮起與發光 */
+div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label:hover {
+    transform: translateY(-5px) scale(1.02) !important;
+    background: #1E293B !important;
+    border-color: #38BDF8 !important;
+    box-shadow: 0 10px 30px rgba(56, 189, 248, 0.2) !important;
+}
+div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label:hover p {
+    color: #38BDF8 !important;
+}
+
+/* Active 選中項：霓虹指示燈效果 */
+div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label[data-checked="true"],
+div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label:has(input:checked) {
+    background: linear-gradient(90deg, rgba(56, 189, 248, 0.3) 0%, rgba(56, 189, 248, 0.05) 100%) !important;
+    border: 1px solid #38BDF8 !important;
+    border-left: 8px solid #38BDF8 !important;
+    box-shadow: 0 0 30px rgba(56, 189, 248, 0.3) !important;
+    transform: scale(1.02) !important;
+}
+div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label[data-checked="true"] p,
+div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label:has(input:checked) p {
+    color: #FFFFFF !important;
+    font-weight: 950 !important;
+    text-shadow: 0 0 15px rgba(255, 255, 255, 0.5) !important;
+}
+
+/* 4. 側邊面板光束邊緣 */
+section[data-testid="stSidebar"]::after {
+    content: "";
+    position: absolute;
+    right: 0;
+    top: 10%;
+    width: 2px;
+    height: 80%;
+    background: linear-gradient(180deg, transparent, #38BDF8, transparent);
+    box-shadow: 0 0 20px #38BDF8;
+}
+
+/* 5. 強化右側主標題設計 */
+.centered-title {
+    text-align: center !important;
+    font-size: 56px !important;
+    font-weight: 950 !important;
+    letter-spacing: -2px !important;
+    background: linear-gradient(135deg, #FFFFFF 0%, #94A3B8 100%);
+    -webkit-background-clip: text;
+    -webkit-text-fill-color: transparent;
+    margin: 60px 0 40px 0 !important;
+}
+
+/* 6. 對齊右側卡片 (技術感) */
+.tech-card {
+    position: relative;
+    background: #0F172A !important;
+    border: 1px solid #1E293B !important;
+    border-radius: 20px !important;
+    padding: 30px !important;
+    box-shadow: 0 20px 50px rgba(0,0,0,0.5) !important;
+}
+.tech-card::before {
+    content: "";
+    position: absolute;
+    top: -1px; left: -1px; width: 25px; height: 25px;
+    border-top: 3px solid #38BDF8; border-left: 3px solid #38BDF8;
+    border-top-left-radius: 20px;
+}
+
+/* 數據摘要卡片 */
+.summary-card {
+    text-align: center;
+    background: #1E293B !important;
+    padding: 25px !important;
+    border-radius: 20px !important;
+    border: 1px solid #334155 !important;
+    box-shadow: 0 10px 20px rgba(0,0,0,0.2) !important;
+}
+.summary-label {
+    font-size: 13px !important; color: #94A3B8 !important;
+    font-weight: 800 !important; letter-spacing: 1px !important;
+    text-transform: uppercase; margin-bottom: 10px !important;
+}
+.summary-value {
+    font-family: 'JetBrains Mono' !important; font-size: 42px !important;
+    font-weight: 900 !important; color: #FFFFFF !important;
+}
+
+/* 修正按鈕樣貌 */
+.stButton button {
+    background-color: #1E293B !important;
+    color: #FFFFFF !important;
+    border: 1px solid #38BDF8 !important;
+    border-radius: 12px !important;
+    width: 100% !important;
+    padding: 10px !important;
+    font-weight: 800 !important;
+    transition: all 0.2s ease !important;
+}
+.stButton button:hover {
+    background-color: #38BDF8 !important;
+    color: #020617 !important;
+    box-shadow: 0 0 20px rgba(56, 189, 248, 0.4) !important;
+}
+
+/* ---------------------------------------------------
+   下拉選單 (Selectbox) 暗黑玻璃化重塑
+   --------------------------------------------------- */
+
+/* 1. 標題文字 (Label) 亮度拯救 */
+div[data-testid="stSelectbox"] label p {
+    color: #FFFFFF !important;
+    font-weight: 800 !important;
+    font-size: 15px !important;
+    letter-spacing: 1px !important;
+}
+
+/* 2. 選單本體 (Dropdown box) 玻璃化與外框 */
+div[data-testid="stSelectbox"] div[data-baseweb="select"] > div {
+    background-color: rgba(15, 23, 42, 0.9) !important;
+    border: 2px solid #334155 !important;
+    border-radius: 8px !important;
+    color: #F1F5F9 !important;
+    transition: all 0.3s ease;
+}
+
+/* 3. 選單互動態 (Hover / Focus) 霓虹發光 */
+div[data-testid="stSelectbox"] div[data-baseweb="select"] > div:hover,
+div[data-testid="stSelectbox"] div[data-baseweb="select"] > div:focus-within {
+    border-color: #38BDF8 !important;
+    box-shadow: 0 0 15px rgba(56, 189, 248, 0.4) !important;
+}
+
+/* 4. 選單內文字與下拉箭頭 */
+div[data-testid="stSelectbox"] div[data-baseweb="select"] span {
+    color: #F1F5F9 !important;
+    font-weight: 700 !important;
+}
+svg[data-baseweb="icon"] {
+    color: #38BDF8 !important;
+}
+/* 7. 隱藏原生開發選單 (保留左側側邊欄開關，隱藏右側開發選單) */
+#MainMenu { display: none !important; }
+header { 
+    background-color: transparent !important;
+    border-bottom: none !important;
+}
+footer { visibility: hidden; }
+
+/* 讓側邊欄開關按鈕 (>) 變亮眼，方便您找回來 */
+button[data-testid="stHeaderSidebarButton"] {
+    background-color: rgba(56, 189, 248, 0.1) !important;
+    border: 1px solid rgba(56, 189, 248, 0.3) !important;
+    border-radius: 8px !important;
+    color: #38BDF8 !important;
+}
+/* 8. 右上角角落按鈕 (修正定位與質感) */
+#login-anchor + div {
+    position: fixed !important;
+    top: 20px !important;
+    right: 20px !important;
+    z-index: 999999 !important;
+    width: auto !important;
+}
+
+#login-anchor + div button {
+    background-color: #FFFFFF !important;
+    color: #3C4043 !important;
+    border: 1px solid #DADCE0 !important;
+    border-radius: 6px !important;
+    padding: 8px 20px !important;
+    font-size: 14px !important;
+    font-weight: 700 !important;
+    box-shadow: 0 1px 3px rgba(0,0,0,0.2) !important;
+    transition: all 0.2s !important;
+}
+
+#login-anchor + div button:hover {
+    background-color: #F8F9FA !important;
+    border-color: #38BDF8 !important;
+    transform: translateY(-1px) !important;
+    box-shadow: 0 4px 12px rgba(56, 189, 248, 0.2) !important;
+}
+
+/* 隱藏原生開發選單 */
+header[data-testid="stHeader"] {
+    background-color: transparent !important;
+}
+#MainMenu { visibility: hidden; }
+
+/* 已登入名片 - 也要釘在最右上角 */
+.user-status-card-fixed {
+    position: fixed !important;
+    top: 15px !important;
+    right: 15px !important;
+    z-index: 1000000 !important;
+    background: #1E293B !important;
+    border: 1px solid #38BDF8 !important;
+    border-radius: 12px !important;
+    padding: 5px 15px !important;
+    display: flex !important;
+    align-items: center !important;
+    gap: 10px !important;
+    box-shadow: 0 10px 30px rgba(0,0,0,0.5) !important;
+}
+
+@keyframes fadeIn {
+    from { opacity: 0; transform: translateY(-10px); }
+    to { opacity: 1; transform: translateY(0); }
+}
+"""
+
+# 2. 各頁面靜態動畫 (原本寫在各頁 HUD / 日誌的 <style> 區塊)，只在用到的頁面送出 (見 apply_page_css)
+PAGE_CSS = {
+    'bias_hud': """
+/* --- 乖離率 HUD / 決策面板 (tse_dashboard) --- */
+@keyframes alert-high-risk-flash {
+    0% { box-shadow: 0 0 15px rgba(239, 68, 68, 0.4); filter: brightness(1); }
+    50% { box-shadow: 0 0 45px rgba(239, 68, 68, 0.8); filter: brightness(1.3); }
+    100% { box-shadow: 0 0 15px rgba(239, 68, 68, 0.4); filter: brightness(1); }
+}
+@keyframes alert-bg-breathing-warm {
+    0% { filter: brightness(1); }
+    50% { filter: brightness(1.2); box-shadow: 0 0 25px rgba(251, 191, 36, 0.3); }
+    100% { filter: brightness(1); }
+}
+@keyframes cyber-scan-pulse {
+    0% { box-shadow: 0 0 20px rgba(56, 189, 248, 0.2); border-color: rgba(56, 189, 248, 0.3); filter: brightness(1); }
+    50% { box-shadow: 0 0 60px rgba(56, 189, 248, 0.7); border-color: rgba(56, 189, 248, 1); filter: brightness(1.5); }
+    100% { box-shadow: 0 0 20px rgba(56, 189, 248, 0.2); border-color: rgba(56, 189, 248, 0.3); filter: brightness(1); }
+}
+@keyframes pulse-solar-glow {
+0% { box-shadow: 0 0 15px rgba(249, 115, 22, 0.4); border-color: rgba(249, 115, 22, 0.6); }
+50% { box-shadow: 0 0 40px rgba(249, 115, 22, 0.9); border-color: rgba(249, 115, 22, 1); }
+100% { box-shadow: 0 0 15px rgba(249, 115, 22, 0.4); border-color: rgba(249, 115, 22, 0.6); }
+}
+""",
+    'wave_hud': """
+/* --- 上漲 / 下跌 HUD 呼吸燈：顏色由外框 style 的 --hud-* 變數帶入 (見 hud_color_vars) --- */
+@keyframes hub-frame-breathe-up {
+  0% { border-color: #334155; box-shadow: 0 10px 30px rgba(0,0,0,0.5); }
+  50% { border-color: var(--hud-color); box-shadow: 0 0 45px var(--hud-glow); }
+  100% { border-color: #334155; box-shadow: 0 10px 30px rgba(0,0,0,0.5); }
+}
+@keyframes circle-glow-breathe-up {
+  0% { filter: drop-shadow(0 0 10px var(--hud-glow-soft)); transform: scale(1); opacity: 0.7; }
+  50% { filter: drop-shadow(0 0 60px var(--hud-color)); transform: scale(1.05); opacity: 1; }
+  100% { filter: drop-shadow(0 0 10px var(--hud-glow-soft)); transform: scale(1); opacity: 0.7; }
+}
+.hud-main-frame-up { animation: hub-frame-breathe-up 4s infinite ease-in-out; }
+.gauge-circle-breathe-up { animation: circle-glow-breathe-up 3s infinite ease-in-out; transform-origin: center; }
+@keyframes hub-frame-breathe {
+  0% { border-color: #334155; box-shadow: 0 10px 30px rgba(0,0,0,0.5); }
+  50% { border-color: var(--hud-color); box-shadow: 0 0 45px var(--hud-glow); }
+  100% { border-color: #334155; box-shadow: 0 10px 30px rgba(0,0,0,0.5); }
+}
+@keyframes circle-glow-breathe {
+  0% { filter: drop-shadow(0 0 10px var(--hud-glow-soft)); transform: rotate(-90deg) scale(1); opacity: 0.7; }
+  50% { filter: drop-shadow(0 0 60px var(--hud-color)); transform: rotate(-90deg) scale(1.05); opacity: 1; }
+  100% { filter: drop-shadow(0 0 10px var(--hud-glow-soft)); transform: rotate(-90deg) scale(1); opacity: 0.7; }
+}
+@keyframes cyber-box-breathe {
+  0% { box-shadow: 0 0 10px rgba(56, 189, 248, 0.2); border-color: rgba(56, 189, 248, 0.3); }
+  50% { box-shadow: 0 0 30px rgba(56, 189, 248, 0.6); border-color: rgba(56, 189, 248, 1); }
+  100% { box-shadow: 0 0 10px rgba(56, 189, 248, 0.2); border-color: rgba(56, 189, 248, 0.3); }
+}
+.hud-main-frame { animation: hub-frame-breathe 4s infinite ease-in-out; }
+.gauge-circle-breathe { animation: circle-glow-breathe 3s infinite ease-in-out; transform-origin: center; }
+.cyber-inner-box { border-color: rgba(56, 189, 248, 0.5); box-shadow: 0 0 30px rgba(56, 189, 248, 0.2); }
+""",
+    'biz_cycle': """
+/* --- 景氣循環 HUD (page_biz_cycle) --- */
+@keyframes pulse-red-hazard-glow {
+  0% { box-shadow: 0 0 10px rgba(239, 68, 68, 0.4); border-color: rgba(239, 68, 68, 0.4); }
+  50% { box-shadow: 0 0 40px rgba(239, 68, 68, 0.8); border-color: rgba(239, 68, 68, 1); }
+  100% { box-shadow: 0 0 10px rgba(239, 68, 68, 0.4); border-color: rgba(239, 68, 68, 0.4); }
+}
+@keyframes pulse-green-expand-glow {
+  0% { border-color: rgba(16, 185, 129, 0.2); box-shadow: 0 0 10px rgba(16, 185, 129, 0.1); }
+  50% { border-color: rgba(16, 185, 129, 0.8); box-shadow: 0 0 30px rgba(16, 185, 129, 0.4); }
+  100% { border-color: rgba(16, 185, 129, 0.2); box-shadow: 0 0 10px rgba(16, 185, 129, 0.1); }
+}
+@keyframes pulse-blue-path-glow {
+  0% { border-color: rgba(56, 189, 248, 0.2); box-shadow: 0 0 10px rgba(56, 189, 248, 0.1); }
+  50% { border-color: rgba(56, 189, 248, 0.8); box-shadow: 0 0 30px rgba(56, 189, 248, 0.4); }
+  100% { border-color: rgba(56, 189, 248, 0.2); box-shadow: 0 0 10px rgba(56, 189, 248, 0.1); }
+}
+@keyframes pulse-red-tag-glow {
+  0% { box-shadow: 0 0 5px rgba(239, 68, 68, 0.2); border-color: rgba(239, 68, 68, 0.3); }
+  50% { box-shadow: 0 0 15px rgba(239, 68, 68, 0.6); border-color: rgba(239, 68, 68, 0.8); }
+  100% { box-shadow: 0 0 5px rgba(239, 68, 68, 0.2); border-color: rgba(239, 68, 68, 0.3); }
+}
+@keyframes pulse-green-tag-glow {
+  0% { box-shadow: 0 0 5px rgba(16, 185, 129, 0.2); border-color: rgba(16, 185, 129, 0.3); }
+  50% { box-shadow: 0 0 15px rgba(16, 185, 129, 0.6); border-color: rgba(16, 185, 129, 0.8); }
+  100% { box-shadow: 0 0 5px rgba(16, 185, 129, 0.2); border-color: rgba(16, 185, 129, 0.3); }
+}
+""",
+    'event_log': """
+/* --- 乖離回測日誌 / 7% 回檔日誌 (event_cards) --- */
+/* 方案 A: Neon Pro - 硬核電子儀表 */
+@keyframes neon-pulse-red {
+  0% { box-shadow: 0 0 5px rgba(239, 68, 68, 0.4); border-color: rgba(239, 68, 68, 0.5); transform: scale(1); }
+  50% { box-shadow: 0 0 20px rgba(239, 68, 68, 0.9); border-color: rgba(239, 68, 68, 1); transform: scale(1.02); }
+  100% { box-shadow: 0 0 5px rgba(239, 68, 68, 0.4); border-color: rgba(239, 68, 68, 0.5); transform: scale(1); }
+}
+@keyframes neon-pulse-green {
+  0% { box-shadow: 0 0 5px rgba(34, 197, 94, 0.4); border-color: rgba(34, 197, 94, 0.5); transform: scale(1); }
+  50% { box-shadow: 0 0 20px rgba(34, 197, 94, 0.9); border-color: rgba(34, 197, 94, 1); transform: scale(1.02); }
+  100% { box-shadow: 0 0 5px rgba(34, 197, 94, 0.4); border-color: rgba(34, 197, 94, 0.5); transform: scale(1); }
+}
+@keyframes neon-pulse-gray {
+  0% { box-shadow: 0 0 5px rgba(148, 163, 184, 0.4); border-color: rgba(148, 163, 184, 0.5); }
+  50% { box-shadow: 0 0 15px rgba(148, 163, 184, 0.8); border-color: rgba(148, 163, 184, 1); }
+  100% { box-shadow: 0 0 5px rgba(148, 163, 184, 0.4); border-color: rgba(148, 163, 184, 0.5); }
+}
+.bias-neon-red {
+  animation: neon-pulse-red 1.5s infinite ease-in-out;
+  background: rgba(69, 10, 10, 0.8); color: #FCA5A5; border: 2px solid #EF4444;
+  padding: 4px 16px; border-radius: 6px; font-family: 'JetBrains Mono';
+}
+.bias-neon-green {
+  animation: neon-pulse-green 1.5s infinite ease-in-out;
+  background: rgba(6, 78, 59, 0.8); color: #86EFAC; border: 2px solid #22C55E;
+  padding: 4px 16px; border-radius: 6px; font-family: 'JetBrains Mono';
+}
+.bias-neon-gray {
+  animation: neon-pulse-gray 2s infinite ease-in-out;
+  background: rgba(30, 41, 59, 0.8); color: #CBD5E1; border: 2px solid #94A3B8;
+  padding: 4px 12px; border-radius: 6px; font-family: 'JetBrains Mono';
+}
+@keyframes breathe-red {
+  0% { box-shadow: 0 0 5px rgba(239, 68, 68, 0.2); border-color: rgba(239, 68, 68, 0.4); opacity: 0.8; }
+  50% { box-shadow: 0 0 20px rgba(239, 68, 68, 0.8); border-color: rgba(239, 68, 68, 1); opacity: 1; }
+  100% { box-shadow: 0 0 5px rgba(239, 68, 68, 0.2); border-color: rgba(239, 68, 68, 0.4); opacity: 0.8; }
+}
+@keyframes breathe-green {
+  0% { box-shadow: 0 0 5px rgba(16, 185, 129, 0.2); border-color: rgba(16, 185, 129, 0.4); opacity: 0.8; }
+  50% { box-shadow: 0 0 20px rgba(16, 185, 129, 0.8); border-color: rgba(16, 185, 129, 1); opacity: 1; }
+  100% { box-shadow: 0 0 5px rgba(16, 185, 129, 0.2); border-color: rgba(16, 185, 129, 0.4); opacity: 0.8; }
+}
+@keyframes text-glow-red {
+  0% { text-shadow: 0 0 10px rgba(255, 61, 61, 0.3); }
+  50% { text-shadow: 0 0 35px rgba(255, 61, 61, 0.8); }
+  100% { text-shadow: 0 0 10px rgba(255, 61, 61, 0.3); }
+}
+.breathe-red-node { animation: breathe-red 2.5s infinite ease-in-out; }
+.breathe-green-node { animation: breathe-green 2.5s infinite ease-in-out; }
+.text-glow-val-red { animation: text-glow-red 3s infinite ease-in-out; }
+""",
+}
+
+# 完整樣式表 (外部 text/css 服務使用)
+THEME_CSS = GLOBAL_CSS + "".join(PAGE_CSS.values())
+THEME_FINGERPRINT = hashlib.sha1(THEME_CSS.encode('utf-8')).hexdigest()[:12]
+
+# 回傳 text/css 的外部位置 (CDN 或反向代理，例如 nginx: location /theme/ { alias <STATIC_DIR>/; })；
+# 未設定時樣式改為內嵌 <style>
+STYLESHEET_URL = os.environ.get("TSE_THEME_CSS_URL", "").rstrip("/")
+STATIC_DIR = os.environ.get("TSE_THEME_CSS_DIR",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
+
+# 每個行程只寫一次樣式表 (None = 尚未發布, '' = 發布失敗改用內嵌)
+_published = None
+
+
+def hud_color_vars(color):
+    """
+    Inline CSS custom properties that colour the breathing HUD animations.
+
+    Args:
+        color (str): Hex colour such as '#EF4444'.
+
+    Returns:
+        str: Declarations to put in the HUD frame's `style` attribute.
+    """
+    return f"--hud-color:{color}; --hud-glow:{color}33; --hud-glow-soft:{color}22;"
+
+
+def publish_stylesheet():
+    """
+    Write the fingerprinted stylesheet to STATIC_DIR (once per process) and drop stale versions.
+
+    Returns:
+        str: File name of the stylesheet, or '' when no external URL is configured or it could not be written.
+    """
+    global _published
+    if _published is not None:
+        return _published
+    if not STYLESHEET_URL:
+        _published = ''
+        return _published
+    name = f"theme.{THEME_FINGERPRINT}.css"
+    try:
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        path = os.path.join(STATIC_DIR, name)
+        if not os.path.exists(path):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(THEME_CSS)
+            os.replace(tmp, path)
+        for old in os.listdir(STATIC_DIR):
+            if old.startswith('theme.') and old.endswith('.css') and old != name:
+                os.remove(os.path.join(STATIC_DIR, old))
+        _published = name
+    except Exception as e:
+        print(f"Theme stylesheet publish failed, falling back to inline CSS: {e}")
+        _published = ''
+    return _published
+
+
 def apply_global_theme():
     """
     指揮官專屬：SaaS 級量化交易終端美學 v5.0
     核心技術：全站黑化同步、導航卡片化、100% 高對比文字、發光指示條
     """
-    st.markdown("""
-        <style>
-        /* 1. 核心字體與全站背景 */
-        @import url('https://fonts.googleapis.com/css2?family=JetBrains+Mono:wght@500;800&family=Inter:wght@400;700;900&display=swap');
-        
-        .stApp, .stAppViewContainer, .stMain, [data-testid="stHeader"], [data-testid="stSidebar"], .block-container {
-            background-color: #020617 !important;
-            color: #F8FAFC !important;
-            font-family: 'Inter', -apple-system, sans-serif !important;
-        }
-
-        /* 2. 側邊欄 (Sidebar) 面板化重塑 */
-        section[data-testid="stSidebar"] {
-            background-color: #020617 !important;
-            width: 380px !important;
-            border-right: 1px solid rgba(56, 189, 248, 0.2) !important;
-        }
-
-        section[data-testid="stSidebar"] > div {
-            background-color: #020617 !important;
-            padding-top: 20px !important;
-        }
-
-        /* 解除 Streamlit 預設的大量左右留白，允許卡片擴張 */
-        div[data-testid="stSidebarUserContent"] {
-            padding-left: 20px !important;
-            padding-right: 5px !important;
-            padding-top: 0px !important;
-        }
-
-        /* 隱藏原生圓點與 Navigation 標籤 */
-        div[data-testid="stSidebarUserContent"] .stRadio div[role="radiogroup"] > label > div:first-child {
-            display: none !important;
-        }
-        div[data-testid="stSidebarUserContent"] .stRadio label[data-testid="stWidgetLabel"] {
-            display: none !important;
-            height: 0 !important;
-            margin: 0 !important;
-            padding: 0 !important;
-        }
-
-        /* 側邊欄分類標題 (SaaS 標章) */
-        .sidebar-section-header {
-            font-size: 14px !important;
-            text-transform: uppercase !important;
-            letter-spacing: 3px !important;
-            color: #38BDF8 !important;
-            margin: 40px 0 20px 15px !important;
-            font-weight: 900 !important;
-            display: flex;
-            align-items: center;
-        }
-        .sidebar-section-header::after {
-            content: "";
-            flex: 1;
-            height: 1px;
-            background: linear-gradient(90deg, #38BDF8, transparent);
-            margin-left: 15px;
-            opacity: 0.3;
-        }
-
-        /* 3. 導覽項目：強制撐滿側邊欄容器 */
-        div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] > div[role="radiogroup"] {
-            gap: 15px !important;
-            width: 100% !important;
-            display: flex !important;
-            flex-direction: column !important;
-            align-items: stretch !important;
-        }
-
-        div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] > div[role="radiogroup"] > label {
-            width: 100% !important;
-            max-width: 100% !important;
-            box-sizing: border-box !important;
-            background: rgba(30, 41, 59, 0.4) !important;
-            border: 1px solid rgba(56, 189, 248, 0.2) !important;
-            border-radius: 12px !important;
-            padding: 22px 20px !important;
-            margin-bottom: 0px !important;
-            transition: all 0.3s cubic-bezier(0.165, 0.84, 0.44, 1) !important;
-            color: #FFFFFF !important;
-            font-weight: 800 !important;
-            font-size: 19px !important;
-            font-family: 'JetBrains Mono', monospace !important;
-            opacity: 1 !important;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.6) !important;
-            display: flex !important;
-            align-items: center !important;
-            justify-content: flex-start !important;
-            cursor: pointer !important;
-        }
-
-        /* 暴力強制所有狀態文字純白高亮與左對齊 */
-        div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label p,
-        div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label span,
-        div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label div[data-testid="stMarkdownContainer"] {
-            color: #FFFFFF !important;
-            opacity: 1 !important;
-            font-size: 19px !important;
-            font-weight: 800 !important;
-            font-family: 'JetBrains Mono', monospace !important;
-            text-shadow: 0 2px 4px rgba(0,0,0,0.5) !important;
-            width: 100% !important;
-            text-align: left !important;
-            display: block !important;
-            margin: 0 !important;
-        }
-
-        /* Hover 時微浮起與發光 */
-        div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label:hover {
-            transform: translateY(-5px) scale(1.02) !important;
-            background: #1E293B !important;
-            border-color: #38BDF8 !important;
-            box-shadow: 0 10px 30px rgba(56, 189, 248, 0.2) !important;
-        }
-        div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label:hover p {
-            color: #38BDF8 !important;
-        }
-
-        /* Active 選中項：霓虹指示燈效果 */
-        div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label[data-checked="true"],
-        div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label:has(input:checked) {
-            background: linear-gradient(90deg, rgba(56, 189, 248, 0.3) 0%, rgba(56, 189, 248, 0.05) 100%) !important;
-            border: 1px solid #38BDF8 !important;
-            border-left: 8px solid #38BDF8 !important;
-            box-shadow: 0 0 30px rgba(56, 189, 248, 0.3) !important;
-            transform: scale(1.02) !important;
-        }
-        div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label[data-checked="true"] p,
-        div[data-testid="stSidebarUserContent"] div[data-testid="stRadio"] label:has(input:checked) p {
-            color: #FFFFFF !important;
-            font-weight: 950 !important;
-            text-shadow: 0 0 15px rgba(255, 255, 255, 0.5) !important;
-        }
-
-        /* 4. 側邊面板光束邊緣 */
-        section[data-testid="stSidebar"]::after {
-            content: "";
-            position: absolute;
-            right: 0;
-            top: 10%;
-            width: 2px;
-            height: 80%;
-            background: linear-gradient(180deg, transparent, #38BDF8, transparent);
-            box-shadow: 0 0 20px #38BDF8;
-        }
-
-        /* 5. 強化右側主標題設計 */
-        .centered-title {
-            text-align: center !important;
-            font-size: 56px !important;
-            font-weight: 950 !important;
-            letter-spacing: -2px !important;
-            background: linear-gradient(135deg, #FFFFFF 0%, #94A3B8 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            margin: 60px 0 40px 0 !important;
-        }
-
-        /* 6. 對齊右側卡片 (技術感) */
-        .tech-card {
-            position: relative;
-            background: #0F172A !important;
-            border: 1px solid #1E293B !important;
-            border-radius: 20px !important;
-            padding: 30px !important;
-            box-shadow: 0 20px 50px rgba(0,0,0,0.5) !important;
-        }
-        .tech-card::before {
-            content: "";
-            position: absolute;
-            top: -1px; left: -1px; width: 25px; height: 25px;
-            border-top: 3px solid #38BDF8; border-left: 3px solid #38BDF8;
-            border-top-left-radius: 20px;
-        }
-
-        /* 數據摘要卡片 */
-        .summary-card {
-            text-align: center;
-            background: #1E293B !important;
-            padding: 25px !important;
-            border-radius: 20px !important;
-            border: 1px solid #334155 !important;
-            box-shadow: 0 10px 20px rgba(0,0,0,0.2) !important;
-        }
-        .summary-label {
-            font-size: 13px !important; color: #94A3B8 !important;
-            font-weight: 800 !important; letter-spacing: 1px !important;
-            text-transform: uppercase; margin-bottom: 10px !important;
-        }
-        .summary-value {
-            font-family: 'JetBrains Mono' !important; font-size: 42px !important;
-            font-weight: 900 !important; color: #FFFFFF !important;
-        }
-
-        /* 修正按鈕樣貌 */
-        .stButton button {
-            background-color: #1E293B !important;
-            color: #FFFFFF !important;
-            border: 1px solid #38BDF8 !important;
-            border-radius: 12px !important;
-            width: 100% !important;
-            padding: 10px !important;
-            font-weight: 800 !important;
-            transition: all 0.2s ease !important;
-        }
-        .stButton button:hover {
-            background-color: #38BDF8 !important;
-            color: #020617 !important;
-            box-shadow: 0 0 20px rgba(56, 189, 248, 0.4) !important;
-        }
-
-        /* ---------------------------------------------------
-           下拉選單 (Selectbox) 暗黑玻璃化重塑
-           --------------------------------------------------- */
-        
-        /* 1. 標題文字 (Label) 亮度拯救 */
-        div[data-testid="stSelectbox"] label p {
-            color: #FFFFFF !important;
-            font-weight: 800 !important;
-            font-size: 15px !important;
-            letter-spacing: 1px !important;
-        }
-
-        /* 2. 選單本體 (Dropdown box) 玻璃化與外框 */
-        div[data-testid="stSelectbox"] div[data-baseweb="select"] > div {
-            background-color: rgba(15, 23, 42, 0.9) !important;
-            border: 2px solid #334155 !important;
-            border-radius: 8px !important;
-            color: #F1F5F9 !important;
-            transition: all 0.3s ease;
-        }
-
-        /* 3. 選單互動態 (Hover / Focus) 霓虹發光 */
-        div[data-testid="stSelectbox"] div[data-baseweb="select"] > div:hover,
-        div[data-testid="stSelectbox"] div[data-baseweb="select"] > div:focus-within {
-            border-color: #38BDF8 !important;
-            box-shadow: 0 0 15px rgba(56, 189, 248, 0.4) !important;
-        }
-
-        /* 4. 選單內文字與下拉箭頭 */
-        div[data-testid="stSelectbox"] div[data-baseweb="select"] span {
-            color: #F1F5F9 !important;
-            font-weight: 700 !important;
-        }
-        svg[data-baseweb="icon"] {
-            color: #38BDF8 !important;
-        }
-        /* 7. 隱藏原生開發選單 (保留左側側邊欄開關，隱藏右側開發選單) */
-        #MainMenu { display: none !important; }
-        header { 
-            background-color: transparent !important;
-            border-bottom: none !important;
-        }
-        footer { visibility: hidden; }
-
-        /* 讓側邊欄開關按鈕 (>) 變亮眼，方便您找回來 */
-        button[data-testid="stHeaderSidebarButton"] {
-            background-color: rgba(56, 189, 248, 0.1) !important;
-            border: 1px solid rgba(56, 189, 248, 0.3) !important;
-            border-radius: 8px !important;
-            color: #38BDF8 !important;
-        }
-        /* 8. 右上角角落按鈕 (修正定位與質感) */
-        #login-anchor + div {
-            position: fixed !important;
-            top: 20px !important;
-            right: 20px !important;
-            z-index: 999999 !important;
-            width: auto !important;
-        }
-
-        #login-anchor + div button {
-            background-color: #FFFFFF !important;
-            color: #3C4043 !important;
-            border: 1px solid #DADCE0 !important;
-            border-radius: 6px !important;
-            padding: 8px 20px !important;
-            font-size: 14px !important;
-            font-weight: 700 !important;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.2) !important;
-            transition: all 0.2s !important;
-        }
-
-        #login-anchor + div button:hover {
-            background-color: #F8F9FA !important;
-            border-color: #38BDF8 !important;
-            transform: translateY(-1px) !important;
-            box-shadow: 0 4px 12px rgba(56, 189, 248, 0.2) !important;
-        }
-
-        /* 隱藏原生開發選單 */
-        header[data-testid="stHeader"] {
-            background-color: transparent !important;
-        }
-        #MainMenu { visibility: hidden; }
-
-        /* 已登入名片 - 也要釘在最右上角 */
-        .user-status-card-fixed {
-            position: fixed !important;
-            top: 15px !important;
-            right: 15px !important;
-            z-index: 1000000 !important;
-            background: #1E293B !important;
-            border: 1px solid #38BDF8 !important;
-            border-radius: 12px !important;
-            padding: 5px 15px !important;
-            display: flex !important;
-            align-items: center !important;
-            gap: 10px !important;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.5) !important;
-        }
-
-        @keyframes fadeIn {
-            from { opacity: 0; transform: translateY(-10px); }
-            to { opacity: 1; transform: translateY(0); }
-        }
-        
-        </style>
-    """, unsafe_allow_html=True)
+    # Streamlit 每次 rerun 會移除本輪未重新輸出的元素，<link> / <style> 都必須每次送出
+    name = publish_stylesheet()
+    if name:
+        st.markdown(f'<link rel="stylesheet" href="{STYLESHEET_URL}/{name}">', unsafe_allow_html=True)
+    else:
+        st.markdown(f"<style>\n{GLOBAL_CSS}</style>", unsafe_allow_html=True)
+
+
+def apply_page_css(*names):
+    """
+    Inline the animation CSS a page uses (no-op when the full stylesheet is linked).
+
+    Args:
+        names (str): Keys of PAGE_CSS, e.g. 'bias_hud', 'event_log'.
+    """
+    if publish_stylesheet():
+        return
+    st.markdown("<style>\n" + "".join(PAGE_CSS[n] for n in names) + "</style>", unsafe_allow_html=True)
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+全站瀏覽紀錄 (Shared Visit Log)
+
+瀏覽紀錄原本附加在 st.session_state['visit_logs']，管理員後台只看得到自己這個 session，
+重新啟動後也全部消失。這裡改為所有 session 共用的 SQLite (WAL 模式) 追加式紀錄：
+    1. record() 只把一筆紀錄放進記憶體緩衝區，不碰磁碟 (請求路徑上不做 I/O)
+    2. 背景執行緒每 FLUSH_SECONDS 秒、或緩衝達 FLUSH_BATCH 筆時，以單一交易批次寫入
+    3. 同一個交易內順便更新彙總表 (各頁次數、每小時次數、每位使用者次數)，
+       後台直接讀彙總表，不再每次 render 把原始紀錄組成 DataFrame 重新計算
+資料庫位置由環境變數 TSE_VISIT_LOG_DB 設定 (預設為程式目錄下的 visit_log.sqlite3)。
+"""
+import atexit
+import datetime
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+DB_PATH = os.environ.get("TSE_VISIT_LOG_DB",
+                         os.path.join(os.path.dirname(os.path.abspath(__file__)), "visit_log.sqlite3"))
+
+# 批次寫入條件：每隔幾秒，或緩衝區累積到幾筆 (先到者為準)
+FLUSH_SECONDS = 5.0
+FLUSH_BATCH = 200
+
+GUEST = "訪客 (未登入)"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS visits (ts INTEGER NOT NULL, user TEXT NOT NULL, page TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS page_counts (page TEXT PRIMARY KEY, n INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS hourly_counts (hour INTEGER PRIMARY KEY, n INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS user_counts (user TEXT PRIMARY KEY, n INTEGER NOT NULL,
+                                        first_ts INTEGER NOT NULL, last_ts INTEGER NOT NULL);
+"""
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_buffer = []
+_state = {'writer': None, 'schema_ready': False, 'flushed': 0, 'last_error': None}
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=10)
+    # WAL：寫入批次時後台仍可同時讀取；synchronous=NORMAL 在 WAL 下只在 checkpoint 時 fsync
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _ensure_schema(conn):
+    if not _state['schema_ready']:
+        conn.executescript(_SCHEMA)
+        _state['schema_ready'] = True
+
+
+def record(page, user=None):
+    """
+    Queue one page view (non-blocking; written by the background flusher).
+
+    Args:
+        page (str): Page / module name.
+        user (str): Logged-in e-mail, or None for guests.
+    """
+    with _lock:
+        _buffer.append((int(time.time()), user or GUEST, page))
+        pending = len(_buffer)
+        if _state['writer'] is None:
+            _state['writer'] = threading.Thread(target=_writer, daemon=True, name="tse-visit-log")
+            _state['writer'].start()
+    if pending >= FLUSH_BATCH:
+        _wake.set()
+
+
+def flush():
+    """
+    Write every buffered visit in one transaction and update the aggregate tables.
+
+    Returns:
+        int: Number of visits written.
+    """
+    with _lock:
+        batch = _buffer[:]
+        _buffer.clear()
+    if not batch:
+        return 0
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                _ensure_schema(conn)
+                conn.executemany("INSERT INTO visits (ts, user, page) VALUES (?, ?, ?)", batch)
+                conn.executemany("INSERT INTO page_counts (page, n) VALUES (?, 1) "
+                                 "ON CONFLICT(page) DO UPDATE SET n = n + 1", [(p,) for _, _, p in batch])
+                conn.executemany("INSERT INTO hourly_counts (hour, n) VALUES (?, 1) "
+                                 "ON CONFLICT(hour) DO UPDATE SET n = n + 1", [(ts // 3600,) for ts, _, _ in batch])
+                conn.executemany("INSERT INTO user_counts (user, n, first_ts, last_ts) VALUES (?, 1, ?, ?) "
+                                 "ON CONFLICT(user) DO UPDATE SET n = n + 1, last_ts = MAX(last_ts, excluded.last_ts)",
+                                 [(u, ts, ts) for ts, u, _ in batch])
+        finally:
+            conn.close()
+        _state['flushed'] += len(batch)
+        _state['last_error'] = None
+        return len(batch)
+    except Exception as e:
+        # 寫入失敗時把這批放回緩衝區，下次再試
+        print(f"Visit log flush failed: {e}")
+        _state['last_error'] = str(e)
+        with _lock:
+            _buffer[:0] = batch
+        return 0
+
+
+def _writer():
+    while True:
+        _wake.wait(FLUSH_SECONDS)
+        _wake.clear()
+        flush()
+
+
+atexit.register(flush)
+
+
+def pending():
+    with _lock:
+        return len(_buffer)
+
+
+def summary(recent=20, hours=48):
+    """
+    Pre-aggregated traffic for the admin page (flushes pending visits first).
+
+    Args:
+        recent (int): Number of latest raw visits to include.
+        hours (int): Length of the hourly series.
+
+    Returns:
+        dict: total, unique_users, pages (模組, 次數), hourly (時段, 次數),
+        users (使用者, 次數, 最後造訪) and recent (時間, 使用者, 瀏覽模組) DataFrames.
+    """
+    flush()
+    empty = {'total': 0, 'unique_users': 0, 'pages': pd.DataFrame(columns=['模組', '次數']),
+             'hourly': pd.DataFrame(columns=['時段', '次數']), 'users': pd.DataFrame(columns=['使用者', '次數', '最後造訪']),
+             'recent': pd.DataFrame(columns=['時間', '使用者', '瀏覽模組'])}
+    if not os.path.exists(DB_PATH):
+        return empty
+    try:
+        conn = _connect()
+        try:
+            _ensure_schema(conn)
+            pages = pd.read_sql_query("SELECT page AS 模組, n AS 次數 FROM page_counts ORDER BY n DESC", conn)
+            since = int(time.time()) // 3600 - hours + 1
+            hourly = pd.read_sql_query("SELECT hour, n AS 次數 FROM hourly_counts WHERE hour >= ? ORDER BY hour",
+                                       conn, params=(since,))
+            users = pd.read_sql_query("SELECT user AS 使用者, n AS 次數, last_ts FROM user_counts ORDER BY last_ts DESC", conn)
+            # 最近幾筆原始紀錄依 rowid 倒序讀取，不掃整張表
+            rows = pd.read_sql_query("SELECT ts, user AS 使用者, page AS 瀏覽模組 FROM visits ORDER BY rowid DESC LIMIT ?",
+                                     conn, params=(recent,))
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Visit log read failed: {e}")
+        return empty
+
+    def local_time(seconds, fmt):
+        return [datetime.datetime.fromtimestamp(int(s)).strftime(fmt) for s in seconds]
+
+    hourly.insert(0, '時段', local_time(hourly.pop('hour') * 3600, "%m/%d %H:00"))
+    users['最後造訪'] = local_time(users.pop('last_ts'), "%Y-%m-%d %H:%M:%S")
+    rows.insert(0, '時間', local_time(rows.pop('ts'), "%Y-%m-%d %H:%M:%S"))
+    # 訪客未登入無法區分身分，不計入不重複使用者
+    return {'total': int(pages['次數'].sum()), 'unique_users': int((users['使用者'] != GUEST).sum()),
+            'pages': pages, 'hourly': hourly, 'users': users, 'recent': rows}
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+滾動樣本外驗證 (Walk-Forward Evaluation Harness)
+
+乖離 20% 觸發與 7% 回檔機率的門檻，都是看著整段歷史手動調出來的
+(例如 backtest 中排除 2021 上半年)。這裡把時間切成「訓練窗 → 測試窗」並往前滾動：
+    1. 只用訓練窗的資料重新推導統計 (乖離門檻與其命中率、7% 事件的續跌機率)
+    2. 把訓練窗得到的門檻 / 機率原封不動套到緊接著的測試窗評分
+    3. 彙總樣本內 vs 樣本外的命中率，檢查規則是否只是過度擬合歷史
+訓練窗中「結果尚未揭曉」的樣本 (前瞻期間跨過訓練窗終點) 一律排除，避免偷看未來。
+各折 (fold) 之間互相獨立，且每折只是幾次陣列遮罩運算 (全部約數毫秒)，直接在同一行程依序計算；
+不使用行程池，避免在多執行緒的 Streamlit 伺服器中 fork 子行程。
+
+命中定義：
+    乖離訊號  觸發週之後 4 週內出現跌幅 > 3.5% (與 calc_event_risk 的閃跌定義相同)
+    7% 訊號   觸發後的最大跌幅達到 10% / 15% / 20%
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from outcomes import DRAWDOWN
+from result_types import NS_PER_DAY
+from strategy_bias import FLASH_DROP_PCT, TRIGGER_LEVEL, RESET_LEVEL
+
+NS_PER_YEAR = int(365.25 * NS_PER_DAY)
+
+TRAIN_YEARS = 10
+TEST_YEARS = 3
+
+# 訓練窗中挑選乖離門檻的候選值，與每個門檻最少需要的觸發次數
+BIAS_LEVELS = (15.0, 16.0, 17.0, 18.0, 19.0, 20.0, 21.0, 22.0, 23.0, 24.0, 25.0)
+MIN_TRAIN_SIGNALS = 3
+BIAS_HORIZON = '4w'
+BIAS_HORIZON_WEEKS = 4
+
+DD_LEVELS = (10.0, 15.0, 20.0)
+
+
+def bias_trigger_mask(bias, level, reset_gap=TRIGGER_LEVEL - RESET_LEVEL):
+    """
+    Weeks where bias first reaches `level` after having fallen below `level - reset_gap`
+    (the same 20% / 15% hysteresis as strategy_bias.backtest, shifted with the level).
+    """
+    bias = np.asarray(bias, dtype=np.float64)
+    state = np.where(bias >= level, 1.0, np.where(bias < level - reset_gap, 0.0, np.nan))
+    state = pd.Series(state).ffill().fillna(0.0).to_numpy()
+    prev = np.concatenate(([0.0], state[:-1]))
+    return (state == 1.0) & (prev == 0.0)
+
+
+def make_folds(start_ns, end_ns, train_years=TRAIN_YEARS, test_years=TEST_YEARS, expanding=False):
+    """
+    (train_start, train_end, test_end) boundaries in ns; train is [train_start, train_end),
+    test is [train_end, test_end).
+    """
+    folds = []
+    train_end = start_ns + train_years * NS_PER_YEAR
+    while train_end < end_ns:
+        test_end = min(train_end + test_years * NS_PER_YEAR, end_ns + 1)
+        train_start = start_ns if expanding else train_end - train_years * NS_PER_YEAR
+        folds.append((train_start, train_end, test_end))
+        train_end += test_years * NS_PER_YEAR
+    return folds
+
+
+def _rate(hits):
+    return round(float(hits.mean() * 100), 1) if len(hits) else None
+
+
+def _bias_fold(fold, week_ns, triggers, flash, horizon_ns):
+    train_start, train_end, test_end = fold
+    # 訓練窗只收前瞻 4 週已在訓練窗內結束的觸發
+    train = (week_ns >= train_start) & (week_ns + horizon_ns < train_end)
+    test = (week_ns >= train_end) & (week_ns < test_end) & ~np.isnan(flash)
+    hit = flash < -FLASH_DROP_PCT
+
+    rows, best = [], None
+    for level, mask in triggers.items():
+        tr, te = mask & train, mask & test
+        row = {'level': level, 'n_train': int(tr.sum()), 'train_hit': _rate(hit[tr]),
+               'n_test': int(te.sum()), 'test_hit': _rate(hit[te])}
+        rows.append(row)
+        if row['n_train'] >= MIN_TRAIN_SIGNALS and (best is None or row['train_hit'] > best['train_hit']):
+            best = row
+    fixed = next(r for r in rows if r['level'] == TRIGGER_LEVEL)
+    return [dict(r, rule=rule) for rule, r in (('bias_fixed_20', fixed), ('bias_tuned', best)) if r is not None]
+
+
+def _drawdown_fold(fold, trigger_ns, settle_ns, max_dd):
+    train_start, train_end, test_end = fold
+    # 訓練窗只收在訓練窗內就已解套 (最大跌幅已確定) 的事件
+    train = (trigger_ns >= train_start) & (settle_ns < train_end)
+    test = (trigger_ns >= train_end) & (trigger_ns < test_end) & (settle_ns < np.iinfo(np.int64).max)
+    rows = []
+    for level in DD_LEVELS:
+        hit = max_dd >= level
+        rows.append({'rule': f'7pct_dd_{int(level)}', 'level': level,
+                     'n_train': int(train.sum()), 'train_hit': _rate(hit[train]),
+                     'n_test': int(test.sum()), 'test_hit': _rate(hit[test])})
+    return rows
+
+
+def _run_fold(fold, bias_inputs, dd_inputs):
+    rows = _bias_fold(fold, *bias_inputs) + _drawdown_fold(fold, *dd_inputs)
+    train_start, train_end, test_end = fold
+    ts = lambda ns: pd.Timestamp(ns).strftime('%Y-%m-%d')
+    for r in rows:
+        r.update(train_start=ts(train_start), train_end=ts(train_end), test_end=ts(test_end))
+    return rows
+
+
+def walk_forward(weekly, outcomes_weekly, events, train_years=TRAIN_YEARS, test_years=TEST_YEARS,
+                 expanding=False):
+    """
+    Roll train/test windows across history and score the bias and 7% rules out of sample.
+
+    Args:
+        weekly (pd.DataFrame): Weekly bars with Bias.
+        outcomes_weekly (OutcomeMatrix): Weekly forward outcomes (same index as `weekly`).
+        events (EventTable): 7% drawdown events.
+        train_years, test_years (int): Window lengths.
+        expanding (bool): Anchor every training window at the first bar.
+
+    Returns:
+        pd.DataFrame: One row per fold and rule: train/test sizes and hit rates (%).
+    """
+    week_ns = np.asarray(weekly.index, dtype='datetime64[ns]').view(np.int64)
+    bias = weekly['Bias'].to_numpy(dtype=np.float64)
+    # 各候選門檻的觸發週只算一次，各折共用
+    triggers = {level: bias_trigger_mask(bias, level) for level in BIAS_LEVELS}
+    flash = outcomes_weekly.column(BIAS_HORIZON, DRAWDOWN)
+    bias_inputs = (week_ns, triggers, flash, BIAS_HORIZON_WEEKS * 7 * NS_PER_DAY)
+
+    # 最大跌幅在解套後才確定；尚未解套的事件不進入任何一窗
+    settle_ns = np.where(events.recovered, events.recovery_date, np.iinfo(np.int64).max)
+    dd_inputs = (events.trigger_date, settle_ns, events.max_drawdown)
+
+    folds = make_folds(int(week_ns[0]), int(week_ns[-1]), train_years, test_years, expanding)
+    results = [_run_fold(fold, bias_inputs, dd_inputs) for fold in folds]
+
+    report = pd.DataFrame([dict(r, fold=i) for i, rows in enumerate(results) for r in rows])
+    cols = ['fold', 'rule', 'level', 'train_start', 'train_end', 'test_end',
+            'n_train', 'train_hit', 'n_test', 'test_hit']
+    return report[cols] if not report.empty else report
+
+
+def summarize(report):
+    """
+    Per rule: event-weighted in-sample vs out-of-sample hit rates and their gap (percentage points).
+    """
+    if report.empty:
+        return pd.DataFrame()
+
+    def pooled(g, n_col, hit_col):
+        n = g[n_col].where(g[hit_col].notna(), 0)
+        total = n.sum()
+        return round(float((g[hit_col].fillna(0) * n).sum() / total), 1) if total else None
+
+    rows = []
+    for rule, g in report.groupby('rule', sort=False):
+        ins, oos = pooled(g, 'n_train', 'train_hit'), pooled(g, 'n_test', 'test_hit')
+        rows.append({'rule': rule, 'folds': len(g), 'in_sample_hit': ins, 'out_of_sample_hit': oos,
+                     'n_test': int(g['n_test'].sum()),
+                     'gap': round(oos - ins, 1) if ins is not None and oos is not None else None})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    import analytics_service
+
+    t0 = time.perf_counter()
+    rep = walk_forward(analytics_service.get_weekly(), analytics_service.get_outcomes(),
+                       analytics_service.get_7pct_events())
+    print(rep.to_string())
+    print(summarize(rep).to_string())
+    print(f"{time.perf_counter() - t0:.2f}s")
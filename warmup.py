@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+啟動預熱 (Startup Warm-up Job)
+
+伺服器行程啟動時只抓一次 ^TWII 日線，接著在執行緒池中平行計算
+乖離回測、7% 回檔事件、上漲波段與分布統計，發布到 artifact_cache。
+第一位訪客進站時直接讀取成品，不再逐頁序列下載與回測。
+"""
+import datetime
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import alerts
+import analytics_service
+import artifact_cache
+
+WARMUP_TICKER = analytics_service.DEFAULT_TICKER
+
+# 成品超過此秒數視為過期：背景重新預熱，期間繼續提供舊資料
+REFRESH_SECONDS = 15 * 60
+
+# 容器健康檢查用：首次預熱完成後寫入此檔案 (未設定環境變數則不寫)
+READY_FILE = os.environ.get("TSE_WARMUP_READY_FILE")
+
+# 設定 TSE_WARMUP=0 時不啟動預熱 (例如 bench_startup 量測 import 時間，不應觸發下載)
+ENABLED = os.environ.get("TSE_WARMUP", "1") != "0"
+
+_lock = threading.Lock()
+_done = threading.Event()
+_state = {
+    'status': 'idle',       # idle / running / ready / failed
+    'ready': False,         # 首次預熱成功後永遠為 True (重新預熱期間仍可服務)
+    'started_at': None,
+    'finished_at': None,
+    'version': None,
+    'error': None,
+    'timings': {}
+}
+
+
+def _timed(job, *args):
+    t0 = time.perf_counter()
+    # 日線剛換新版本：就地重建，不回傳上一版成品
+    analytics_service.build_now(job, *args)
+    return round(time.perf_counter() - t0, 3)
+
+
+def run_warmup(ticker=WARMUP_TICKER):
+    """
+    Fetch the ticker once and build every page artifact concurrently.
+
+    Runs synchronously in the caller's thread and raises if the download fails.
+
+    Returns:
+        dict: Seconds spent per step, e.g. {'fetch': 2.1, 'bias': 0.4, ...}.
+    """
+    t0 = time.perf_counter()
+    analytics_service.refresh_daily(ticker)
+    timings = {'fetch': round(time.perf_counter() - t0, 3)}
+
+    # 共同的中間結果 (7% 事件、週線) 由 analytics_service 的快取鍵鎖保證只算一次
+    builders = analytics_service.WARMUP_BUILDERS
+    with ThreadPoolExecutor(max_workers=len(builders), thread_name_prefix="tse-warmup") as pool:
+        futures = {name: pool.submit(_timed, build, ticker) for name, build in builders.items()}
+        for name, fut in futures.items():
+            timings[name] = fut.result()
+
+    timings['total'] = round(time.perf_counter() - t0, 3)
+    return timings
+
+
+def _check_alerts(ticker):
+    # 每次預熱 (新日線) 完成後比對警報門檻；失敗不影響預熱結果
+    try:
+        bias = analytics_service.get_weekly(ticker)['Bias'].iloc[-1]
+        alerts.evaluate(ticker, bias=float(bias),
+                        drawdown=analytics_service.live_metrics(ticker)['downward_dd'])
+    except Exception as e:
+        print(f"Alert evaluation failed: {e}")
+
+
+def _worker(ticker):
+    try:
+        timings = run_warmup(ticker)
+        _check_alerts(ticker)
+        with _lock:
+            _state.update(status='ready', ready=True, error=None, timings=timings,
+                          version=analytics_service.data_version(ticker),
+                          finished_at=datetime.datetime.now())
+        if READY_FILE:
+            try:
+                with open(READY_FILE, "w", encoding="utf-8") as f:
+                    f.write(_state['version'])
+            except OSError:
+                pass
+    except Exception as e:
+        print(f"Warm-up failed: {e}")
+        traceback.print_exc()
+        with _lock:
+            _state.update(status='failed', error=str(e), finished_at=datetime.datetime.now())
+    finally:
+        _done.set()
+
+
+def _is_stale(ticker):
+    age = artifact_cache.age_seconds(analytics_service.cache_key('daily', ticker))
+    return age is None or age > REFRESH_SECONDS
+
+
+def start_warmup(ticker=WARMUP_TICKER, force=False):
+    """
+    Start the warm-up in a background thread (idempotent).
+
+    Called on every rerun: it only starts a thread on a cold process, after a
+    failure, or when the published data is older than REFRESH_SECONDS.
+
+    Args:
+        ticker (str): The ticker symbol to precompute.
+        force (bool): Rebuild even if the published data is still fresh.
+
+    Returns:
+        bool: True if a new warm-up thread was started.
+    """
+    if not ENABLED:
+        return False
+    with _lock:
+        if _state['status'] == 'running':
+            return False
+        if _state['status'] == 'ready' and not force and not _is_stale(ticker):
+            return False
+        _state.update(status='running', started_at=datetime.datetime.now(), error=None)
+        _done.clear()
+
+    threading.Thread(target=_worker, args=(ticker,), daemon=True, name="tse-warmup").start()
+    return True
+
+
+def is_ready():
+    with _lock:
+        return _state['ready']
+
+
+def wait_until_ready(timeout=None):
+    """
+    Block until the current warm-up finishes; returns is_ready().
+    """
+    _done.wait(timeout)
+    return is_ready()
+
+
+def warmup_status():
+    with _lock:
+        return dict(_state)
+
+
+if __name__ == "__main__":
+    print(run_warmup())
@@ -1,6 +1,9 @@
 import pandas as pd
 import numpy as np
 
+from result_types import WaveTable, WAVE_UP, WAVE_DOWN, to_ns
+
+
 def analyze_waves(df, reversal_percent=10.0):
     """
     Identify upward and downward waves in the price history.
@@ -13,24 +16,36 @@ def analyze_waves(df, reversal_percent=10.0):
     Returns:
         List of dictionaries containing wave information.
     """
-    waves = []
-    
+    return build_wave_table(df, reversal_percent).to_records()
+
+
+def build_wave_table(df, reversal_percent=10.0):
+    """
+    Columnar core of `analyze_waves`.
+
+    Returns:
+        WaveTable: Waves in chronological order, dates kept as int64.
+    """
     if len(df) == 0:
-        return waves
-        
+        return WaveTable.empty()
+
+    # 逐欄收集，最後一次轉成 NumPy 陣列 (不再為每個波段建立 dict)
+    kinds, starts, ends, start_prices, end_prices, ongoing = [], [], [], [], [], []
+
+    # 直接走訪 int64 日期與價格陣列，避免 iterrows 每列建立 Series
+    dates = to_ns(df.index)
+    highs = df['High'].to_numpy(dtype=np.float64)
+    lows = df['Low'].to_numpy(dtype=np.float64)
+
     state = 0 # 1 for uptrend, -1 for downtrend
     
-    current_extreme_price = df['Close'].iloc[0]
-    current_extreme_date = df.index[0]
+    current_extreme_price = float(df['Close'].iloc[0])
+    current_extreme_date = dates[0]
     
-    wave_start_date = df.index[0]
-    wave_start_price = df['Close'].iloc[0]
+    wave_start_date = dates[0]
+    wave_start_price = current_extreme_price
     
-    for date, row in df.iterrows():
-        high = row['High']
-        low = row['Low']
-        close = row['Close']
-        
+    for date, high, low in zip(dates, highs, lows):
         # Initial state determination
         if state == 0:
             if high >= current_extreme_price * (1 + reversal_percent / 100.0):
@@ -59,18 +74,13 @@ def analyze_waves(df, reversal_percent=10.0):
                 
             # Check for reversal to downtrend
             if low <= current_extreme_price * (1 - reversal_percent / 100.0):
-                wave = {
-                    'type': 'up',
-                    'start_date': wave_start_date,
-                    'end_date': current_extreme_date,
-                    'highest_price': current_extreme_price,
-                    'lowest_price': wave_start_price,
-                    # For uptrend, start is bottom, end is peak
-                    'start_price': wave_start_price, 
-                    'end_price': current_extreme_price,
-                    'ongoing': False
-                }
-                waves.append(wave)
+                # For uptrend, start is bottom, end is peak
+                kinds.append(WAVE_UP)
+                starts.append(wave_start_date)
+                ends.append(current_extreme_date)
+                start_prices.append(wave_start_price)
+                end_prices.append(current_extreme_price)
+                ongoing.append(False)
                 
                 # Start downtrend
                 state = -1
@@ -87,18 +97,13 @@ def analyze_waves(df, reversal_percent=10.0):
                 
             # Check for reversal to uptrend
             if high >= current_extreme_price * (1 + reversal_percent / 100.0):
-                wave = {
-                    'type': 'down',
-                    'start_date': wave_start_date,
-                    'end_date': current_extreme_date,
-                    'highest_price': wave_start_price,
-                    'lowest_price': current_extreme_price,
-                    # For downtrend, start is peak, end is bottom
-                    'start_price': wave_start_price,
-                    'end_price': current_extreme_price,
-                    'ongoing': False
-                }
-                waves.append(wave)
+                # For downtrend, start is peak, end is bottom
+                kinds.append(WAVE_DOWN)
+                starts.append(wave_start_date)
+                ends.append(current_extreme_date)
+                start_prices.append(wave_start_price)
+                end_prices.append(current_extreme_price)
+                ongoing.append(False)
                 
                 # Start uptrend
                 state = 1
@@ -109,16 +114,18 @@ def analyze_waves(df, reversal_percent=10.0):
 
     # Add the final incomplete wave if needed
     if state != 0 and wave_start_date != current_extreme_date:
-         wave = {
-             'type': 'up' if state == 1 else 'down',
-             'start_date': wave_start_date,
-             'end_date': current_extreme_date,
-             'highest_price': current_extreme_price if state == 1 else wave_start_price,
-             'lowest_price': wave_start_price if state == 1 else current_extreme_price,
-             'start_price': wave_start_price,
-             'end_price': current_extreme_price,
-             'ongoing': True
-         }
-         waves.append(wave)
+        kinds.append(WAVE_UP if state == 1 else WAVE_DOWN)
+        starts.append(wave_start_date)
+        ends.append(current_extreme_date)
+        start_prices.append(wave_start_price)
+        end_prices.append(current_extreme_price)
+        ongoing.append(True)
 
-    return waves
+    return WaveTable(
+        kind=np.asarray(kinds, dtype=np.int8),
+        start_date=np.asarray(starts, dtype=np.int64),
+        end_date=np.asarray(ends, dtype=np.int64),
+        start_price=np.asarray(start_prices, dtype=np.float64),
+        end_price=np.asarray(end_prices, dtype=np.float64),
+        ongoing=np.asarray(ongoing, dtype=bool)
+    )
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+波段人工修正表 (Declarative Wave Overrides)
+
+7% 轉折演算法算出的上漲波段，偶爾需要依照大局觀人工修正。
+修正內容寫在 wave_overrides.json (以代號分組)，由 apply_overrides 一次套用：
+所有用到的日期先對已載入的日線收盤價做一次 reindex 查價，不再重新下載資料，
+新增修正只需要編輯 JSON。
+
+支援的指令 (依序套用，日期皆指演算法原始的「起漲日期」)：
+    merge       {"start", "with"}                      把 with 波段併入 start 波段
+    remove      {"starts": [...]}                      移除碎步波段
+    move_end    {"start", "end"}                       修正波段終點
+    move_start  {"start", "new_start"}                 修正波段起點
+    split       {"start", "end", "next_start", "next_end"}  拆成兩段
+"""
+import json
+import os
+import threading
+
+import pandas as pd
+
+OVERRIDES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wave_overrides.json")
+
+START = '起漲日期 (前波破底)'
+END = '最高日期 (下波前高)'
+START_PRICE = '起漲價格'
+END_PRICE = '最高價格 (或現價)'
+GAIN = '漲幅(%)'
+DAYS = '花費天數'
+STATUS = '狀態'
+PRE_DRAWDOWN = '前波清洗度(%)'
+
+_lock = threading.Lock()
+_loaded = {'path': None, 'mtime': None, 'data': {}}
+
+
+def load_overrides(path=OVERRIDES_FILE):
+    """
+    Load the overrides file, re-reading it only when its mtime changes.
+
+    Returns:
+        dict: {ticker: [override, ...]}, empty if the file is missing or invalid.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+
+    with _lock:
+        if _loaded['path'] == path and _loaded['mtime'] == mtime:
+            return _loaded['data']
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading wave overrides: {e}")
+            data = {}
+        _loaded.update(path=path, mtime=mtime, data=data)
+        return data
+
+
+def overrides_for(ticker, path=OVERRIDES_FILE):
+    return load_overrides(path).get(ticker, [])
+
+
+def _referenced_dates(overrides):
+    dates = set()
+    for o in overrides:
+        for field in ('end', 'new_start', 'next_start', 'next_end'):
+            if field in o:
+                dates.add(o[field])
+    return dates
+
+
+def _close_lookup(df_daily, dates):
+    # 一次 reindex 取得所有修正日期的收盤價，非交易日 (NaN) 不列入
+    if not dates or df_daily is None or df_daily.empty:
+        return {}
+    close = df_daily['Close']
+    close = pd.Series(close.to_numpy(), index=close.index.normalize())
+    close = close[~close.index.duplicated(keep='last')]
+    keys = sorted(dates)
+    px = close.reindex(pd.to_datetime(keys)).to_numpy()
+    return {k: round(float(p), 2) for k, p in zip(keys, px) if pd.notna(p)}
+
+
+def apply_overrides(up_df, df_daily, overrides):
+    """
+    Apply declarative corrections to the up-wave table in a single pass.
+
+    Overrides whose target wave or price date is missing are skipped, so the
+    same file stays valid as the price history grows.
+
+    Args:
+        up_df (pd.DataFrame): Up-wave table built by the analytics service.
+        df_daily (pd.DataFrame): Already-loaded daily bars with a Close column.
+        overrides (list): Override dicts, see the module docstring.
+
+    Returns:
+        pd.DataFrame: A corrected copy, sorted by start date.
+    """
+    if up_df is None or up_df.empty or not overrides:
+        return up_df
+
+    out = up_df.copy()
+    prices = _close_lookup(df_daily, _referenced_dates(overrides))
+    row_of = {s: idx for idx, s in out[START].items()}
+    touched, dropped, new_rows = set(), set(), []
+
+    for o in overrides:
+        op = o.get('op')
+        idx = row_of.get(o.get('start'))
+        if op == 'remove':
+            dropped.update(row_of[s] for s in o.get('starts', []) if s in row_of)
+        elif idx is None:
+            continue
+        elif op == 'merge':
+            tail = row_of.get(o.get('with'))
+            if tail is None:
+                continue
+            out.at[idx, END_PRICE] = max(out.at[idx, END_PRICE], out.at[tail, END_PRICE])
+            out.at[idx, END] = out.at[tail, END]
+            out.at[idx, STATUS] = out.at[tail, STATUS]
+            dropped.add(tail)
+            touched.add(idx)
+        elif op == 'move_end':
+            if o['end'] not in prices:
+                continue
+            out.at[idx, END] = o['end']
+            out.at[idx, END_PRICE] = prices[o['end']]
+            touched.add(idx)
+        elif op == 'move_start':
+            if o['new_start'] not in prices:
+                continue
+            out.at[idx, START] = o['new_start']
+            out.at[idx, START_PRICE] = prices[o['new_start']]
+            touched.add(idx)
+        elif op == 'split':
+            if not all(o.get(f) in prices for f in ('end', 'next_start', 'next_end')):
+                continue
+            next_wave = out.loc[idx].to_dict()
+            if PRE_DRAWDOWN in next_wave:
+                # 拆出的第二段，前波清洗度為第一段終點到第二段起點之間的最大跌幅
+                lows = df_daily['Low'].loc[o['end']:o['next_start']]
+                next_wave[PRE_DRAWDOWN] = (float(lows.min()) - prices[o['end']]) / prices[o['end']] * 100
+            next_wave.update({
+                START: o['next_start'], START_PRICE: prices[o['next_start']],
+                END: o['next_end'], END_PRICE: prices[o['next_end']], STATUS: '已完結'
+            })
+            new_rows.append(next_wave)
+            out.at[idx, END] = o['end']
+            out.at[idx, END_PRICE] = prices[o['end']]
+            out.at[idx, STATUS] = '已完結'
+            touched.add(idx)
+        else:
+            print(f"Unknown wave override op: {op}")
+
+    touched -= dropped
+    out = out.drop(index=list(dropped))
+    if new_rows:
+        first = int(up_df.index.max()) + 1
+        added = pd.DataFrame(new_rows, index=range(first, first + len(new_rows)))
+        out = pd.concat([out, added])
+        touched.update(added.index)
+
+    # 被修改的列統一以向量運算重算漲幅與天數 (進行中的波段以最後交易日計算天數)
+    mask = out.index.isin(list(touched))
+    if mask.any():
+        rows = out.loc[mask]
+        last_day = df_daily.index[-1].strftime('%Y-%m-%d') if df_daily is not None and not df_daily.empty else None
+        end_str = rows[END].where(rows[STATUS] != '進行中', last_day)
+        out.loc[mask, GAIN] = ((rows[END_PRICE] - rows[START_PRICE]) / rows[START_PRICE] * 100).round(2)
+        out.loc[mask, DAYS] = (pd.to_datetime(end_str) - pd.to_datetime(rows[START])).dt.days.astype(int)
+
+    return out.sort_values(START, kind='stable').reset_index(drop=True)